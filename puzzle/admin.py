@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 # mypy: ignore-errors
+import codecs
 import json
+from collections.abc import Iterable
+from itertools import chain
 from typing import Any
 
+from django import forms
 from django.contrib import admin, messages
 from django.db.models import QuerySet
-from django.http import HttpRequest, HttpResponse
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
 from django.middleware.csrf import get_token
 from django.shortcuts import redirect
 from django.urls import path
@@ -14,11 +18,48 @@ from django.urls import path
 from .models import AnalyticsEvent, DailyChallenge, GameSession, PuzzleTemplate
 from .services.analytics import average_time_seconds_by_difficulty
 from .services.engines import GridSpec
+from .services.export import CONTENT_TYPES, iter_export
 from .services.factory import get_engine_for
+from .services.importer import import_puzzles
+from .services.parallel import Candidate, check_puzzle
+from .services.pool import pool_depths
+
+
+class PuzzleTemplateForm(forms.ModelForm):
+    """Re-validates an edited puzzle and refreshes its solve trace and canonical hash."""
+
+    PUZZLE_FIELDS = ("size", "box_h", "box_w", "givens", "solution")
+
+    class Meta:
+        model = PuzzleTemplate
+        fields = "__all__"
+
+    def clean(self) -> dict[str, Any]:
+        data = super().clean()
+        if self.errors or not set(self.changed_data) & set(self.PUZZLE_FIELDS):
+            return data
+        spec = GridSpec(size=data["size"], box_h=data["box_h"], box_w=data["box_w"])
+        checked = check_puzzle(Candidate(0, spec, data["givens"], data["solution"]))
+        if checked.error:
+            raise forms.ValidationError(f"Invalid puzzle: {checked.error}")
+        if data.get("parent") is None:
+            clash = (
+                PuzzleTemplate.objects.filter(canonical_hash=checked.canonical, parent__isnull=True)
+                .exclude(pk=self.instance.pk)
+                .values_list("pk", flat=True)
+                .first()
+            )
+            if clash is not None:
+                raise forms.ValidationError(f"Equivalent to template #{clash}")
+        # Not form fields, so saving the instance keeps these
+        self.instance.solve_trace = checked.trace
+        self.instance.canonical_hash = checked.canonical
+        return data
 
 
 @admin.register(PuzzleTemplate)
 class PuzzleTemplateAdmin(admin.ModelAdmin):
+    form = PuzzleTemplateForm
     list_display = (
         "id",
         "size",
@@ -31,7 +72,8 @@ class PuzzleTemplateAdmin(admin.ModelAdmin):
     list_filter = ("size", "difficulty_label", "source", "created_at")
     search_fields = ("source",)
     readonly_fields = ("created_at",)
-    actions = ("validate_templates", "export_selected_json")
+    raw_id_fields = ("parent",)
+    actions = ("validate_templates", "export_selected_json", "export_selected_ndjson")
 
     def validate_templates(self, request: HttpRequest, queryset: QuerySet) -> None:
         """Validate selected templates for uniqueness using the engine."""
@@ -56,31 +98,29 @@ class PuzzleTemplateAdmin(admin.ModelAdmin):
 
     validate_templates.short_description = "Validate uniqueness for selected templates"  # type: ignore[attr-defined]
 
-    def export_selected_json(self, request: HttpRequest, queryset: QuerySet) -> HttpResponse:
-        """Export selected templates as a JSON array download."""
-        items = []
-        for t in queryset:  # type: ignore[assignment]
-            items.append(
-                {
-                    "id": t.id,
-                    "size": t.size,
-                    "box_h": t.box_h,
-                    "box_w": t.box_w,
-                    "givens": t.givens,
-                    "solution": t.solution,
-                    "difficulty_metric": t.difficulty_metric,
-                    "difficulty_label": t.difficulty_label,
-                    "source": t.source,
-                    "created_at": t.created_at.isoformat(),
-                }
-            )
-        data = json.dumps(items)
-        resp = HttpResponse(data, content_type="application/json")
-        resp["Content-Disposition"] = "attachment; filename=puzzles.json"
+    def _streaming_export(self, queryset: QuerySet, fmt: str) -> StreamingHttpResponse:
+        resp = StreamingHttpResponse(
+            iter_export(queryset, fmt=fmt), content_type=CONTENT_TYPES[fmt]
+        )
+        resp["Content-Disposition"] = f"attachment; filename=puzzles.{fmt}"
         return resp
 
+    def export_selected_json(
+        self, request: HttpRequest, queryset: QuerySet
+    ) -> StreamingHttpResponse:
+        """Export selected templates as a streamed JSON array download."""
+        return self._streaming_export(queryset, "json")
+
     export_selected_json.short_description = "Export selected templates as JSON"  # type: ignore[attr-defined]
 
+    def export_selected_ndjson(
+        self, request: HttpRequest, queryset: QuerySet
+    ) -> StreamingHttpResponse:
+        """Export selected templates as a streamed NDJSON download (one object per line)."""
+        return self._streaming_export(queryset, "ndjson")
+
+    export_selected_ndjson.short_description = "Export selected templates as NDJSON"  # type: ignore[attr-defined]
+
     def get_urls(self) -> list:  # type: ignore[override]
         urls = super().get_urls()
         custom = [
@@ -94,33 +134,38 @@ class PuzzleTemplateAdmin(admin.ModelAdmin):
 
     def queue_view(self, request: HttpRequest) -> HttpResponse:
         if request.method == "POST":
-            # Handle JSON import
+            # Import an uploaded NDJSON/text file and/or a pasted JSON array;
+            # every puzzle is validated and rated before it is stored.
+            lines: list[Iterable[str]] = []
+            upload = request.FILES.get("file")
+            if upload is not None:
+                lines.append(codecs.iterdecode(upload, "utf-8"))
             json_text = request.POST.get("json", "").strip()
             if json_text:
                 try:
                     payload = json.loads(json_text)
                     if not isinstance(payload, list):
                         raise ValueError("Expected a JSON array")
-                    created = 0
-                    for item in payload:
-                        PuzzleTemplate.objects.create(
-                            size=int(item["size"]),
-                            box_h=int(item["box_h"]),
-                            box_w=int(item["box_w"]),
-                            givens=str(item["givens"]),
-                            solution=str(item["solution"]),
-                            difficulty_metric=float(item.get("difficulty_metric", 0.0)),
-                            difficulty_label=str(
-                                item.get("difficulty_label", PuzzleTemplate.DIFFICULTY_EASY)
-                            ),
-                            source=str(item.get("source", "import")),
-                        )
-                        created += 1
-                    self.message_user(
-                        request, f"Imported {created} puzzle(s)", level=messages.SUCCESS
-                    )
-                except Exception as exc:  # pragma: no cover - edge case messaging
+                except ValueError as exc:
                     self.message_user(request, f"Import failed: {exc}", level=messages.ERROR)
+                    return redirect("admin:puzzle_puzzletemplate_queue")
+                lines.append(json.dumps(item) for item in payload)
+            if lines:
+                samples: list[str] = []
+
+                def note(line_no: int, reason: str) -> None:
+                    if len(samples) < 5:
+                        samples.append(f"line {line_no}: {reason}")
+
+                res = import_puzzles(chain.from_iterable(lines), on_reject=note)
+                self.message_user(
+                    request,
+                    f"Imported {res.created} puzzle(s), rejected {res.rejected}, "
+                    f"duplicates {res.duplicates}",
+                    level=messages.SUCCESS if not res.rejected else messages.WARNING,
+                )
+                if samples:
+                    self.message_user(request, "; ".join(samples), level=messages.WARNING)
             return redirect("admin:puzzle_puzzletemplate_queue")
 
         # Compute queue depth summary
@@ -130,23 +175,28 @@ class PuzzleTemplateAdmin(admin.ModelAdmin):
         base: Any = PuzzleTemplate.objects.values("size", "difficulty_label")
         ordered: Any = base.order_by("size", "difficulty_label")
         summary = ordered.annotate(count=Count("id"))
+        depths = pool_depths()
         rows = [
-            f"<tr><td>{s['size']}</td><td>{s['difficulty_label']}</td><td>{s['count']}</td></tr>"
+            f"<tr><td>{s['size']}</td><td>{s['difficulty_label']}</td><td>{s['count']}</td>"
+            f"<td>{depths.get((s['size'], s['difficulty_label']), 0)}</td></tr>"
             for s in summary
         ]
-        table = "".join(rows) or "<tr><td colspan='3'>No data</td></tr>"
+        table = "".join(rows) or "<tr><td colspan='4'>No data</td></tr>"
         token = get_token(request)
         html = f"""
             <div class='container'>
               <h1>Puzzle Queue</h1>
-              <p>Counts by size and difficulty.</p>
+              <p>Counts by size and difficulty, with pre-serialized pool depth.</p>
               <table class='adminlist'>
-                <thead><tr><th>Size</th><th>Difficulty</th><th>Count</th></tr></thead>
+                <thead><tr><th>Size</th><th>Difficulty</th><th>Count</th><th>Pooled</th></tr></thead>
                 <tbody>{table}</tbody>
               </table>
-              <h2>Import JSON</h2>
-              <form method='post'>
+              <h2>Import</h2>
+              <p>Upload NDJSON or one board per line (0 or . for empty cells), or paste a
+                 JSON array. Puzzles without exactly one solution are rejected.</p>
+              <form method='post' enctype='multipart/form-data'>
                 <input type='hidden' name='csrfmiddlewaretoken' value='{token}' />
+                <input type='file' name='file' /><br/>
                 <textarea name='json' rows='8' cols='80' placeholder='[ ... ]'></textarea><br/>
                 <button type='submit' class='default'>Import</button>
               </form>
@@ -189,10 +239,11 @@ class GameSessionAdmin(admin.ModelAdmin):
         rows = average_time_seconds_by_difficulty(size=size)
         tr = (
             "".join(
-                f"<tr><td>{r.difficulty_label}</td><td>{r.average_time_seconds:.1f}</td></tr>"
+                f"<tr><td>{r.difficulty_label}</td><td>{r.games}</td>"
+                f"<td>{r.average_time_seconds:.1f}</td><td>{r.stddev_seconds:.1f}</td></tr>"
                 for r in rows
             )
-            or "<tr><td colspan='2'>No data</td></tr>"
+            or "<tr><td colspan='4'>No data</td></tr>"
         )
         html = f"""
             <div class='container'>
@@ -205,7 +256,9 @@ class GameSessionAdmin(admin.ModelAdmin):
                 <button type='submit' class='default'>Filter</button>
               </form>
               <table class='adminlist'>
-                <thead><tr><th>Difficulty</th><th>Avg Time (s)</th></tr></thead>
+                <thead><tr>
+                  <th>Difficulty</th><th>Games</th><th>Avg Time (s)</th><th>Std Dev (s)</th>
+                </tr></thead>
                 <tbody>{tr}</tbody>
               </table>
             </div>
@@ -5,3 +5,6 @@ class PuzzleConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "puzzle"
     verbose_name = "Puzzle"
+
+    def ready(self) -> None:
+        from puzzle import signals  # noqa: F401 - connects cache invalidation receivers
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db.models import OuterRef, Subquery
+
+from puzzle.models import PuzzleTemplate
+from puzzle.services.bulk import template_hash
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute canonical hashes for templates that do not have one yet; "
+        "duplicates of already hashed templates are reported and left unhashed"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        chunk_size = int(options["chunk_size"])  # typed narrowing
+        # Variants share their parent's form and take its hash below.
+        pending = PuzzleTemplate.objects.filter(
+            canonical_hash__isnull=True, parent__isnull=True
+        ).only("id", "size", "box_h", "box_w", "givens", "solution")
+        hashed = duplicates = failed = 0
+        last_id = 0
+        while True:
+            chunk = list(pending.filter(pk__gt=last_id).order_by("pk")[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1].pk
+            digests = {t.pk: template_hash(t) for t in chunk}
+            stored = set(
+                PuzzleTemplate.objects.filter(
+                    canonical_hash__in=[d for d in digests.values() if d]
+                ).values_list("canonical_hash", flat=True)
+            )
+            done = []
+            for t in chunk:
+                digest = digests[t.pk]
+                if digest is None:
+                    failed += 1
+                elif digest in stored:
+                    duplicates += 1
+                    self.stderr.write(f"Template {t.pk} duplicates a stored puzzle")
+                else:
+                    stored.add(digest)
+                    t.canonical_hash = digest
+                    done.append(t)
+            PuzzleTemplate.objects.bulk_update(done, ["canonical_hash"])
+            PuzzleTemplate.objects.filter(parent__in=[t.pk for t in done]).update(
+                canonical_hash=Subquery(
+                    PuzzleTemplate.objects.filter(pk=OuterRef("parent_id")).values(
+                        "canonical_hash"
+                    )[:1]
+                )
+            )
+            hashed += len(done)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done. Hashed: {hashed}, duplicates: {duplicates}, failed: {failed}"
+            )
+        )
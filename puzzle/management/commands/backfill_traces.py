@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from puzzle.models import PuzzleTemplate
+from puzzle.services.engines import GridSpec
+from puzzle.services.engines.trace import trace_grid
+
+
+class Command(BaseCommand):
+    help = "Compute solve traces for templates that do not have one yet"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        chunk_size = int(options["chunk_size"])  # typed narrowing
+        pending = PuzzleTemplate.objects.filter(solve_trace__isnull=True).only(
+            "id", "size", "box_h", "box_w", "givens"
+        )
+        updated = failed = 0
+        last_id = 0
+        while True:
+            chunk = list(pending.filter(pk__gt=last_id).order_by("pk")[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1].pk
+            done = []
+            for t in chunk:
+                try:
+                    t.solve_trace = trace_grid(GridSpec(t.size, t.box_h, t.box_w), t.givens)
+                except ValueError:
+                    failed += 1
+                    continue
+                done.append(t)
+            PuzzleTemplate.objects.bulk_update(done, ["solve_trace"])
+            updated += len(done)
+        self.stdout.write(self.style.SUCCESS(f"Done. Traced: {updated}, failed: {failed}"))
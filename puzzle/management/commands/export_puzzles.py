@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from puzzle.models import PuzzleTemplate
+from puzzle.services.export import DEFAULT_CHUNK_SIZE, FORMATS, iter_export
+
+
+class Command(BaseCommand):
+    help = "Export puzzle templates as NDJSON or a JSON array, streaming in constant memory"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--format", choices=FORMATS, default="ndjson")
+        parser.add_argument("--output", "-o", default="-", help="File path, or - for stdout")
+        parser.add_argument("--size", type=int)
+        parser.add_argument("--difficulty")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        qs = PuzzleTemplate.objects.all()
+        if options["size"] is not None:
+            qs = qs.filter(size=options["size"])
+        if options["difficulty"]:
+            qs = qs.filter(difficulty_label=options["difficulty"])
+
+        exported = 0
+
+        def count(n: int) -> None:
+            nonlocal exported
+            exported += n
+
+        blocks = iter_export(
+            qs, fmt=options["format"], chunk_size=int(options["chunk_size"]), on_chunk=count
+        )
+        output = options["output"]
+        if output == "-":
+            for block in blocks:
+                self.stdout.write(block, ending="")
+            if options["format"] == "json":
+                self.stdout.write("")
+        else:
+            with open(output, "w", encoding="utf-8") as fh:
+                fh.writelines(blocks)
+        # Keep stdout clean for the data when exporting there.
+        summary = self.stderr if output == "-" else self.stdout
+        summary.write(self.style.SUCCESS(f"Exported {exported} template(s)"))
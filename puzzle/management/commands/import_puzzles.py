@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import sys
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from puzzle.services.bulk import DEFAULT_CHUNK_SIZE
+from puzzle.services.importer import import_puzzles
+
+
+class Command(BaseCommand):
+    help = (
+        "Import puzzles from an NDJSON or one-board-per-line text file, "
+        "validating and rating each one"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("path", help="Input file, or - for stdin")
+        parser.add_argument("--source", type=str, default="import")
+        parser.add_argument(
+            "--workers", type=int, default=1, help="Validation processes to run in parallel"
+        )
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            "--rejects", type=str, default=None, help="Write rejected lines here instead of stderr"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        path = str(options["path"])  # typed narrowing
+        rejects_path = options.get("rejects")
+        rejects = open(rejects_path, "w", encoding="utf-8") if rejects_path else None
+
+        def report(line_no: int, reason: str) -> None:
+            if rejects is not None:
+                rejects.write(f"{line_no}\t{reason}\n")
+            else:
+                self.stderr.write(f"line {line_no}: {reason}")
+
+        src = sys.stdin if path == "-" else open(path, encoding="utf-8")
+        try:
+            res = import_puzzles(
+                src,
+                source=str(options["source"]),
+                workers=int(options["workers"]),
+                chunk_size=int(options["chunk_size"]),
+                on_reject=report,
+            )
+        finally:
+            if src is not sys.stdin:
+                src.close()
+            if rejects is not None:
+                rejects.close()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done. Imported: {res.created}, rejected: {res.rejected}, "
+                f"duplicates: {res.duplicates}"
+            )
+        )
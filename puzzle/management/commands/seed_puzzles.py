@@ -4,7 +4,7 @@ from typing import Any
 
 from django.core.management.base import BaseCommand, CommandParser
 
-from puzzle.services.generation import generate_template
+from puzzle.services.generation import generate_templates
 
 
 class Command(BaseCommand):
@@ -18,6 +18,9 @@ class Command(BaseCommand):
         parser.add_argument("--count", type=int, default=10)
         parser.add_argument("--source", type=str, default="dokusan")
         parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument(
+            "--workers", type=int, default=1, help="Generator processes to run in parallel"
+        )
 
     def handle(self, *args: Any, **options: Any) -> None:
         size = int(options["size"])  # typed narrowing
@@ -27,20 +30,16 @@ class Command(BaseCommand):
         count = int(options["count"])  # typed narrowing
         source = str(options["source"])  # typed narrowing
         seed = options.get("seed")
-
-        created = 0
-        for i in range(count):
-            # vary seed slightly for reproducibility across multiple rows
-            s = None if seed is None else seed + i
-            res = generate_template(
-                size=size,
-                box_h=box_h,
-                box_w=box_w,
-                difficulty=difficulty,
-                source=source,
-                seed=s,
-            )
-            created += 1
-            self.stdout.write(self.style.SUCCESS(f"Created template #{res.template.id}"))
-
-        self.stdout.write(self.style.SUCCESS(f"Done. Created: {created}"))
+        workers = int(options["workers"])  # typed narrowing
+
+        res = generate_templates(
+            size=size,
+            box_h=box_h,
+            box_w=box_w,
+            difficulty=difficulty,
+            count=count,
+            source=source,
+            seed=seed,
+            workers=workers,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Done. Created: {res.created}"))
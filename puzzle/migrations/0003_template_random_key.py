@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import random
+from typing import Any
+
+from django.db import migrations, models
+
+import puzzle.models
+
+
+def randomize_existing(apps: Any, schema_editor: Any) -> None:
+    # AddField evaluates a callable default once for all existing rows; give
+    # each row its own key so pre-existing templates are picked uniformly too.
+    template = apps.get_model("puzzle", "PuzzleTemplate")
+    batch = []
+    for obj in template.objects.only("id").iterator(chunk_size=2000):
+        obj.random_key = random.random()
+        batch.append(obj)
+        if len(batch) >= 2000:
+            template.objects.bulk_update(batch, ["random_key"])
+            batch = []
+    if batch:
+        template.objects.bulk_update(batch, ["random_key"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("puzzle", "0002_analytics_event"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="puzzletemplate",
+            name="random_key",
+            field=models.FloatField(
+                default=puzzle.models.random_key,
+                help_text="Uniform random value in [0, 1) used for indexed random selection",
+            ),
+        ),
+        migrations.RunPython(randomize_existing, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="puzzletemplate",
+            index=models.Index(
+                fields=["size", "difficulty_label", "random_key"], name="puzzle_bucket_rand"
+            ),
+        ),
+    ]
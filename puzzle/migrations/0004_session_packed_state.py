@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("puzzle", "0003_template_random_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="gamesession",
+            name="board_packed",
+            field=models.BinaryField(
+                blank=True,
+                help_text="Nibble-packed board (two cells per byte, 0 = empty)",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="gamesession",
+            name="marks_packed",
+            field=models.BinaryField(
+                blank=True,
+                help_text="Per-cell uint16 candidate bitmasks, little-endian",
+                null=True,
+            ),
+        ),
+    ]
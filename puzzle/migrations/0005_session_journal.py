@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("puzzle", "0004_session_packed_state"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="gamesession",
+            name="journal",
+            field=models.BinaryField(blank=True, default=bytes, help_text="Packed move records"),
+        ),
+        migrations.AddField(
+            model_name="gamesession",
+            name="journal_base",
+            field=models.BinaryField(
+                blank=True, help_text="Packed board+marks the journal starts from", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="gamesession",
+            name="journal_cursor",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Number of journal records currently applied"
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("puzzle", "0005_session_journal"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="puzzletemplate",
+            name="solve_trace",
+            field=models.BinaryField(
+                blank=True,
+                help_text="Packed logical solve path from the givens (see engines/trace.py)",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("puzzle", "0006_template_solve_trace"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="analyticsevent",
+            name="created_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import datetime as dt
+from typing import Any
+
+from django.conf import settings
+from django.db import migrations, transaction
+
+# Postgres only: rebuild puzzle_analyticsevent as a table partitioned by month
+# on created_at (see puzzle/services/partitions.py). Other vendors keep the
+# plain table and use chunked DELETEs for retention.
+#
+# Not atomic: the new table takes the old one's name in one short
+# transaction, then existing rows are copied across in batches of COPY_BATCH
+# ids, each committed on its own, so inserts are never blocked for the whole
+# copy. New events get ids above every old one. Until the copy finishes,
+# reports see only part of the old history; if it is interrupted, running
+# the migration again resumes it.
+#
+# The partition helpers are copied from puzzle.services.partitions rather
+# than imported, so this migration does not change when that module does.
+
+TABLE = "puzzle_analyticsevent"
+COLUMNS = "id, name, payload, created_at, game_id, user_id"
+COPY_BATCH = 50_000
+# Months created ahead of today; maintain_analytics_partitions keeps it up after that.
+MONTHS_AHEAD = 2
+
+
+def _month_start(day: dt.date) -> dt.date:
+    return day.replace(day=1)
+
+
+def _add_months(month: dt.date, n: int) -> dt.date:
+    index = month.year * 12 + month.month - 1 + n
+    return dt.date(index // 12, index % 12 + 1, 1)
+
+
+def _create_partition(cur: Any, month: dt.date) -> None:
+    bounds = [f"{m:%Y-%m-%d} 00:00:00+00" for m in (month, _add_months(month, 1))]
+    cur.execute(
+        f'CREATE TABLE IF NOT EXISTS "{TABLE}_p{month:%Y_%m}" PARTITION OF "{TABLE}" '
+        f"FOR VALUES FROM ('{bounds[0]}') TO ('{bounds[1]}')"
+    )
+
+
+def _relkind(conn: Any, name: str) -> str | None:
+    with conn.cursor() as cur:
+        cur.execute("SELECT relkind FROM pg_class WHERE relname = %s", [name])
+        row = cur.fetchone()
+    return row[0] if row else None
+
+
+def _user_fk(apps: Any, connection: Any) -> tuple[str, str]:
+    user_model = apps.get_model(settings.AUTH_USER_MODEL)
+    return user_model._meta.db_table, user_model._meta.pk.rel_db_type(connection)
+
+
+def _move_aside(cur: Any, suffix: str) -> None:
+    # Index and constraint names are schema-wide; free them for the new table.
+    cur.execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_{suffix}")
+    for index in ("analytics_name_time", "analytics_game_id", "analytics_user_id"):
+        cur.execute(f"ALTER INDEX IF EXISTS {index} RENAME TO {index}_{suffix}")
+
+
+def _create_indexes_and_fks(cur: Any, user_table: str) -> None:
+    cur.execute(f"CREATE INDEX analytics_name_time ON {TABLE} (name, created_at)")
+    cur.execute(f"CREATE INDEX analytics_game_id ON {TABLE} (game_id)")
+    cur.execute(f"CREATE INDEX analytics_user_id ON {TABLE} (user_id)")
+    cur.execute(
+        f"ALTER TABLE {TABLE} ADD CONSTRAINT analytics_game_fk FOREIGN KEY (game_id) "
+        "REFERENCES puzzle_gamesession (id) DEFERRABLE INITIALLY DEFERRED"
+    )
+    cur.execute(
+        f"ALTER TABLE {TABLE} ADD CONSTRAINT analytics_user_fk FOREIGN KEY (user_id) "
+        f'REFERENCES "{user_table}" (id) DEFERRABLE INITIALLY DEFERRED'
+    )
+
+
+def _copy_and_drop(conn: Any, source: str) -> None:
+    # Old rows are copied in id order, one committed batch at a time; a batch
+    # already in TABLE (from an interrupted run) is where copying resumes.
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT coalesce(max(id), 0) FROM {source}")
+        last = cur.fetchone()[0]
+        cur.execute(f"SELECT coalesce(max(id), 0) FROM {TABLE} WHERE id <= %s", [last])
+        done = cur.fetchone()[0]
+    while done < last:
+        upto = min(done + COPY_BATCH, last)
+        with transaction.atomic(using=conn.alias), conn.cursor() as cur:
+            cur.execute(
+                f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {source} "
+                "WHERE id > %s AND id <= %s",
+                [done, upto],
+            )
+        done = upto
+    with conn.cursor() as cur:
+        cur.execute(f"DROP TABLE {source}")
+
+
+def partition(apps: Any, schema_editor: Any) -> None:
+    conn = schema_editor.connection
+    if conn.vendor != "postgresql":
+        return
+    if _relkind(conn, TABLE) != "p":
+        user_table, user_pk_type = _user_fk(apps, conn)
+        with transaction.atomic(using=conn.alias), conn.cursor() as cur:
+            _move_aside(cur, "flat")
+            cur.execute(f"SELECT coalesce(max(id), 0) + 1, min(created_at) FROM {TABLE}_flat")
+            next_id, oldest = cur.fetchone()
+            cur.execute(f"CREATE SEQUENCE {TABLE}_part_id_seq AS bigint START WITH {next_id}")
+            cur.execute(
+                f"""
+                CREATE TABLE {TABLE} (
+                    id bigint NOT NULL DEFAULT nextval('{TABLE}_part_id_seq'),
+                    name varchar(64) NOT NULL,
+                    payload jsonb NOT NULL,
+                    created_at timestamp with time zone NOT NULL,
+                    game_id bigint NULL,
+                    user_id {user_pk_type} NULL,
+                    CONSTRAINT analytics_part_pkey PRIMARY KEY (id, created_at)
+                ) PARTITION BY RANGE (created_at)
+                """
+            )
+            cur.execute(f"ALTER SEQUENCE {TABLE}_part_id_seq OWNED BY {TABLE}.id")
+            _create_indexes_and_fks(cur, user_table)
+            cur.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+            today = dt.datetime.now(dt.UTC).date()
+            month = _month_start(oldest.date() if oldest else today)
+            while month <= _add_months(_month_start(today), MONTHS_AHEAD):
+                _create_partition(cur, month)
+                month = _add_months(month, 1)
+    if _relkind(conn, f"{TABLE}_flat"):
+        _copy_and_drop(conn, f"{TABLE}_flat")
+
+
+def unpartition(apps: Any, schema_editor: Any) -> None:
+    conn = schema_editor.connection
+    if conn.vendor != "postgresql":
+        return
+    if _relkind(conn, TABLE) == "p":
+        user_table, user_pk_type = _user_fk(apps, conn)
+        with transaction.atomic(using=conn.alias), conn.cursor() as cur:
+            _move_aside(cur, "part")
+            cur.execute(f"SELECT coalesce(max(id), 0) + 1 FROM {TABLE}_part")
+            next_id = cur.fetchone()[0]
+            cur.execute(
+                f"""
+                CREATE TABLE {TABLE} (
+                    id bigint GENERATED BY DEFAULT AS IDENTITY (START WITH {next_id}),
+                    name varchar(64) NOT NULL,
+                    payload jsonb NOT NULL,
+                    created_at timestamp with time zone NOT NULL,
+                    game_id bigint NULL,
+                    user_id {user_pk_type} NULL,
+                    CONSTRAINT analytics_flat_pkey PRIMARY KEY (id)
+                )
+                """
+            )
+            _create_indexes_and_fks(cur, user_table)
+    if _relkind(conn, f"{TABLE}_part"):
+        _copy_and_drop(conn, f"{TABLE}_part")
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("puzzle", "0007_analytics_created_default"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, unpartition),
+    ]
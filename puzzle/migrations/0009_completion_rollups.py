@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("puzzle", "0008_partition_analytics_events"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RollupWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("name", models.CharField(max_length=64, unique=True)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+                ("game_id", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="CompletionRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("size", models.PositiveSmallIntegerField()),
+                ("difficulty_label", models.CharField(max_length=16)),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("total_seconds", models.BigIntegerField(default=0)),
+                ("total_sq_seconds", models.BigIntegerField(default=0)),
+                ("min_seconds", models.PositiveIntegerField(default=0)),
+                ("max_seconds", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["-day", "size", "difficulty_label"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("day", "size", "difficulty_label"), name="rollup_day_size_diff"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("puzzle", "0009_completion_rollups"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="puzzletemplate",
+            name="canonical_hash",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="Digest of the form under Sudoku symmetries (see engines/canonical.py)",
+                max_length=32,
+                null=True,
+                unique=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("puzzle", "0010_template_canonical_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="puzzletemplate",
+            name="parent",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Template this one was derived from by a symmetry transform",
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="variants",
+                to="puzzle.puzzletemplate",
+            ),
+        ),
+        migrations.AddField(
+            model_name="puzzletemplate",
+            name="transform_seed",
+            field=models.BigIntegerField(
+                blank=True,
+                help_text="Seed of the transform applied to parent (see engines/transform.py)",
+                null=True,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="puzzletemplate",
+            constraint=models.UniqueConstraint(
+                fields=("parent", "transform_seed"), name="template_variant_seed"
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("puzzle", "0011_template_variants"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="gamesession",
+            name="transform_seed",
+            field=models.BigIntegerField(
+                blank=True,
+                help_text="Seed of the transform applied to puzzle when served (see engines/transform.py)",
+                null=True,
+            ),
+        ),
+    ]
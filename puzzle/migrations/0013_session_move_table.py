@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import struct
+from typing import Any
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Record layout of the old GameSession.journal blob: cell, kind, before, after.
+RECORD = struct.Struct("<BBHH")
+
+
+def split_journals(apps: Any, schema_editor: Any) -> None:
+    # Each packed record becomes one row; seq starts at 0 so the stored
+    # cursor (records applied) keeps its meaning.
+    session = apps.get_model("puzzle", "GameSession")
+    move = apps.get_model("puzzle", "GameMove")
+    sessions = session.objects.exclude(journal=b"").only("id", "journal")
+    for game in sessions.iterator(chunk_size=500):
+        data = bytes(game.journal or b"")
+        rows = [
+            move(game_id=game.id, seq=seq, cell_index=cell, kind=kind, before=before, after=after)
+            for seq, (cell, kind, before, after) in enumerate(RECORD.iter_unpack(data))
+        ]
+        move.objects.bulk_create(rows, batch_size=1000)
+        session.objects.filter(pk=game.id).update(journal_end=len(rows))
+
+
+def join_journals(apps: Any, schema_editor: Any) -> None:
+    session = apps.get_model("puzzle", "GameSession")
+    move = apps.get_model("puzzle", "GameMove")
+    for game in session.objects.exclude(journal_end=0).iterator(chunk_size=500):
+        rows = move.objects.filter(
+            game_id=game.id, seq__gte=game.journal_start, seq__lt=game.journal_end
+        ).order_by("seq")
+        data = b"".join(
+            RECORD.pack(*r) for r in rows.values_list("cell_index", "kind", "before", "after")
+        )
+        session.objects.filter(pk=game.id).update(
+            journal=data, journal_cursor=game.journal_cursor - game.journal_start
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("puzzle", "0012_session_transform_seed"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="gamesession",
+            name="journal_end",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Sequence number after the newest retained move"
+            ),
+        ),
+        migrations.AddField(
+            model_name="gamesession",
+            name="journal_start",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Sequence number of the oldest retained move"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="gamesession",
+            name="journal_cursor",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Sequence number of the next move to redo (earlier ones are applied)",
+            ),
+        ),
+        migrations.CreateModel(
+            name="GameMove",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("seq", models.PositiveIntegerField()),
+                ("cell_index", models.PositiveSmallIntegerField()),
+                ("kind", models.PositiveSmallIntegerField(choices=[(0, "Number"), (1, "Pencil")])),
+                (
+                    "before",
+                    models.PositiveIntegerField(
+                        help_text="Value, or candidate bitmask, before the move"
+                    ),
+                ),
+                (
+                    "after",
+                    models.PositiveIntegerField(
+                        help_text="Value, or candidate bitmask, after the move"
+                    ),
+                ),
+                (
+                    "game",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="moves",
+                        to="puzzle.gamesession",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["game", "seq"],
+                "constraints": [
+                    models.UniqueConstraint(fields=("game", "seq"), name="game_move_seq")
+                ],
+            },
+        ),
+        migrations.RunPython(split_journals, join_journals),
+        migrations.RemoveField(
+            model_name="gamesession",
+            name="journal",
+        ),
+    ]
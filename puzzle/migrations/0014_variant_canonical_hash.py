@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_parent_hashes(apps: Any, schema_editor: Any) -> None:
+    template = apps.get_model("puzzle", "PuzzleTemplate")
+    template.objects.filter(parent__isnull=False).update(
+        canonical_hash=Subquery(
+            template.objects.filter(pk=OuterRef("parent_id")).values("canonical_hash")[:1]
+        )
+    )
+
+
+def clear_variant_hashes(apps: Any, schema_editor: Any) -> None:
+    template = apps.get_model("puzzle", "PuzzleTemplate")
+    template.objects.filter(parent__isnull=False).update(canonical_hash=None)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("puzzle", "0013_session_move_table"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="puzzletemplate",
+            name="canonical_hash",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                help_text="Digest of the form under Sudoku symmetries (see engines/canonical.py)",
+                max_length=32,
+                null=True,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="puzzletemplate",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("parent__isnull", True)),
+                fields=("canonical_hash",),
+                name="template_canonical_original",
+            ),
+        ),
+        migrations.RunPython(copy_parent_hashes, clear_variant_hashes),
+    ]
@@ -1,7 +1,15 @@
 from __future__ import annotations
 
+import random
+
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+
+def random_key() -> float:
+    """Default for `PuzzleTemplate.random_key` (module-level so migrations can reference it)."""
+    return random.random()
 
 
 class PuzzleTemplate(models.Model):
@@ -11,7 +19,13 @@ class PuzzleTemplate(models.Model):
     Serialization formats:
     - givens: 1D string of length size*size using "0" for empty cells.
     - solution: 1D string of length size*size with digits/values 1..size.
+    - solve_trace: packed placements (technique id, cell, value) in the order
+      the rater finds them; null for rows that predate it (see backfill_traces).
     Grid geometry is defined by size and sub-box dimensions box_h × box_w.
+
+    Variants (parent set) are symmetry transforms of their parent, stored with
+    its rating (see puzzle/services/variants.py). They share the parent's
+    canonical_hash, which is therefore only unique among originals.
     """
 
     DIFFICULTY_EASY = "easy"
@@ -46,11 +60,56 @@ class PuzzleTemplate(models.Model):
         max_length=64, help_text="Origin of puzzle (e.g., engine name or import source)"
     )
 
+    random_key = models.FloatField(
+        default=random_key,
+        help_text="Uniform random value in [0, 1) used for indexed random selection",
+    )
+
+    solve_trace = models.BinaryField(
+        null=True,
+        blank=True,
+        help_text="Packed logical solve path from the givens (see engines/trace.py)",
+    )
+    canonical_hash = models.CharField(
+        max_length=32,
+        db_index=True,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Digest of the form under Sudoku symmetries (see engines/canonical.py)",
+    )
+    parent = models.ForeignKey(
+        "self",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="variants",
+        help_text="Template this one was derived from by a symmetry transform",
+    )
+    transform_seed = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text="Seed of the transform applied to parent (see engines/transform.py)",
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         indexes = [
             models.Index(fields=["size", "difficulty_label"], name="puzzle_size_diff"),
+            models.Index(
+                fields=["size", "difficulty_label", "random_key"], name="puzzle_bucket_rand"
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["parent", "transform_seed"], name="template_variant_seed"
+            ),
+            models.UniqueConstraint(
+                fields=["canonical_hash"],
+                condition=models.Q(parent__isnull=True),
+                name="template_canonical_original",
+            ),
         ]
         ordering = ["-created_at", "size", "difficulty_label"]
 
@@ -66,6 +125,17 @@ class GameSession(models.Model):
     - board_state: 1D string or JSON payload that encodes the current board.
       If a string, length is size*size with '0' for empty.
     - pencil_marks: JSON object mapping cell_index -> list[int].
+    - board_packed / marks_packed: compact alternative to the two JSON fields,
+      used when PUZZLE_COMPACT_SESSIONS is on (see puzzle/services/codec.py).
+      When set they take precedence and the JSON fields are left empty.
+    - journal_start / journal_cursor / journal_end: positions in the session's
+      move log (GameMove rows) powering undo/redo and replay; see
+      puzzle/services/journal.py. journal_base is the packed state record
+      journal_start applies to (null = givens).
+
+    A session with transform_seed set plays a virtual variant of its puzzle:
+    givens, solution and solve trace are transformed on the fly (see
+    SessionPuzzle.from_game), and board/marks hold the transformed grid.
     """
 
     STATUS_IN_PROGRESS = "in_progress"
@@ -81,6 +151,11 @@ class GameSession(models.Model):
         settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True
     )
     puzzle = models.ForeignKey(PuzzleTemplate, on_delete=models.PROTECT)
+    transform_seed = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text="Seed of the transform applied to puzzle when served (see engines/transform.py)",
+    )
 
     board_state = models.JSONField(
         default=str,
@@ -92,6 +167,24 @@ class GameSession(models.Model):
         default=dict,
         help_text="Map of cell_index (0..N-1) to list of candidate integers",
     )
+    board_packed = models.BinaryField(
+        null=True, blank=True, help_text="Nibble-packed board (two cells per byte, 0 = empty)"
+    )
+    marks_packed = models.BinaryField(
+        null=True, blank=True, help_text="Per-cell uint16 candidate bitmasks, little-endian"
+    )
+    journal_start = models.PositiveIntegerField(
+        default=0, help_text="Sequence number of the oldest retained move"
+    )
+    journal_cursor = models.PositiveIntegerField(
+        default=0, help_text="Sequence number of the next move to redo (earlier ones are applied)"
+    )
+    journal_end = models.PositiveIntegerField(
+        default=0, help_text="Sequence number after the newest retained move"
+    )
+    journal_base = models.BinaryField(
+        null=True, blank=True, help_text="Packed board+marks the journal starts from"
+    )
 
     mistakes_count = models.PositiveIntegerField(default=0)
     time_seconds = models.PositiveIntegerField(default=0)
@@ -112,6 +205,35 @@ class GameSession(models.Model):
         )
 
 
+class GameMove(models.Model):
+    """
+    One undo/redo journal record of a GameSession (see puzzle/services/journal.py).
+
+    A move inserts one row; rows are deleted only when a new move discards
+    undone ones or the oldest are folded into GameSession.journal_base.
+    """
+
+    KIND_NUMBER = 0
+    KIND_PENCIL = 1
+    KIND_CHOICES = [(KIND_NUMBER, "Number"), (KIND_PENCIL, "Pencil")]
+
+    game = models.ForeignKey(GameSession, on_delete=models.CASCADE, related_name="moves")
+    seq = models.PositiveIntegerField()
+    cell_index = models.PositiveSmallIntegerField()
+    kind = models.PositiveSmallIntegerField(choices=KIND_CHOICES)
+    before = models.PositiveIntegerField(help_text="Value, or candidate bitmask, before the move")
+    after = models.PositiveIntegerField(help_text="Value, or candidate bitmask, after the move")
+
+    class Meta:
+        ordering = ["game", "seq"]
+        constraints = [
+            models.UniqueConstraint(fields=["game", "seq"], name="game_move_seq"),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"GameMove(game={self.game_id}, seq={self.seq})"
+
+
 class DailyChallenge(models.Model):
     """One featured puzzle per calendar date."""
 
@@ -131,6 +253,9 @@ class AnalyticsEvent(models.Model):
 
     Stores event name, associated user and game, and a small JSON payload.
     Intended for internal reporting in Phase 13.
+
+    On PostgreSQL the table is partitioned by month on created_at (migration
+    0008, puzzle/services/partitions.py), so created_at is required on insert.
     """
 
     EVENT_GAME_START = "game_start"
@@ -143,7 +268,8 @@ class AnalyticsEvent(models.Model):
     )
     game = models.ForeignKey("GameSession", on_delete=models.SET_NULL, null=True, blank=True)
     payload = models.JSONField(default=dict)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the event is emitted, not when the batch carrying it is inserted.
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         indexes = [
@@ -153,3 +279,51 @@ class AnalyticsEvent(models.Model):
 
     def __str__(self) -> str:  # pragma: no cover - trivial
         return f"AnalyticsEvent(name={self.name}, user={self.user_id}, game={self.game_id})"
+
+
+class CompletionRollup(models.Model):
+    """Completed-game time statistics per UTC day, size and difficulty.
+
+    Maintained incrementally by `puzzle.tasks.update_completion_rollups` (see
+    puzzle/services/rollups.py); reports read these instead of scanning
+    GameSession. Mean and variance follow from count, total and total_sq.
+    """
+
+    day = models.DateField()
+    size = models.PositiveSmallIntegerField()
+    difficulty_label = models.CharField(max_length=16)
+    count = models.PositiveIntegerField(default=0)
+    total_seconds = models.BigIntegerField(default=0)
+    total_sq_seconds = models.BigIntegerField(default=0)
+    min_seconds = models.PositiveIntegerField(default=0)
+    max_seconds = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "size", "difficulty_label"], name="rollup_day_size_diff"
+            ),
+        ]
+        ordering = ["-day", "size", "difficulty_label"]
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return (
+            f"CompletionRollup(day={self.day}, size={self.size}, "
+            f"diff={self.difficulty_label}, count={self.count})"
+        )
+
+
+class RollupWatermark(models.Model):
+    """Position up to which a rollup has consumed its source rows.
+
+    Ordered by (completed_at, game_id) so completions sharing a timestamp are
+    neither skipped nor counted twice.
+    """
+
+    name = models.CharField(max_length=64, unique=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    game_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"RollupWatermark(name={self.name}, at={self.completed_at}, game={self.game_id})"
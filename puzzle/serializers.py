@@ -4,7 +4,11 @@ from typing import Any
 
 from rest_framework import serializers
 
-from puzzle.models import PuzzleTemplate
+from puzzle.models import GameSession, PuzzleTemplate
+from puzzle.services.codec import read_board, read_marks
+from puzzle.services.engines.transform import MAX_TRANSFORM_SEED
+
+MAX_MOVES_PER_BATCH = 500
 
 
 class PuzzleListQuerySerializer(serializers.Serializer):
@@ -19,10 +23,36 @@ class PuzzleListQuerySerializer(serializers.Serializer):
         required=False,
         default=PuzzleTemplate.DIFFICULTY_MEDIUM,
     )
+    # Serve a virtual variant: a fixed seed, or a fresh random one with transform=true.
+    transform_seed = serializers.IntegerField(
+        min_value=0, max_value=MAX_TRANSFORM_SEED, required=False
+    )
+    transform = serializers.BooleanField(required=False, default=False)
+
+
+class PuzzleRetrieveQuerySerializer(serializers.Serializer):
+    transform_seed = serializers.IntegerField(
+        min_value=0, max_value=MAX_TRANSFORM_SEED, required=False
+    )
 
 
 class GameCreateSerializer(serializers.Serializer):
     template_id = serializers.IntegerField(min_value=1)
+    transform_seed = serializers.IntegerField(
+        min_value=0, max_value=MAX_TRANSFORM_SEED, required=False, allow_null=True
+    )
+
+
+class MoveSerializer(serializers.Serializer):
+    cell_index = serializers.IntegerField(min_value=0)
+    value = serializers.IntegerField(min_value=0)
+    mode = serializers.ChoiceField(choices=["number", "pencil"], default="number")
+
+
+class MoveBatchSerializer(serializers.Serializer):
+    # Range checks against the puzzle (size, givens) happen in apply_moves.
+    moves = MoveSerializer(many=True, allow_empty=False, max_length=MAX_MOVES_PER_BATCH)
+    time_seconds = serializers.IntegerField(min_value=0, required=False)
 
 
 class PencilMarksField(serializers.DictField):
@@ -55,10 +85,20 @@ class GameUpdateSerializer(serializers.Serializer):
                 raise serializers.ValidationError(
                     {"board_state": f"Expected length {expected} for size {size}"}
                 )
+            # Cells are stored packed, one hex digit each (see services/codec.py)
+            allowed = {format(v, "x") for v in range(size + 1)}
+            if not set(board_state) <= allowed:
+                raise serializers.ValidationError(
+                    {"board_state": f"Cells must be 0 (empty) or 1..{size} for size {size}"}
+                )
         # Optional: validate pencil mark values are within range if size provided
         if "pencil_marks" in attrs and "size" in self.context:
             size = int(self.context["size"])  # type: ignore[arg-type]
             for key, marks in attrs["pencil_marks"].items():
+                if not key.isdigit() or int(key) >= size * size:
+                    raise serializers.ValidationError(
+                        {"pencil_marks": f"Cell {key} out of range 0..{size * size - 1}"}
+                    )
                 for m in marks:
                     if m < 1 or m > size:
                         raise serializers.ValidationError(
@@ -67,3 +107,18 @@ class GameUpdateSerializer(serializers.Serializer):
         return attrs
 
 
+class GameStateSerializer(serializers.Serializer):
+    """Read-only view of a session; decodes board/marks from either storage format."""
+
+    id = serializers.IntegerField()
+    status = serializers.CharField()
+    board_state = serializers.SerializerMethodField()
+    pencil_marks = serializers.SerializerMethodField()
+    puzzle_id = serializers.IntegerField()
+    transform_seed = serializers.IntegerField(allow_null=True)
+
+    def get_board_state(self, game: GameSession) -> str:
+        return read_board(game)
+
+    def get_pencil_marks(self, game: GameSession) -> dict[str, list[int]]:
+        return read_marks(game)
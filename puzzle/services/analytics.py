@@ -1,38 +1,61 @@
 from __future__ import annotations
 
+import math
 from dataclasses import dataclass
 
-from django.db.models import Avg, QuerySet
+from django.db.models import Max, Min, QuerySet, Sum
 
-from puzzle.models import GameSession
+from puzzle.models import CompletionRollup
 
 
 @dataclass(frozen=True)
 class AverageTimeByDifficulty:
     difficulty_label: str
     average_time_seconds: float
+    games: int = 0
+    stddev_seconds: float = 0.0
+    min_seconds: int = 0
+    max_seconds: int = 0
 
 
 def average_time_seconds_by_difficulty(*, size: int | None = None) -> list[AverageTimeByDifficulty]:
-    """Return average completion time per difficulty label for completed games.
+    """Return completion time statistics per difficulty label.
 
-    Optionally filter by puzzle size.
+    Optionally filter by puzzle size. Reads the pre-aggregated
+    `CompletionRollup` rows (see puzzle/services/rollups.py), so the cost
+    depends on the number of days of history, not of games; results lag
+    completions by up to one rollup run.
     """
-    qs: QuerySet[GameSession] = GameSession.objects.select_related("puzzle").filter(
-        status=GameSession.STATUS_COMPLETED
-    )
+    qs: QuerySet[CompletionRollup] = CompletionRollup.objects.all()
     if size is not None:
-        qs = qs.filter(puzzle__size=size)
+        qs = qs.filter(size=size)
 
     rows = (
-        qs.values("puzzle__difficulty_label")
-        .order_by("puzzle__difficulty_label")
-        .annotate(avg_time=Avg("time_seconds"))
+        qs.values("difficulty_label")
+        .order_by("difficulty_label")
+        .annotate(
+            n=Sum("count"),
+            total=Sum("total_seconds"),
+            total_sq=Sum("total_sq_seconds"),
+            low=Min("min_seconds"),
+            high=Max("max_seconds"),
+        )
     )
-    return [
-        AverageTimeByDifficulty(
-            difficulty_label=r["puzzle__difficulty_label"],
-            average_time_seconds=float(r["avg_time"]) if r["avg_time"] is not None else 0.0,
+    out = []
+    for r in rows:
+        n = r["n"] or 0
+        if not n:
+            continue
+        mean = r["total"] / n
+        variance = max(0.0, r["total_sq"] / n - mean * mean)
+        out.append(
+            AverageTimeByDifficulty(
+                difficulty_label=r["difficulty_label"],
+                average_time_seconds=float(mean),
+                games=n,
+                stddev_seconds=math.sqrt(variance),
+                min_seconds=r["low"],
+                max_seconds=r["high"],
+            )
         )
-        for r in rows
-    ]
+    return out
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from itertools import islice
+
+from django.db import transaction
+
+from puzzle.models import PuzzleTemplate
+from puzzle.services.engines import GridSpec
+from puzzle.services.engines.canonical import canonical_hash
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Bound on `__in` parameters per query (SQLite's limit is 999 on old builds).
+LOOKUP_BATCH = 500
+
+
+def template_hash(template: PuzzleTemplate) -> str | None:
+    """`canonical_hash` for a template, or None if its solution is not a valid grid."""
+    spec = GridSpec(template.size, template.box_h, template.box_w)
+    try:
+        return canonical_hash(spec, template.givens, template.solution)
+    except ValueError:
+        return None
+
+
+def _skip_duplicates(chunk: list[PuzzleTemplate]) -> list[PuzzleTemplate]:
+    for t in chunk:
+        if t.canonical_hash is None:
+            t.canonical_hash = template_hash(t)
+    hashes = [t.canonical_hash for t in chunk if t.canonical_hash is not None]
+    stored: set[str | None] = set()
+    for start in range(0, len(hashes), LOOKUP_BATCH):
+        stored.update(
+            PuzzleTemplate.objects.filter(
+                canonical_hash__in=hashes[start : start + LOOKUP_BATCH]
+            ).values_list("canonical_hash", flat=True)
+        )
+    fresh = []
+    for t in chunk:
+        if t.canonical_hash is not None:
+            if t.canonical_hash in stored:
+                continue
+            stored.add(t.canonical_hash)
+        fresh.append(t)
+    return fresh
+
+
+def bulk_create_templates(
+    templates: Iterable[PuzzleTemplate], *, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> int:
+    """Insert unsaved templates with one `bulk_create` and transaction per chunk.
+
+    `templates` is consumed lazily, so a generator keeps memory bounded by
+    `chunk_size` and rows are committed as each chunk fills up. Templates
+    equivalent under Sudoku symmetry to a stored one, or to an earlier one in
+    the stream, are skipped; `canonical_hash` is filled in where missing.
+    Returns the number of rows inserted (a concurrent writer inserting the
+    same puzzle can make this an overcount, as the insert ignores conflicts).
+    """
+    it = iter(templates)
+    created = 0
+    while True:
+        chunk = list(islice(it, chunk_size))
+        if not chunk:
+            return created
+        fresh = _skip_duplicates(chunk)
+        with transaction.atomic():
+            PuzzleTemplate.objects.bulk_create(fresh, batch_size=chunk_size, ignore_conflicts=True)
+        created += len(fresh)
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import datetime as dt
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+
+from puzzle.models import DailyChallenge, PuzzleTemplate
+from puzzle.services.engines.base import GridSpec
+from puzzle.services.engines.transform import random_transform
+
+Payload = dict[str, Any]
+
+_KEY_PREFIX = "puzzle:v1"
+
+
+class LocalLRU:
+    """Small thread-safe LRU with per-entry expiry, held in process memory."""
+
+    def __init__(self, *, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Payload]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Payload | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Payload) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+local_cache = LocalLRU(
+    maxsize=settings.PUZZLE_LOCAL_CACHE_SIZE, ttl=settings.PUZZLE_LOCAL_CACHE_TTL
+)
+
+
+def template_key(template_id: int) -> str:
+    return f"{_KEY_PREFIX}:template:{template_id}"
+
+
+def daily_key(date: dt.date | str) -> str:
+    # str() of a date is its ISO form; model instances may still hold the raw string.
+    return f"{_KEY_PREFIX}:daily:{date}"
+
+
+def template_payload(template: PuzzleTemplate) -> Payload:
+    """Public JSON shape of a puzzle (no solution)."""
+    return {
+        "id": template.id,
+        "size": template.size,
+        "box_h": template.box_h,
+        "box_w": template.box_w,
+        "givens": template.givens,
+        "difficulty": template.difficulty_label,
+    }
+
+
+def transformed_payload(payload: Payload, transform_seed: int) -> Payload:
+    """`payload` served as the virtual variant for `transform_seed`.
+
+    Applied per request rather than cached: seeds are unbounded, and the
+    transform costs microseconds next to a cache round trip.
+    """
+    spec = GridSpec(payload["size"], payload["box_h"], payload["box_w"])
+    t = random_transform(spec, transform_seed)
+    return {**payload, "givens": t.apply(payload["givens"]), "transform_seed": transform_seed}
+
+
+def _cached(key: str) -> Payload | None:
+    value = local_cache.get(key)
+    if value is None:
+        value = cache.get(key)
+        if value is not None:
+            local_cache.set(key, value)
+    return value
+
+
+def _store(key: str, value: Payload) -> None:
+    cache.set(key, value, timeout=settings.PUZZLE_CACHE_TTL)
+    local_cache.set(key, value)
+
+
+def get_template_payload(template_id: int) -> Payload | None:
+    """Return the public payload for a template, reading through both cache tiers."""
+    key = template_key(template_id)
+    value = _cached(key)
+    if value is None:
+        template = PuzzleTemplate.objects.filter(pk=template_id).first()
+        if template is None:
+            return None
+        value = template_payload(template)
+        _store(key, value)
+    return value
+
+
+def get_daily_payload(date: dt.date) -> Payload | None:
+    """Return the daily challenge payload for `date`, reading through both cache tiers.
+
+    Misses (no challenge yet) are not cached, so a challenge created later
+    shows up immediately.
+    """
+    key = daily_key(date)
+    value = _cached(key)
+    if value is None:
+        dc = DailyChallenge.objects.filter(date=date).select_related("puzzle").first()
+        if dc is None:
+            return None
+        value = {"date": str(dc.date), "puzzle": template_payload(dc.puzzle)}
+        _store(key, value)
+    return value
+
+
+def invalidate_daily(date: dt.date | str) -> None:
+    key = daily_key(date)
+    cache.delete(key)
+    local_cache.delete(key)
+
+
+def invalidate_template(template_id: int) -> None:
+    """Drop a template's payload and any daily payloads that embed it.
+
+    The shared cache and this process's LRU are cleared immediately; other
+    processes' LRUs expire within PUZZLE_LOCAL_CACHE_TTL.
+    """
+    key = template_key(template_id)
+    cache.delete(key)
+    local_cache.delete(key)
+    for date in DailyChallenge.objects.filter(puzzle_id=template_id).values_list("date", flat=True):
+        invalidate_daily(date)
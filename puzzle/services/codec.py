@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from django.conf import settings
+
+from puzzle.models import GameSession, PuzzleTemplate
+from puzzle.services.engines.base import GridSpec
+from puzzle.services.engines.transform import random_transform
+from puzzle.services.journal import Journal
+
+# Compact session encoding:
+# - board: one 4-bit value per cell, two cells per byte (even cell in the high
+#   nibble), 0 = empty. 81 cells -> 41 bytes.
+# - marks: one little-endian uint16 candidate bitmask per cell, bit (d - 1)
+#   set when digit d is pencilled. 81 cells -> 162 bytes.
+# Both support grids up to 15x15 and allow O(1) reads/writes of a single cell.
+
+
+def normalize_board(raw: Any) -> str:
+    """Coerce the legacy JSON shapes of `board_state` into a digit string."""
+    if isinstance(raw, str):
+        return raw
+    if isinstance(raw, list):
+        return "".join(str(v) for v in raw)
+    if isinstance(raw, dict) and "board" in raw:
+        inner = raw["board"]
+        if isinstance(inner, str):
+            return inner
+        if isinstance(inner, list):
+            return "".join(str(v) for v in inner)
+    raise ValueError("Unsupported board_state format")
+
+
+def pack_board(board: str) -> bytes:
+    out = bytearray((len(board) + 1) // 2)
+    for i, ch in enumerate(board):
+        v = int(ch, 16)
+        out[i >> 1] |= v << 4 if not i & 1 else v
+    return bytes(out)
+
+
+def unpack_board(data: bytes, cells: int) -> str:
+    return "".join(
+        format(data[i >> 1] >> 4 if not i & 1 else data[i >> 1] & 0x0F, "x") for i in range(cells)
+    )
+
+
+def pack_marks(marks: dict[str, list[int]], cells: int) -> bytes:
+    out = bytearray(2 * cells)
+    for key, digits in marks.items():
+        i = int(key)
+        mask = 0
+        for d in digits:
+            mask |= 1 << (d - 1)
+        out[2 * i] = mask & 0xFF
+        out[2 * i + 1] = mask >> 8
+    return bytes(out)
+
+
+def unpack_marks(data: bytes, cells: int) -> dict[str, list[int]]:
+    marks: dict[str, list[int]] = {}
+    for i in range(cells):
+        mask = data[2 * i] | data[2 * i + 1] << 8
+        if mask:
+            marks[str(i)] = [d + 1 for d in range(16) if mask >> d & 1]
+    return marks
+
+
+@dataclass(frozen=True)
+class SessionPuzzle:
+    """The template data needed to check moves; small enough to cache with a session."""
+
+    spec: GridSpec
+    givens: str
+    solution: str
+
+    @classmethod
+    def from_template(
+        cls, template: PuzzleTemplate, transform_seed: int | None = None
+    ) -> SessionPuzzle:
+        """The template as played, with the transform for `transform_seed` applied if given."""
+        spec = GridSpec(template.size, template.box_h, template.box_w)
+        if transform_seed is None:
+            return cls(spec, template.givens, template.solution)
+        t = random_transform(spec, transform_seed)
+        return cls(spec, t.apply(template.givens), t.apply(template.solution))
+
+    @classmethod
+    def from_game(cls, game: GameSession) -> SessionPuzzle:
+        return cls.from_template(game.puzzle, game.transform_seed)
+
+
+class SessionState:
+    """
+    Board and pencil marks of a session held in the compact encoding.
+
+    Loaded from either storage format and written back in the configured one
+    (PUZZLE_COMPACT_SESSIONS), so rows migrate lazily as they are saved.
+    """
+
+    __slots__ = ("cells", "board", "marks", "journal", "mistakes")
+
+    def __init__(
+        self,
+        cells: int,
+        board: bytearray,
+        marks: bytearray,
+        journal: Journal | None = None,
+        mistakes: int = 0,
+    ) -> None:
+        self.cells = cells
+        self.board = board
+        self.marks = marks
+        self.journal = journal if journal is not None else Journal()
+        self.mistakes = mistakes
+
+    @classmethod
+    def from_strings(
+        cls, board: str, marks: dict[str, list[int]] | None, cells: int
+    ) -> SessionState:
+        if len(board) != cells:
+            raise ValueError(f"Expected board of length {cells}")
+        return cls(cells, bytearray(pack_board(board)), bytearray(pack_marks(marks or {}, cells)))
+
+    @classmethod
+    def from_game(cls, game: GameSession, cells: int) -> SessionState:
+        board_packed = game.board_packed
+        if board_packed is not None:
+            board = bytearray(board_packed)
+        else:
+            board = bytearray(pack_board(normalize_board(game.board_state)))
+        marks_packed = game.marks_packed
+        if marks_packed is not None:
+            marks = bytearray(marks_packed)
+        else:
+            marks = bytearray(pack_marks(game.pencil_marks or {}, cells))
+        journal = Journal(
+            game.pk,
+            game.journal_start,
+            game.journal_cursor,
+            game.journal_end,
+            None if game.journal_base is None else bytes(game.journal_base),
+        )
+        return cls(cells, board, marks, journal, game.mistakes_count)
+
+    @classmethod
+    def from_packed(cls, data: bytes, cells: int) -> SessionState:
+        """Inverse of `bytes(board) + bytes(marks)` (the journal base snapshot format)."""
+        split = (cells + 1) // 2
+        return cls(cells, bytearray(data[:split]), bytearray(data[split:]))
+
+    def copy(self) -> SessionState:
+        """Copy of board and marks (the journal is not copied)."""
+        return SessionState(self.cells, bytearray(self.board), bytearray(self.marks))
+
+    def get(self, i: int) -> int:
+        b = self.board[i >> 1]
+        return b >> 4 if not i & 1 else b & 0x0F
+
+    def set(self, i: int, value: int) -> None:
+        b = self.board[i >> 1]
+        self.board[i >> 1] = (b & 0x0F) | value << 4 if not i & 1 else (b & 0xF0) | value
+
+    def get_marks(self, i: int) -> int:
+        return self.marks[2 * i] | self.marks[2 * i + 1] << 8
+
+    def set_marks(self, i: int, mask: int) -> None:
+        self.marks[2 * i] = mask & 0xFF
+        self.marks[2 * i + 1] = mask >> 8
+
+    def board_str(self) -> str:
+        return unpack_board(bytes(self.board), self.cells)
+
+    def marks_dict(self) -> dict[str, list[int]]:
+        return unpack_marks(bytes(self.marks), self.cells)
+
+    def fields(self) -> dict[str, Any]:
+        """Column values for the configured storage format (PUZZLE_COMPACT_SESSIONS).
+
+        journal_base is only included when it changed; the journal's own rows
+        are written by `self.journal.save()`.
+        """
+        values: dict[str, Any]
+        if settings.PUZZLE_COMPACT_SESSIONS:
+            values = {
+                "board_state": "",
+                "pencil_marks": {},
+                "board_packed": bytes(self.board),
+                "marks_packed": bytes(self.marks),
+            }
+        else:
+            values = {
+                "board_state": self.board_str(),
+                "pencil_marks": self.marks_dict(),
+                "board_packed": None,
+                "marks_packed": None,
+            }
+        values["journal_start"] = self.journal.start
+        values["journal_cursor"] = self.journal.cursor
+        values["journal_end"] = self.journal.end
+        if self.journal.base_changed:
+            values["journal_base"] = self.journal.base
+        values["mistakes_count"] = self.mistakes
+        return values
+
+    def store(self, game: GameSession) -> list[str]:
+        """Write state onto `game` (unsaved); returns the fields to pass to save()."""
+        values = self.fields()
+        for name, value in values.items():
+            setattr(game, name, value)
+        return list(values)
+
+
+def read_board(game: GameSession) -> str:
+    """Current board string of a session, whichever encoding it is stored in."""
+    if game.board_packed is not None:
+        return unpack_board(bytes(game.board_packed), game.puzzle.size**2)
+    return normalize_board(game.board_state)
+
+
+def read_marks(game: GameSession) -> dict[str, list[int]]:
+    """Current pencil marks of a session, whichever encoding it is stored in."""
+    if game.marks_packed is not None:
+        return unpack_marks(bytes(game.marks_packed), game.puzzle.size**2)
+    marks: dict[str, list[int]] = game.pencil_marks or {}
+    return marks
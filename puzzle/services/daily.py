@@ -5,7 +5,8 @@ from dataclasses import dataclass
 
 from django.db import transaction
 
-from puzzle.models import DailyChallenge, PuzzleTemplate
+from puzzle.models import DailyChallenge
+from puzzle.services.selection import pick_random_template
 
 
 @dataclass(frozen=True)
@@ -22,9 +23,7 @@ def create_daily_challenge(
     if existing is not None:
         return DailyResult(challenge=existing, created=False)
 
-    template = (
-        PuzzleTemplate.objects.filter(size=size, difficulty_label=difficulty).order_by("?").first()
-    )
+    template = pick_random_template(size=size, difficulty=difficulty)
     if template is None:
         raise ValueError("No PuzzleTemplate available for requested size/difficulty")
 
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 from dataclasses import dataclass
 
 
@@ -24,6 +25,34 @@ class Engine(ABC):
         - difficulty_metric is an engine-defined float used to map to a label
         """
 
+    def generate_many(
+        self, *, spec: GridSpec, difficulty: str, count: int, seed: int | None = None
+    ) -> Iterator[tuple[str, str, float]]:
+        """
+        Yield `count` results of `generate`, one at a time as they are produced.
+        Item i uses seed `seed + i` (or None), so a batch matches the equivalent
+        sequence of single calls. Engines may override to share setup across the batch.
+        """
+        for i in range(count):
+            yield self.generate(
+                spec=spec, difficulty=difficulty, seed=None if seed is None else seed + i
+            )
+
+    def generate_traced(
+        self, *, spec: GridSpec, difficulty: str, count: int, seed: int | None = None
+    ) -> Iterator[tuple[str, str, float, bytes]]:
+        """
+        Like `generate_many`, plus each puzzle's packed solve trace (see trace.py).
+        The default rates every result again; engines that already rate while
+        generating should override to reuse that work.
+        """
+        from .trace import trace_grid
+
+        for givens, solution, metric in self.generate_many(
+            spec=spec, difficulty=difficulty, count=count, seed=seed
+        ):
+            yield givens, solution, metric, trace_grid(spec, givens)
+
     @abstractmethod
     def solve(self, *, spec: GridSpec, grid: str) -> str | None:
         """Return solved board string if solvable, else None."""
@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Any
+
+from .base import GridSpec
+
+Rows = list[list[int]]
+Start = tuple[bool, int, int]
+Perm = tuple[int, ...]
+
+
+def _rows(spec: GridSpec, grid: str, transpose: bool) -> Rows:
+    n = spec.size
+    values = list(map(int, grid))
+    if transpose:
+        return [[values[c * n + r] for c in range(n)] for r in range(n)]
+    return [values[r * n : r * n + n] for r in range(n)]
+
+
+def _cycle_type(perm: Sequence[int]) -> tuple[int, ...]:
+    seen = [False] * len(perm)
+    lengths = []
+    for start in range(len(perm)):
+        if not seen[start]:
+            k, c = 0, start
+            while not seen[c]:
+                seen[c] = True
+                c = perm[c]
+                k += 1
+            lengths.append(k)
+    return tuple(sorted(lengths))
+
+
+class _Search:
+    """
+    Lex-min search for the second output row over column permutations.
+
+    With row r0 first, relabeling by first appearance always turns it into
+    1..n, so the first row never discriminates. Digit d of row r1 then gets
+    the label of its column in r0, and the second output row is the
+    conjugate of pi (column in r1 -> column in r0 holding the same digit) by
+    the column permutation. Positions are filled left to right; for each
+    column tried at position j, the column pi points to is forced to the
+    earliest free position it may take, since any later one is worse at j.
+    Only columns reaching the minimum value are branched on, and `best` is
+    shared across starts.
+    """
+
+    def __init__(self, n: int, bw: int) -> None:
+        self.n = n
+        self.bw = bw
+        self.best: list[int] | None = None
+        self.leaves: list[tuple[tuple[bool, int, int], list[int]]] = []
+
+    def run(self, key: tuple[bool, int, int], pi: list[int]) -> None:
+        n = self.n
+        self._pi = pi
+        self._key = key
+        self._visit(0, [-1] * n, [-1] * n, [-1] * (n // self.bw), [])
+
+    def _place(self, cpos: list[int], where: list[int], smap: list[int], d: int) -> int:
+        bw = self.bw
+        s = d // bw
+        o = smap.index(s) if s in smap else smap.index(-1)
+        smap[o] = s
+        for p in range(o * bw, o * bw + bw):
+            if cpos[p] < 0:
+                cpos[p] = d
+                where[d] = p
+                return p
+        raise AssertionError("no free slot in mapped stack")  # pragma: no cover
+
+    def _visit(
+        self, j: int, cpos: list[int], where: list[int], smap: list[int], values: list[int]
+    ) -> None:
+        best = self.best
+        if best is not None and values > best[:j]:
+            return
+        n, bw = self.n, self.bw
+        if j == n:
+            if best is None or values < best:
+                self.best = values
+                self.leaves = []
+            self.leaves.append((self._key, cpos))
+            return
+        if cpos[j] >= 0:
+            choices = [cpos[j]]
+        elif smap[j // bw] >= 0:
+            s = smap[j // bw]
+            choices = [c for c in range(s * bw, s * bw + bw) if where[c] < 0]
+        else:
+            choices = [c for c in range(n) if where[c] < 0 and c // bw not in smap]
+
+        results = []
+        for c in choices:
+            cp, wh, sm = cpos[:], where[:], smap[:]
+            if cp[j] < 0:
+                cp[j] = c
+                wh[c] = j
+                sm[j // bw] = c // bw
+            d = self._pi[c]
+            p = wh[d] if wh[d] >= 0 else self._place(cp, wh, sm, d)
+            results.append((p, cp, wh, sm))
+        lowest = min(r[0] for r in results)
+        if best is not None and values == best[:j] and lowest > best[j]:
+            return
+        for p, cp, wh, sm in results:
+            if p == lowest:
+                self._visit(j + 1, cp, wh, sm, values + [p])
+
+
+def _check_filled(spec: GridSpec, rows: Rows) -> None:
+    n, bh, bw = spec.size, spec.box_h, spec.box_w
+    digits = set(range(1, n + 1))
+    units = [*rows, *(list(col) for col in zip(*rows, strict=True))]
+    units += [
+        [rows[r][c] for r in range(br, br + bh) for c in range(bc, bc + bw)]
+        for br in range(0, n, bh)
+        for bc in range(0, n, bw)
+    ]
+    if any(set(unit) != digits for unit in units):
+        raise ValueError("Solution must be a filled, valid grid")
+
+
+@dataclass(frozen=True)
+class Canonical:
+    """
+    A puzzle in canonical coordinates.
+
+    `givens` is the canonical form and `solution` the solution in the same
+    labels; output cell j comes from input cell `sources[j]`.
+    """
+
+    givens: str
+    solution: str
+    sources: Perm
+
+
+def canonical_form(spec: GridSpec, givens: str, solution: str) -> str:
+    """Return the representative of `givens` under the Sudoku symmetry group."""
+    return canonicalize(spec, givens, solution).givens
+
+
+def canonicalize(spec: GridSpec, givens: str, solution: str) -> Canonical:
+    """
+    Map a puzzle to the representative of its class under the Sudoku symmetry group.
+
+    The group is digit relabeling, row permutations within bands, band
+    permutations, column permutations within stacks, stack permutations and,
+    for square boxes only, transposition. Two puzzles get the same result if
+    and only if one is a transform of the other.
+
+    The representative minimizes (rank, solution, givens) over the group,
+    relabeled by first appearance in the solution, where rank is a vector of
+    cycle types between the first row and the others (see below). Working
+    from the full solution grid rather than the sparse givens keeps ties, and
+    so the search, small; ties between automorphisms of the solution are
+    broken by the givens. Raises ValueError if `solution` is not a filled,
+    valid grid.
+    """
+    n, bh, bw = spec.size, spec.box_h, spec.box_w
+    cells = n * n
+    if len(solution) != cells or len(givens) != cells:
+        raise ValueError(f"Expected {cells} cells")
+    base_sol = _rows(spec, solution, False)
+    _check_filled(spec, base_sol)
+
+    grids: dict[bool, tuple[Rows, Rows]] = {}
+    for transpose in (False, True) if bh == bw else (False,):
+        sol = _rows(spec, solution, transpose) if transpose else base_sol
+        positions = []
+        for row in sol:
+            pos = [0] * (n + 1)
+            for c, v in enumerate(row):
+                pos[v] = c
+            positions.append(pos)
+        grids[transpose] = (sol, positions)
+
+    # The column permutation pi(a -> b) maps each column of row b to the
+    # column of row a holding the same digit. Its cycle type survives column
+    # permutations and relabeling, and pi(b -> a) is its inverse, so the
+    # cycle types of the first output row against the others form a rank
+    # that is a function of the output grid. Prefixing the rank to the
+    # ordering key lets most (transpose, r0, r1) starts be discarded before
+    # any column search; components are computed lazily for survivors.
+    types: dict[Start, tuple[int, ...]] = {}
+
+    def pair_type(t: bool, a: int, b: int) -> tuple[int, ...]:
+        key = (t, a, b) if a < b else (t, b, a)
+        found = types.get(key)
+        if found is None:
+            sol, positions = grids[t]
+            found = types[key] = _cycle_type([positions[a][v] for v in sol[b]])
+        return found
+
+    def band_of(r: int) -> range:
+        return range(r - r % bh, r - r % bh + bh)
+
+    starts = [(t, r0, r1) for t in grids for r0 in range(n) for r1 in band_of(r0) if r1 != r0]
+    rankers: tuple[Callable[[bool, int, int], Any], ...] = (
+        lambda t, r0, r1: pair_type(t, r0, r1),
+        lambda t, r0, r1: sorted(pair_type(t, r0, r) for r in band_of(r0) if r not in (r0, r1)),
+        lambda t, r0, r1: sorted(pair_type(t, r0, r) for r in range(n) if r not in band_of(r0)),
+    )
+    for rank in rankers:
+        ranked = [(rank(*start), start) for start in starts]
+        lowest = min(r for r, _ in ranked)
+        starts = [start for r, start in ranked if r == lowest]
+
+    # Each leaf of the column search is a transform, kept as the input cell
+    # feeding each output cell. Two leaves giving the same solution differ by
+    # an automorphism of the solution grid. Symmetric grids have hundreds of
+    # those, and two starts linked by one have the same leaves up to it, so
+    # only the first optimal start is searched in full: others in its orbit
+    # under the automorphisms found so far are skipped, and their leaves are
+    # the first start's leaves composed with the automorphism reaching them.
+    def leaf(start: Start, cpos: list[int]) -> tuple[list[tuple[int, ...]], Perm]:
+        t, r0, r1 = start
+        sol = grids[t][0]
+        label = [0] * (n + 1)
+        for j, c in enumerate(cpos):
+            label[sol[r0][c]] = j + 1
+        pick = itemgetter(*cpos)
+        out = [tuple(map(label.__getitem__, pick(row))) for row in sol]
+        rest = sorted((r for r in band_of(r0) if r not in (r0, r1)), key=out.__getitem__)
+        bands = sorted(
+            (sorted(band_of(b), key=out.__getitem__) for b in range(0, n, bh) if b != r0 - r0 % bh),
+            key=lambda rows: [out[r] for r in rows],
+        )
+        order = [r0, r1, *rest, *(r for b in bands for r in b)]
+        if t:
+            perm = tuple(c * n + r for r in order for c in cpos)
+        else:
+            perm = tuple(r * n + c for r in order for c in cpos)
+        return [out[r] for r in order], perm
+
+    def line_image(sigma: Perm, t: bool, r: int) -> tuple[bool, int]:
+        # Row r (column r if t) goes to a row, or to a column if sigma transposes.
+        a, b = (r, r + n) if t else (r * n, r * n + 1)
+        if sigma[a] // n == sigma[b] // n:
+            return False, sigma[a] // n
+        return True, sigma[a] % n
+
+    def act(sigma: Perm, start: Start) -> Start:
+        t, r0, r1 = start
+        t2, s0 = line_image(sigma, t, r0)
+        return t2, s0, line_image(sigma, t, r1)[1]
+
+    def orbit_of(first: Start) -> dict[Start, Perm]:
+        found = {first: tuple(range(cells))}
+        queue = [first]
+        for start in queue:
+            for sigma in automorphisms:
+                image = act(sigma, start)
+                if image not in found:
+                    found[image] = itemgetter(*found[start])(sigma)
+                    queue.append(image)
+        return found
+
+    search = _Search(n, bw)
+    best: list[tuple[int, ...]] | None = None
+    first: Start | None = None
+    optimal: list[Perm] = []
+    automorphisms: list[Perm] = []
+    orbit: dict[Start, Perm] = {}
+    for start in starts:
+        if start in orbit:
+            continue
+        t, r0, r1 = start
+        sol, positions = grids[t]
+        search.leaves = []
+        search.run(start, [positions[r0][v] for v in sol[r1]])
+        for _, cpos in search.leaves:
+            if start != first and start in orbit:
+                break  # the remaining leaves are images of the first start's
+            sol_key, perm = leaf(start, cpos)
+            if best is None or sol_key < best:
+                best, first, optimal = sol_key, start, [perm]
+                orbit = orbit_of(first)
+            elif sol_key == best and first is not None:
+                if start == first:
+                    optimal.append(perm)
+                elif start not in orbit:
+                    sigma = [0] * cells
+                    for k, x in enumerate(optimal[0]):
+                        sigma[x] = perm[k]
+                    automorphisms.append(tuple(sigma))
+                    orbit = orbit_of(first)
+    assert best is not None
+
+    # All optimal transforms give the solution `best`; the givens, as a
+    # mask in output order (empty first), decide between them.
+    given = tuple(v != "0" for v in givens)
+    masks: list[tuple[tuple[bool, ...], Perm, Perm]] = []
+    for moved in orbit.values():
+        moved_given = itemgetter(*moved)(given)
+        masks.extend((itemgetter(*perm)(moved_given), moved, perm) for perm in optimal)
+    mask, moved, perm = min(masks, key=itemgetter(0))
+    values = "".join(str(v) for row in best for v in row)
+    return Canonical(
+        givens="".join(v if m else "0" for v, m in zip(values, mask, strict=True)),
+        solution=values,
+        sources=itemgetter(*perm)(moved),
+    )
+
+
+def canonical_hash(spec: GridSpec, givens: str, solution: str) -> str:
+    """Stable 32-hex-digit digest of `canonical_form`, used for de-duplication."""
+    form = canonical_form(spec, givens, solution)
+    key = f"{spec.size}:{spec.box_h}x{spec.box_w}:{form}"
+    return hashlib.blake2b(key.encode("ascii"), digest_size=16).hexdigest()
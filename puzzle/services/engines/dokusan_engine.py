@@ -1,56 +1,89 @@
 from __future__ import annotations
 
 import random
+from collections.abc import Iterator
 
 from .base import Engine, GridSpec
+from .generator import DIG_TARGETS, MAX_ATTEMPTS, dig_out, random_solution
+from .rating import DIFFICULTY_BANDS, Rating, label_for_metric, rate_grid, rate_values
+from .solver import SolutionCount, count_solutions, format_grid, geometry_for, solve_grid
+from .trace import pack_trace
 
 
 class DokusanEngine(Engine):
     """
-    Simple 9×9-capable engine placeholder.
-    For now, uses deterministic PRNG for reproducibility and a trivial solver stub.
-    Replace with a real solver/generator in later phases.
+    Pure-Python engine for 4×4, 6×6 and 9×9 grids.
+    Solving uses the bitmask constraint-propagation solver in `solver.py`;
+    generation samples a random full grid and digs it out (`generator.py`),
+    repeating until the rating matches the requested difficulty (up to
+    MAX_ATTEMPTS, after which the closest label wins).
+    Output is reproducible for a given seed.
     """
 
-    def _rand_grid(self, *, spec: GridSpec, seed: int | None) -> tuple[str, str]:
-        rng = random.Random(seed)
-        n = spec.size * spec.size
-        # Produce a pseudo-solution cycling 1..size; placeholder for tests.
-        solution = "".join(str((i % spec.size) + 1) for i in range(n))
-        # Create givens by zeroing out ~60% cells deterministically
-        givens_list = list(solution)
-        for i in range(n):
-            if rng.random() < 0.6:
-                givens_list[i] = "0"
-        givens = "".join(givens_list)
-        return givens, solution
-
     def generate(
         self, *, spec: GridSpec, difficulty: str, seed: int | None = None
     ) -> tuple[str, str, float]:
-        # Support 4×4, 6×6, 9×9 in stub
-        if spec.size not in (4, 6, 9):
-            raise ValueError("Unsupported size for DokusanEngine stub")
-        givens, solution = self._rand_grid(spec=spec, seed=seed)
-        metric = self.rate_difficulty(spec=spec, grid=givens)
-        return givens, solution, metric
+        return next(self.generate_many(spec=spec, difficulty=difficulty, count=1, seed=seed))
+
+    def generate_many(
+        self, *, spec: GridSpec, difficulty: str, count: int, seed: int | None = None
+    ) -> Iterator[tuple[str, str, float]]:
+        for givens, solution, metric, _ in self.generate_traced(
+            spec=spec, difficulty=difficulty, count=count, seed=seed
+        ):
+            yield givens, solution, metric
+
+    def generate_traced(
+        self, *, spec: GridSpec, difficulty: str, count: int, seed: int | None = None
+    ) -> Iterator[tuple[str, str, float, bytes]]:
+        # Validation, lookup tables and the PRNG are set up once per batch;
+        # the PRNG is re-seeded per item so results match single `generate` calls.
+        if not self.supports(spec=spec):
+            raise ValueError(f"Unsupported size for DokusanEngine: {spec.size}")
+        if difficulty not in DIG_TARGETS:
+            raise ValueError(f"Unknown difficulty: {difficulty}")
+        geo = geometry_for(spec)
+        target = DIG_TARGETS[difficulty]
+        rank = [label for label, _ in DIFFICULTY_BANDS]
+        wanted = rank.index(difficulty)
+        rng = random.Random()
+        for i in range(count):
+            rng.seed(None if seed is None else seed + i)
+            best: tuple[int, list[int], list[int], Rating] | None = None
+            for _ in range(MAX_ATTEMPTS):
+                solution = random_solution(geo, rng)
+                givens = dig_out(geo, solution, rng, target=target)
+                rating = rate_values(geo, givens, solution)
+                miss = abs(rank.index(label_for_metric(rating.metric)) - wanted)
+                if best is None or miss < best[0]:
+                    best = (miss, solution, givens, rating)
+                if not miss:
+                    break
+            assert best is not None
+            _, solution, givens, rating = best
+            yield (
+                format_grid(givens),
+                format_grid(solution),
+                rating.metric,
+                pack_trace(rating.steps),
+            )
 
     def solve(self, *, spec: GridSpec, grid: str) -> str | None:
-        # Stub: return a cyclic "solution" if length matches; real solver to come later
-        if len(grid) != spec.size * spec.size:
-            return None
-        return "".join(str((i % spec.size) + 1) for i in range(spec.size * spec.size))
+        return solve_grid(spec, grid)
 
     def has_unique_solution(self, *, spec: GridSpec, grid: str) -> bool:
-        # Stub uniqueness: treat any properly sized grid as uniquely solvable
-        return len(grid) == spec.size * spec.size
+        return self.count_solutions(spec=spec, grid=grid).count == 1
+
+    def count_solutions(self, *, spec: GridSpec, grid: str, limit: int = 2) -> SolutionCount:
+        """Count solutions up to `limit`, with search-node statistics."""
+        return count_solutions(spec, grid, limit=limit)
 
     def rate_difficulty(self, *, spec: GridSpec, grid: str) -> float:
-        # Simple heuristic: fewer givens = higher metric
-        total = spec.size * spec.size
-        filled = sum(1 for ch in grid if ch != "0")
-        empties = total - filled
-        return empties / total
+        return self.rate(spec=spec, grid=grid).metric
+
+    def rate(self, *, spec: GridSpec, grid: str) -> Rating:
+        """Rate by human techniques; returns metric, technique histogram and step trace."""
+        return rate_grid(spec, grid)
 
     def supports(self, *, spec: GridSpec) -> bool:  # pragma: no cover - trivial
-        return spec.size in (4, 6, 9)
+        return spec.size in (4, 6, 9) and spec.box_h * spec.box_w == spec.size
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import random
+
+from .solver import (
+    BoardState,
+    Geometry,
+    board_from_values,
+    solve_state,
+    solve_values,
+)
+
+# Share of cells the dig-out loop tries to blank per difficulty. Removal stops
+# early if no further cell can be blanked without losing uniqueness. Digging
+# only sets how hard a puzzle can get; the engine re-rolls until the rating
+# lands in the requested band (on 9x9 about 1 in 5 attempts for medium and
+# up, every attempt for easy).
+DIG_TARGETS: dict[str, float] = {
+    "easy": 0.5,
+    "medium": 0.7,
+    "hard": 1.0,
+    "expert": 1.0,
+}
+
+# Attempts per puzzle before settling for the closest label. Small grids
+# rarely or never need more than singles, so their harder bands can run out.
+MAX_ATTEMPTS = 100
+
+
+def random_solution(geo: Geometry, rng: random.Random) -> list[int]:
+    """Sample a valid full grid by solving the empty board with shuffled branching."""
+    solved = solve_values(geo, [0] * geo.cells, rng=rng)
+    if solved is None:  # pragma: no cover - every valid geometry has solutions
+        raise ValueError(f"No solution exists for {geo.spec}")
+    return solved
+
+
+def _has_alternative(geo: Geometry, state: BoardState, cell: int, value: int) -> bool:
+    """
+    Return True if the puzzle in `state` (with `cell` blank) has a solution
+    where `cell` is not `value`.
+
+    The puzzle is known to have a solution with `value` at `cell`, so it is
+    unique exactly when every other candidate for `cell` leads nowhere.
+    """
+    r, c, b = geo.row_of[cell], geo.col_of[cell], geo.box_of[cell]
+    others = geo.full & ~(state.rows[r] | state.cols[c] | state.boxes[b]) & ~(1 << (value - 1))
+    while others:
+        bit = others & -others
+        others ^= bit
+        child = state.copy()
+        child.values[cell] = bit.bit_length()
+        child.rows[r] |= bit
+        child.cols[c] |= bit
+        child.boxes[b] |= bit
+        if solve_state(geo, child) is not None:
+            return True
+    return False
+
+
+def dig_out(geo: Geometry, solution: list[int], rng: random.Random, *, target: float) -> list[int]:
+    """
+    Blank cells of `solution` in random order while the puzzle stays unique.
+
+    The row/column/box masks of the current puzzle are updated in place on
+    each removal, and every uniqueness check only searches for a solution that
+    differs at the removed cell, so nothing is re-parsed or solved from scratch.
+    """
+    state = board_from_values(geo, solution)
+    if state is None:
+        raise ValueError("solution is not a valid grid")
+    budget = int(geo.cells * target)
+    order = list(range(geo.cells))
+    rng.shuffle(order)
+    removed = 0
+    for cell in order:
+        if removed >= budget:
+            break
+        value = state.values[cell]
+        bit = 1 << (value - 1)
+        r, c, b = geo.row_of[cell], geo.col_of[cell], geo.box_of[cell]
+        state.values[cell] = 0
+        state.rows[r] &= ~bit
+        state.cols[c] &= ~bit
+        state.boxes[b] &= ~bit
+        if _has_alternative(geo, state, cell, value):
+            state.values[cell] = value
+            state.rows[r] |= bit
+            state.cols[c] |= bit
+            state.boxes[b] |= bit
+        else:
+            removed += 1
+    return state.values
@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from itertools import combinations
+
+from .base import GridSpec
+from .canonical import canonicalize
+from .solver import (
+    Geometry,
+    board_from_values,
+    format_grid,
+    geometry_for,
+    parse_grid,
+    solve_values,
+)
+
+NAKED_SINGLE = "naked-single"
+HIDDEN_SINGLE = "hidden-single"
+LOCKED_CANDIDATES = "locked-candidates"
+NAKED_PAIR = "naked-pair"
+HIDDEN_PAIR = "hidden-pair"
+NAKED_TRIPLE = "naked-triple"
+HIDDEN_TRIPLE = "hidden-triple"
+X_WING = "x-wing"
+GUESS = "guess"
+
+# Technique -> difficulty score, cheapest first. Scores are chosen so that the
+# hardest technique needed lands the metric in the matching band of
+# DIFFICULTY_BANDS (singles: easy, locked candidates/pairs: medium,
+# triples/X-wing or one guess: hard, two or more guesses: expert).
+#
+# Calibrated on fully dug generated 9x9 puzzles (300 seeds): 44% need singles
+# only, 21% locked candidates or subsets, 21% exactly one guess and 15% two or
+# more. Triples and X-wings almost never decide a puzzle on their own (the
+# rater has no chains or wings), so a single guess is what separates hard
+# from medium in practice, and repeated guessing is what makes a puzzle expert.
+TECHNIQUE_SCORES: dict[str, float] = {
+    NAKED_SINGLE: 0.05,
+    HIDDEN_SINGLE: 0.15,
+    LOCKED_CANDIDATES: 0.3,
+    NAKED_PAIR: 0.35,
+    HIDDEN_PAIR: 0.4,
+    NAKED_TRIPLE: 0.55,
+    HIDDEN_TRIPLE: 0.58,
+    X_WING: 0.6,
+    GUESS: 0.72,
+}
+
+# Extra metric (up to this much) for leaning on the hardest technique repeatedly.
+_REPEAT_BONUS = 0.1
+_REPEAT_SATURATION = 10
+# Each guess after the first adds this much, so two guesses cross into expert.
+_GUESS_STEP = 0.1
+
+# Upper metric bound (inclusive) of each difficulty label, easiest first.
+DIFFICULTY_BANDS: tuple[tuple[str, float], ...] = (
+    ("easy", 0.25),
+    ("medium", 0.5),
+    ("hard", 0.75),
+    ("expert", 1.0),
+)
+
+
+def label_for_metric(metric: float) -> str:
+    for label, upper in DIFFICULTY_BANDS:
+        if metric <= upper:
+            return label
+    return DIFFICULTY_BANDS[-1][0]
+
+
+@dataclass(frozen=True)
+class Step:
+    """
+    One logical deduction.
+
+    Placements set `cell`/`value`; elimination steps leave them None and list
+    (cell, digit) pairs in `eliminations`. `support` holds the cells that
+    justify the deduction (e.g. the pair cells of a naked pair).
+    """
+
+    technique: str
+    cell: int | None = None
+    value: int | None = None
+    eliminations: tuple[tuple[int, int], ...] = ()
+    support: tuple[int, ...] = ()
+
+
+@dataclass(frozen=True)
+class Rating:
+    metric: float
+    histogram: dict[str, int]
+    steps: tuple[Step, ...] = field(repr=False)
+
+
+class CandidateGrid:
+    """
+    Placed values plus a candidate bitmask per cell, updated incrementally.
+
+    Placing a digit clears it from the peers' masks only, so each step costs
+    O(peers) instead of recomputing candidates for the whole board.
+    """
+
+    __slots__ = ("geo", "values", "cands", "remaining")
+
+    def __init__(self, geo: Geometry, values: list[int], cands: list[int]) -> None:
+        self.geo = geo
+        self.values = values
+        self.cands = cands
+        self.remaining = values.count(0)
+
+    @classmethod
+    def from_values(cls, geo: Geometry, values: list[int]) -> CandidateGrid:
+        """Build candidates for a parsed board; raises ValueError on repeated digits."""
+        state = board_from_values(geo, values)
+        if state is None:
+            raise ValueError("Board repeats a digit within a row, column or box")
+        full = geo.full
+        rows, cols, boxes = state.rows, state.cols, state.boxes
+        row_of, col_of, box_of = geo.row_of, geo.col_of, geo.box_of
+        cands = [
+            0 if v else full & ~(rows[row_of[i]] | cols[col_of[i]] | boxes[box_of[i]])
+            for i, v in enumerate(values)
+        ]
+        return cls(geo, values[:], cands)
+
+    def place(self, cell: int, value: int) -> None:
+        bit = 1 << (value - 1)
+        self.values[cell] = value
+        self.cands[cell] = 0
+        self.remaining -= 1
+        cands = self.cands
+        for p in self.geo.peers[cell]:
+            cands[p] &= ~bit
+
+    def eliminate(self, cell: int, value: int) -> None:
+        self.cands[cell] &= ~(1 << (value - 1))
+
+    def apply(self, step: Step) -> None:
+        if step.cell is not None and step.value is not None:
+            self.place(step.cell, step.value)
+        for cell, value in step.eliminations:
+            self.eliminate(cell, value)
+
+
+def _digits(mask: int) -> list[int]:
+    out = []
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        out.append(bit.bit_length())
+    return out
+
+
+def _naked_single(grid: CandidateGrid) -> Step | None:
+    for i, m in enumerate(grid.cands):
+        if m and not m & (m - 1):
+            return Step(NAKED_SINGLE, cell=i, value=m.bit_length(), support=(i,))
+    return None
+
+
+def _hidden_single(grid: CandidateGrid) -> Step | None:
+    cands = grid.cands
+    for unit in grid.geo.units:
+        once = twice = 0
+        for i in unit:
+            m = cands[i]
+            twice |= once & m
+            once |= m
+        singles = once & ~twice
+        if singles:
+            bit = singles & -singles
+            for i in unit:
+                if cands[i] & bit:
+                    return Step(HIDDEN_SINGLE, cell=i, value=bit.bit_length(), support=unit)
+    return None
+
+
+def _locked_candidates(grid: CandidateGrid) -> Step | None:
+    geo = grid.geo
+    cands = grid.cands
+    size = geo.spec.size
+    lines = geo.units[: 2 * size]
+    boxes = geo.units[2 * size :]
+    for d in range(1, size + 1):
+        bit = 1 << (d - 1)
+        # Pointing: a digit confined to one row/column inside a box.
+        for box in boxes:
+            cells = [i for i in box if cands[i] & bit]
+            if len(cells) < 2:
+                continue
+            for line_of, offset in ((geo.row_of, 0), (geo.col_of, size)):
+                k = line_of[cells[0]]
+                if all(line_of[i] == k for i in cells[1:]):
+                    elim = tuple(
+                        (i, d) for i in lines[offset + k] if i not in box and cands[i] & bit
+                    )
+                    if elim:
+                        return Step(LOCKED_CANDIDATES, eliminations=elim, support=tuple(cells))
+        # Claiming: a digit confined to one box inside a row/column.
+        for line in lines:
+            cells = [i for i in line if cands[i] & bit]
+            if len(cells) < 2:
+                continue
+            b = geo.box_of[cells[0]]
+            if all(geo.box_of[i] == b for i in cells[1:]):
+                elim = tuple((i, d) for i in boxes[b] if i not in line and cands[i] & bit)
+                if elim:
+                    return Step(LOCKED_CANDIDATES, eliminations=elim, support=tuple(cells))
+    return None
+
+
+def _naked_subset(grid: CandidateGrid, k: int, technique: str) -> Step | None:
+    cands = grid.cands
+    for unit in grid.geo.units:
+        pool = [i for i in unit if cands[i] and cands[i].bit_count() <= k]
+        if len(pool) < k:
+            continue
+        for combo in combinations(pool, k):
+            union = 0
+            for i in combo:
+                union |= cands[i]
+            if union.bit_count() != k:
+                continue
+            elim = tuple(
+                (i, d)
+                for i in unit
+                if i not in combo and cands[i] & union
+                for d in _digits(cands[i] & union)
+            )
+            if elim:
+                return Step(technique, eliminations=elim, support=combo)
+    return None
+
+
+def _hidden_subset(grid: CandidateGrid, k: int, technique: str) -> Step | None:
+    cands = grid.cands
+    size = grid.geo.spec.size
+    for unit in grid.geo.units:
+        # Position mask (bit j = unit[j]) for every digit still open in the unit.
+        positions: dict[int, int] = {}
+        for d in range(1, size + 1):
+            bit = 1 << (d - 1)
+            pos = 0
+            for j, i in enumerate(unit):
+                if cands[i] & bit:
+                    pos |= 1 << j
+            if pos and pos.bit_count() <= k:
+                positions[d] = pos
+        if len(positions) < k:
+            continue
+        for digits in combinations(positions, k):
+            pos = 0
+            for d in digits:
+                pos |= positions[d]
+            if pos.bit_count() != k:
+                continue
+            keep = 0
+            for d in digits:
+                keep |= 1 << (d - 1)
+            cells = tuple(unit[j] for j in range(len(unit)) if pos >> j & 1)
+            elim = tuple((i, d) for i in cells for d in _digits(cands[i] & ~keep))
+            if elim:
+                return Step(technique, eliminations=elim, support=cells)
+    return None
+
+
+def _x_wing(grid: CandidateGrid) -> Step | None:
+    geo = grid.geo
+    cands = grid.cands
+    size = geo.spec.size
+    for d in range(1, size + 1):
+        bit = 1 << (d - 1)
+        for base, cover in ((0, size), (size, 0)):
+            # For each base line (row, then column), the cover-line offsets holding d.
+            pairs: dict[int, list[int]] = {}
+            for k in range(size):
+                line = geo.units[base + k]
+                pos = 0
+                for j, i in enumerate(line):
+                    if cands[i] & bit:
+                        pos |= 1 << j
+                if pos.bit_count() == 2:
+                    pairs.setdefault(pos, []).append(k)
+            for pos, lines in pairs.items():
+                if len(lines) < 2:
+                    continue
+                a, b = lines[0], lines[1]
+                support = tuple(
+                    geo.units[base + k][j] for k in (a, b) for j in range(size) if pos >> j & 1
+                )
+                elim = tuple(
+                    (i, d)
+                    for j in range(size)
+                    if pos >> j & 1
+                    for i in geo.units[cover + j]
+                    if i not in support and cands[i] & bit
+                )
+                if elim:
+                    return Step(X_WING, eliminations=elim, support=support)
+    return None
+
+
+TECHNIQUES: tuple[Callable[[CandidateGrid], Step | None], ...] = (
+    _naked_single,
+    _hidden_single,
+    _locked_candidates,
+    lambda g: _naked_subset(g, 2, NAKED_PAIR),
+    lambda g: _hidden_subset(g, 2, HIDDEN_PAIR),
+    lambda g: _naked_subset(g, 3, NAKED_TRIPLE),
+    lambda g: _hidden_subset(g, 3, HIDDEN_TRIPLE),
+    _x_wing,
+)
+
+
+def next_step(grid: CandidateGrid) -> Step | None:
+    """Return the cheapest applicable logical step, or None if logic is stuck."""
+    for technique in TECHNIQUES:
+        step = technique(grid)
+        if step is not None:
+            return step
+    return None
+
+
+def _metric(histogram: dict[str, int]) -> float:
+    if not histogram:
+        return 0.0
+    hardest = max(histogram, key=TECHNIQUE_SCORES.__getitem__)
+    if hardest == GUESS:
+        return min(1.0, TECHNIQUE_SCORES[GUESS] + _GUESS_STEP * (histogram[GUESS] - 1))
+    repeats = min(histogram[hardest], _REPEAT_SATURATION) / _REPEAT_SATURATION
+    return min(1.0, TECHNIQUE_SCORES[hardest] + _REPEAT_BONUS * repeats)
+
+
+def rate_values(geo: Geometry, values: list[int], solution: list[int] | None = None) -> Rating:
+    """
+    Solve a parsed board by always applying the cheapest available technique.
+
+    When no technique applies, the most constrained cell is filled from the
+    solution and recorded as a `guess` step. Pass `solution` if it is already
+    known; raises ValueError if the board has no solution.
+
+    Techniques are found, and guesses tie-broken, in cell order, so the board
+    is solved in canonical coordinates (see engines/canonical.py) and the
+    steps mapped back: every transform of a puzzle gets the same rating.
+    """
+    if solution is None:
+        solution = solve_values(geo, values)
+        if solution is None:
+            raise ValueError("Board has no solution")
+    canon = canonicalize(geo.spec, format_grid(values), format_grid(solution))
+    canon_solution = [int(ch) for ch in canon.solution]
+    cell_of = canon.sources
+    digit_of = [0] * (geo.spec.size + 1)
+    for j, cell in enumerate(cell_of):
+        digit_of[canon_solution[j]] = solution[cell]
+
+    grid = CandidateGrid.from_values(geo, [int(ch) for ch in canon.givens])
+    histogram: dict[str, int] = {}
+    steps: list[Step] = []
+    while grid.remaining:
+        step = next_step(grid)
+        if step is None:
+            open_cells = [i for i, v in enumerate(grid.values) if not v]
+            cell = min(open_cells, key=lambda i: grid.cands[i].bit_count())
+            step = Step(GUESS, cell=cell, value=canon_solution[cell], support=(cell,))
+        grid.apply(step)
+        steps.append(
+            Step(
+                step.technique,
+                cell=None if step.cell is None else cell_of[step.cell],
+                value=None if step.value is None else digit_of[step.value],
+                eliminations=tuple((cell_of[i], digit_of[d]) for i, d in step.eliminations),
+                support=tuple(cell_of[i] for i in step.support),
+            )
+        )
+        histogram[step.technique] = histogram.get(step.technique, 0) + 1
+    ordered = {t: histogram[t] for t in TECHNIQUE_SCORES if t in histogram}
+    return Rating(metric=_metric(ordered), histogram=ordered, steps=tuple(steps))
+
+
+def rate_grid(spec: GridSpec, grid: str) -> Rating:
+    """Rate a board string for `spec`; raises ValueError if malformed or unsolvable."""
+    geo = geometry_for(spec)
+    values = parse_grid(geo, grid)
+    if values is None:
+        raise ValueError(f"Expected {geo.cells} digits 0..{spec.size}")
+    return rate_values(geo, values)
@@ -0,0 +1,333 @@
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from functools import cache
+
+from .base import GridSpec
+
+
+@dataclass(frozen=True)
+class Geometry:
+    """
+    Precomputed lookup tables for a grid layout.
+
+    Digits are stored as ints 1..size (0 for empty); candidate sets are bitmasks
+    where bit (d - 1) stands for digit d.
+    """
+
+    spec: GridSpec
+    cells: int
+    full: int
+    row_of: tuple[int, ...]
+    col_of: tuple[int, ...]
+    box_of: tuple[int, ...]
+    units: tuple[tuple[int, ...], ...]
+    peers: tuple[tuple[int, ...], ...]
+
+
+@cache
+def geometry_for(spec: GridSpec) -> Geometry:
+    """Return (cached) lookup tables for `spec`; raises ValueError on bad box shapes."""
+    size, box_h, box_w = spec.size, spec.box_h, spec.box_w
+    if size < 1 or box_h * box_w != size:
+        raise ValueError(f"Invalid grid spec: {size}x{size} with {box_h}x{box_w} boxes")
+    cells = size * size
+    boxes_across = size // box_w
+    row_of = tuple(i // size for i in range(cells))
+    col_of = tuple(i % size for i in range(cells))
+    box_of = tuple((row_of[i] // box_h) * boxes_across + col_of[i] // box_w for i in range(cells))
+
+    rows = [tuple(i for i in range(cells) if row_of[i] == k) for k in range(size)]
+    cols = [tuple(i for i in range(cells) if col_of[i] == k) for k in range(size)]
+    boxes = [tuple(i for i in range(cells) if box_of[i] == k) for k in range(size)]
+    units = tuple(rows + cols + boxes)
+    peers = tuple(
+        tuple(
+            sorted(
+                {*rows[row_of[i]], *cols[col_of[i]], *boxes[box_of[i]]} - {i},
+            )
+        )
+        for i in range(cells)
+    )
+    return Geometry(
+        spec=spec,
+        cells=cells,
+        full=(1 << size) - 1,
+        row_of=row_of,
+        col_of=col_of,
+        box_of=box_of,
+        units=units,
+        peers=peers,
+    )
+
+
+@dataclass
+class BoardState:
+    """
+    Mutable solver state: placed values plus per-row/column/box used-digit masks.
+
+    The candidates of an empty cell are `full & ~(rows[r] | cols[c] | boxes[b])`.
+    """
+
+    values: list[int]
+    rows: list[int]
+    cols: list[int]
+    boxes: list[int]
+
+    def copy(self) -> BoardState:
+        return BoardState(self.values[:], self.rows[:], self.cols[:], self.boxes[:])
+
+
+def parse_grid(geo: Geometry, grid: str) -> list[int] | None:
+    """Parse a board string into ints; returns None on bad length or characters."""
+    if len(grid) != geo.cells:
+        return None
+    size = geo.spec.size
+    values: list[int] = []
+    for ch in grid:
+        # ASCII only: str.isdigit() also accepts digits int() cannot parse
+        if not "0" <= ch <= "9":
+            return None
+        v = int(ch)
+        if v > size:
+            return None
+        values.append(v)
+    return values
+
+
+def format_grid(values: list[int]) -> str:
+    return "".join(map(str, values))
+
+
+def board_from_values(geo: Geometry, values: list[int]) -> BoardState | None:
+    """Build masks for `values`; returns None if any unit repeats a digit."""
+    size = geo.spec.size
+    rows = [0] * size
+    cols = [0] * size
+    boxes = [0] * size
+    row_of, col_of, box_of = geo.row_of, geo.col_of, geo.box_of
+    for i, v in enumerate(values):
+        if not v:
+            continue
+        bit = 1 << (v - 1)
+        r, c, b = row_of[i], col_of[i], box_of[i]
+        if (rows[r] | cols[c] | boxes[b]) & bit:
+            return None
+        rows[r] |= bit
+        cols[c] |= bit
+        boxes[b] |= bit
+    return BoardState(values[:], rows, cols, boxes)
+
+
+def propagate(geo: Geometry, state: BoardState) -> bool:
+    """
+    Fill naked and hidden singles in place until a fixpoint.
+
+    Returns False as soon as a contradiction is found (an empty cell without
+    candidates, or a unit where some digit has nowhere to go).
+    """
+    values, rows, cols, boxes = state.values, state.rows, state.cols, state.boxes
+    row_of, col_of, box_of = geo.row_of, geo.col_of, geo.box_of
+    full = geo.full
+    cells = geo.cells
+    while True:
+        progress = False
+        for i in range(cells):
+            if values[i]:
+                continue
+            r, c, b = row_of[i], col_of[i], box_of[i]
+            m = full & ~(rows[r] | cols[c] | boxes[b])
+            if not m:
+                return False
+            if not m & (m - 1):
+                values[i] = m.bit_length()
+                rows[r] |= m
+                cols[c] |= m
+                boxes[b] |= m
+                progress = True
+        if progress:
+            continue
+
+        for unit in geo.units:
+            once = twice = placed = 0
+            for i in unit:
+                v = values[i]
+                if v:
+                    placed |= 1 << (v - 1)
+                    continue
+                m = full & ~(rows[row_of[i]] | cols[col_of[i]] | boxes[box_of[i]])
+                twice |= once & m
+                once |= m
+            if (once | placed) != full:
+                return False
+            singles = once & ~twice
+            while singles:
+                bit = singles & -singles
+                singles ^= bit
+                for i in unit:
+                    if values[i]:
+                        continue
+                    r, c, b = row_of[i], col_of[i], box_of[i]
+                    if (rows[r] | cols[c] | boxes[b]) & bit:
+                        continue
+                    values[i] = bit.bit_length()
+                    rows[r] |= bit
+                    cols[c] |= bit
+                    boxes[b] |= bit
+                    progress = True
+                    break
+                else:
+                    return False
+        if not progress:
+            return True
+
+
+def _pick_cell(geo: Geometry, state: BoardState) -> tuple[int, int]:
+    """Return (cell, candidate mask) of the empty cell with fewest candidates, or (-1, 0)."""
+    values, rows, cols, boxes = state.values, state.rows, state.cols, state.boxes
+    row_of, col_of, box_of = geo.row_of, geo.col_of, geo.box_of
+    full = geo.full
+    best = -1
+    best_mask = 0
+    best_count = geo.spec.size + 1
+    for i in range(geo.cells):
+        if values[i]:
+            continue
+        m = full & ~(rows[row_of[i]] | cols[col_of[i]] | boxes[box_of[i]])
+        n = m.bit_count()
+        if n < best_count:
+            best, best_mask, best_count = i, m, n
+            if n <= 2:
+                break
+    return best, best_mask
+
+
+@dataclass
+class SearchStats:
+    """Counters collected during a search, for profiling generation cost."""
+
+    nodes: int = 0
+    branches: int = 0
+    dead_ends: int = 0
+    max_depth: int = 0
+
+
+@dataclass(frozen=True)
+class SolutionCount:
+    """
+    Result of a bounded solution count.
+
+    `count` saturates at the requested limit; `solution` is the first solution
+    found (None if there is none).
+    """
+
+    count: int
+    solution: str | None
+    stats: SearchStats
+
+
+def _search(
+    geo: Geometry,
+    state: BoardState,
+    limit: int,
+    found: list[list[int]],
+    rng: random.Random | None,
+    stats: SearchStats,
+    depth: int = 0,
+) -> None:
+    stats.nodes += 1
+    if depth > stats.max_depth:
+        stats.max_depth = depth
+    if not propagate(geo, state):
+        stats.dead_ends += 1
+        return
+    cell, mask = _pick_cell(geo, state)
+    if cell < 0:
+        found.append(state.values)
+        return
+    bits = []
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        bits.append(bit)
+    if rng is not None:
+        rng.shuffle(bits)
+    r, c, b = geo.row_of[cell], geo.col_of[cell], geo.box_of[cell]
+    for bit in bits:
+        stats.branches += 1
+        child = state.copy()
+        child.values[cell] = bit.bit_length()
+        child.rows[r] |= bit
+        child.cols[c] |= bit
+        child.boxes[b] |= bit
+        _search(geo, child, limit, found, rng, stats, depth + 1)
+        if len(found) >= limit:
+            return
+
+
+def solve_values(
+    geo: Geometry, values: list[int], *, rng: random.Random | None = None
+) -> list[int] | None:
+    """
+    Solve a parsed board; returns the first solution found or None.
+
+    Passing `rng` randomizes the branching order, which turns solving an empty
+    board into sampling a random full grid.
+    """
+    state = board_from_values(geo, values)
+    if state is None:
+        return None
+    return solve_state(geo, state, rng=rng)
+
+
+def solve_state(
+    geo: Geometry,
+    state: BoardState,
+    *,
+    rng: random.Random | None = None,
+    stats: SearchStats | None = None,
+) -> list[int] | None:
+    """Solve from already-built masks; `state` is consumed by the search."""
+    found: list[list[int]] = []
+    _search(geo, state, 1, found, rng, stats if stats is not None else SearchStats())
+    return found[0] if found else None
+
+
+def count_values(geo: Geometry, values: list[int], *, limit: int = 2) -> SolutionCount:
+    """
+    Count solutions of a parsed board, stopping as soon as `limit` are found.
+
+    With the default limit of 2 this answers "is it unique?" without
+    enumerating: the search aborts on the second solution.
+    """
+    stats = SearchStats()
+    state = board_from_values(geo, values)
+    if state is None:
+        return SolutionCount(count=0, solution=None, stats=stats)
+    found: list[list[int]] = []
+    _search(geo, state, limit, found, None, stats)
+    return SolutionCount(
+        count=len(found),
+        solution=format_grid(found[0]) if found else None,
+        stats=stats,
+    )
+
+
+def solve_grid(spec: GridSpec, grid: str) -> str | None:
+    """Solve a board string for `spec`; returns None if malformed or unsolvable."""
+    geo = geometry_for(spec)
+    values = parse_grid(geo, grid)
+    if values is None:
+        return None
+    solved = solve_values(geo, values)
+    return None if solved is None else format_grid(solved)
+
+
+def count_solutions(spec: GridSpec, grid: str, *, limit: int = 2) -> SolutionCount:
+    """Count solutions of a board string up to `limit`; malformed boards count as 0."""
+    geo = geometry_for(spec)
+    values = parse_grid(geo, grid)
+    if values is None:
+        return SolutionCount(count=0, solution=None, stats=SearchStats())
+    return count_values(geo, values, limit=limit)
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import struct
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+
+from .base import GridSpec
+from .rating import (
+    GUESS,
+    HIDDEN_PAIR,
+    HIDDEN_SINGLE,
+    HIDDEN_TRIPLE,
+    LOCKED_CANDIDATES,
+    NAKED_PAIR,
+    NAKED_SINGLE,
+    NAKED_TRIPLE,
+    TECHNIQUE_SCORES,
+    X_WING,
+    Step,
+    rate_grid,
+)
+
+# Stable technique ids for stored traces: append only, never reorder.
+TECHNIQUE_IDS: tuple[str, ...] = (
+    NAKED_SINGLE,
+    HIDDEN_SINGLE,
+    LOCKED_CANDIDATES,
+    NAKED_PAIR,
+    HIDDEN_PAIR,
+    NAKED_TRIPLE,
+    HIDDEN_TRIPLE,
+    X_WING,
+    GUESS,
+)
+_ID_OF = {name: i for i, name in enumerate(TECHNIQUE_IDS)}
+
+# One record per placement: technique id, cell, value.
+RECORD = struct.Struct("<BBB")
+
+
+@dataclass(frozen=True)
+class TracePlacement:
+    technique: str
+    cell: int
+    value: int
+
+
+def pack_trace(steps: Iterable[Step]) -> bytes:
+    """
+    Encode a rating's step list as placements only (3 bytes each).
+
+    Elimination steps are folded into the placement they lead to: each record
+    carries the hardest technique used since the previous placement, which is
+    what a player needs to find that digit.
+    """
+    out = bytearray()
+    hardest: str | None = None
+    for step in steps:
+        if hardest is None or TECHNIQUE_SCORES[step.technique] > TECHNIQUE_SCORES[hardest]:
+            hardest = step.technique
+        if step.cell is not None and step.value is not None:
+            out += RECORD.pack(_ID_OF[hardest], step.cell, step.value)
+            hardest = None
+    return bytes(out)
+
+
+def iter_trace(data: bytes) -> Iterator[TracePlacement]:
+    for tid, cell, value in RECORD.iter_unpack(data):
+        yield TracePlacement(TECHNIQUE_IDS[tid], cell, value)
+
+
+def trace_grid(spec: GridSpec, grid: str) -> bytes:
+    """Rate `grid` and return its packed solve trace; raises ValueError if unsolvable."""
+    return pack_trace(rate_grid(spec, grid).steps)
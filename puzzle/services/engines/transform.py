@@ -0,0 +1,96 @@
+"""
+Sudoku symmetry transforms.
+
+A transform relabels digits, permutes rows within bands, bands, columns
+within stacks, stacks and, for square boxes only, transposes the grid. It
+maps valid grids to valid grids and unique puzzles to unique puzzles, and
+every logical step maps to the same technique on the image. The rater works
+in canonical coordinates (see engines/rating.py), so a transformed puzzle
+gets exactly the rating of the original, and the original's solve trace,
+remapped, is a valid solve path for it.
+"""
+
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+
+from .base import GridSpec
+from .trace import RECORD
+
+# Seeds are stored in signed 64-bit columns.
+MAX_TRANSFORM_SEED = 2**63 - 1
+
+
+@dataclass(frozen=True)
+class Transform:
+    size: int
+    transpose: bool
+    # Output row i is row rows[i] of the (possibly transposed) input; same for cols.
+    rows: tuple[int, ...]
+    cols: tuple[int, ...]
+    # digits[v] is the new label of v; digits[0] == 0 keeps empty cells empty.
+    digits: tuple[int, ...]
+
+    @cached_property
+    def _sources(self) -> tuple[int, ...]:
+        n = self.size
+        if self.transpose:
+            return tuple(c * n + r for r in self.rows for c in self.cols)
+        return tuple(r * n + c for r in self.rows for c in self.cols)
+
+    @cached_property
+    def _targets(self) -> tuple[int, ...]:
+        targets = [0] * len(self._sources)
+        for out, src in enumerate(self._sources):
+            targets[src] = out
+        return tuple(targets)
+
+    @cached_property
+    def _table(self) -> dict[int, int]:
+        return str.maketrans(
+            "".join(map(str, range(self.size + 1))), "".join(map(str, self.digits))
+        )
+
+    def apply(self, grid: str) -> str:
+        """Transform a board string (givens or solution)."""
+        if len(grid) != len(self._sources):
+            raise ValueError(f"Expected {len(self._sources)} cells")
+        return "".join([grid[s] for s in self._sources]).translate(self._table)
+
+    def map_cell(self, cell: int) -> int:
+        """Index in the transformed grid of input cell `cell`."""
+        return self._targets[cell]
+
+    def map_value(self, value: int) -> int:
+        return self.digits[value]
+
+    def apply_trace(self, data: bytes) -> bytes:
+        """Remap a packed solve trace (see engines/trace.py); techniques and order are kept."""
+        out = bytearray()
+        for tid, cell, value in RECORD.iter_unpack(data):
+            out += RECORD.pack(tid, self._targets[cell], self.digits[value])
+        return bytes(out)
+
+
+def new_transform_seed() -> int:
+    return random.getrandbits(63)
+
+
+@lru_cache(maxsize=1024)
+def random_transform(spec: GridSpec, seed: int) -> Transform:
+    """Draw a transform uniformly from the symmetry group; the same seed gives the same one.
+
+    Cached, as a session served with a transform needs it on every move.
+    """
+    rng = random.Random(seed)
+    n, bh, bw = spec.size, spec.box_h, spec.box_w
+    transpose = bh == bw and rng.random() < 0.5
+    bands, stacks = list(range(n // bh)), list(range(n // bw))
+    rng.shuffle(bands)
+    rng.shuffle(stacks)
+    rows = tuple(b * bh + i for b in bands for i in rng.sample(range(bh), bh))
+    cols = tuple(s * bw + i for s in stacks for i in rng.sample(range(bw), bw))
+    digits = (0, *rng.sample(range(1, n + 1), n))
+    return Transform(size=n, transpose=transpose, rows=rows, cols=cols, digits=digits)
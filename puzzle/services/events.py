@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+Event = dict[str, Any]
+
+
+class EventEmitter:
+    """
+    Buffers analytics events in process memory and ships them in batches.
+
+    `emit` only appends to a bounded deque: it never ships, so it never
+    touches the broker or (with eager Celery) the database. A daemon shipper
+    thread, started on the first emit in each process, hands the buffer to
+    `ship` when `batch_size` events are waiting or `flush_seconds` after its
+    last run, and `flush` ships what is left at interpreter exit. With
+    `background=False` nothing ships until `flush` is called.
+
+    Drop policy: when the buffer is full the oldest events are discarded and
+    counted in `dropped`; a batch whose shipping fails is put back at the
+    front under the same bound. Analytics may lose events under sustained
+    overload or broker outages; gameplay is never slowed or failed by them.
+    """
+
+    def __init__(
+        self,
+        *,
+        ship: Callable[[list[Event]], None],
+        maxsize: int,
+        batch_size: int,
+        flush_seconds: float,
+        background: bool = True,
+    ) -> None:
+        self.ship = ship
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.background = background
+        self.dropped = 0
+        self._buf: deque[Event] = deque(maxlen=maxsize)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._shipper_pid: int | None = None
+
+    def __len__(self) -> int:
+        return len(self._buf)
+
+    def emit(
+        self,
+        name: str,
+        *,
+        user_id: int | None = None,
+        game_id: int | None = None,
+        payload: dict[str, Any] | None = None,
+    ) -> None:
+        event = {
+            "name": name,
+            "user_id": user_id,
+            "game_id": game_id,
+            "payload": payload or {},
+            "created_at": timezone.now().isoformat(),
+        }
+        with self._lock:
+            self._append(event)
+            due = len(self._buf) >= self.batch_size
+        if self.background:
+            self._start_shipper()
+            if due:
+                self._wake.set()
+
+    def _append(self, event: Event) -> None:
+        if len(self._buf) == self._buf.maxlen:
+            self.dropped += 1
+        self._buf.append(event)
+
+    def _start_shipper(self) -> None:
+        # Threads do not survive fork, so a forked worker starts its own.
+        pid = os.getpid()
+        if self._shipper_pid == pid:
+            return
+        with self._lock:
+            if self._shipper_pid == pid:
+                return
+            self._shipper_pid = pid
+        threading.Thread(target=self._run_shipper, name="analytics-shipper", daemon=True).start()
+
+    def _run_shipper(self) -> None:
+        while True:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            # Eager Celery ingests on this thread; drop connections gone stale meanwhile.
+            close_old_connections()
+            self.flush()
+
+    def flush(self) -> None:
+        """Ship everything buffered, in `batch_size` chunks, on the calling thread."""
+        with self._lock:
+            if not self._buf:
+                return
+            batch = list(self._buf)
+            self._buf.clear()
+        for start in range(0, len(batch), self.batch_size):
+            chunk = batch[start : start + self.batch_size]
+            try:
+                self.ship(chunk)
+            except Exception:
+                logger.warning("Shipping %d analytics events failed", len(chunk), exc_info=True)
+                self._requeue(batch[start:])
+                return
+
+    def _requeue(self, events: list[Event]) -> None:
+        with self._lock:
+            pending = list(self._buf)
+            self._buf.clear()
+            for event in events + pending:
+                self._append(event)
+
+
+def _ship_via_celery(batch: list[Event]) -> None:
+    from puzzle.tasks import ingest_analytics_events
+
+    ingest_analytics_events.delay(batch)
+
+
+emitter = EventEmitter(
+    ship=_ship_via_celery,
+    maxsize=settings.PUZZLE_ANALYTICS_BUFFER_SIZE,
+    batch_size=settings.PUZZLE_ANALYTICS_BATCH_SIZE,
+    flush_seconds=settings.PUZZLE_ANALYTICS_FLUSH_SECONDS,
+)
+atexit.register(emitter.flush)
+
+
+def emit(
+    name: str,
+    *,
+    user_id: int | None = None,
+    game_id: int | None = None,
+    payload: dict[str, Any] | None = None,
+) -> None:
+    """Record an analytics event without a database write on the caller's path."""
+    emitter.emit(name, user_id=user_id, game_id=game_id, payload=payload)
@@ -0,0 +1,76 @@
+"""
+Streaming export of `PuzzleTemplate` rows as NDJSON or a JSON array.
+
+Rows are read with `.values().iterator(chunk_size=...)` (a server-side cursor
+on PostgreSQL) and encoded one chunk at a time, so memory stays bounded by
+`chunk_size` however many templates are exported. Output is a sequence of
+text blocks suitable for `StreamingHttpResponse` or writing to a file.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Callable, Iterator
+from itertools import islice
+from typing import Any
+
+from django.db.models import QuerySet
+
+from puzzle.models import PuzzleTemplate
+
+DEFAULT_CHUNK_SIZE = 2000
+
+FIELDS = (
+    "id",
+    "size",
+    "box_h",
+    "box_w",
+    "givens",
+    "solution",
+    "difficulty_metric",
+    "difficulty_label",
+    "source",
+    "created_at",
+)
+
+FORMATS = ("ndjson", "json")
+CONTENT_TYPES = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+
+def _encode(row: dict[str, Any]) -> str:
+    row["created_at"] = row["created_at"].isoformat()
+    return json.dumps(row, separators=(",", ":"))
+
+
+def _encoded_chunks(queryset: QuerySet[PuzzleTemplate], chunk_size: int) -> Iterator[list[str]]:
+    rows = queryset.order_by("pk").values(*FIELDS).iterator(chunk_size=chunk_size)
+    while chunk := [_encode(r) for r in islice(rows, chunk_size)]:
+        yield chunk
+
+
+def iter_export(
+    queryset: QuerySet[PuzzleTemplate],
+    *,
+    fmt: str = "ndjson",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_chunk: Callable[[int], None] | None = None,
+) -> Iterator[str]:
+    """Yield the export as text blocks of up to `chunk_size` records.
+
+    `on_chunk`, if given, is called with the number of records in each block.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    first = True
+    if fmt == "json":
+        yield "["
+    for chunk in _encoded_chunks(queryset, chunk_size):
+        if on_chunk is not None:
+            on_chunk(len(chunk))
+        if fmt == "ndjson":
+            yield "\n".join(chunk) + "\n"
+        else:
+            yield ("" if first else ",") + ",".join(chunk)
+        first = False
+    if fmt == "json":
+        yield "]"
@@ -1,16 +1,36 @@
 from __future__ import annotations
 
+from collections.abc import Callable, Sequence
 from dataclasses import dataclass
-from typing import Any
+from typing import TypeVar
 
+from django.db import transaction
 from django.utils import timezone
 
 from puzzle.models import AnalyticsEvent, GameSession, PuzzleTemplate
+from puzzle.services import events, journal, session_buffer
+from puzzle.services.codec import SessionPuzzle, SessionState, read_board
+from puzzle.services.engines.solver import geometry_for
+
+T = TypeVar("T")
+
+# Called with a session's user_id before it is modified; False refuses the edit.
+OwnerCheck = Callable[[int | None], bool]
+
+
+class NotSessionOwnerError(Exception):
+    """An `OwnerCheck` refused an edit of the session."""
 
 
 @dataclass(frozen=True)
 class MoveResult:
     game: GameSession
+    # Cells changed by this call, or their peers, that now share a value with
+    # another cell in their row, column or box.
+    conflicts: tuple[int, ...] = ()
+    # Cells in the same region that were in conflict before this call and no
+    # longer are (e.g. both ends of a clash when one is erased).
+    cleared: tuple[int, ...] = ()
 
 
 def _index_bounds_check(index: int, size: int) -> None:
@@ -19,27 +39,169 @@ def _index_bounds_check(index: int, size: int) -> None:
         raise ValueError(f"cell_index out of range 0..{total-1}")
 
 
-def start_game(*, user_id: int | None, template_id: int) -> GameSession:
+def start_game(
+    *, user_id: int | None, template_id: int, transform_seed: int | None = None
+) -> GameSession:
+    """Start a session on a template, or on its virtual variant for `transform_seed`."""
     template = PuzzleTemplate.objects.get(pk=template_id)
-    board_state = template.givens
-    game = GameSession.objects.create(
+    game = GameSession(
         user_id=user_id,
         puzzle=template,
-        board_state=board_state,
-        pencil_marks={},
+        transform_seed=transform_seed,
         mistakes_count=0,
         time_seconds=0,
     )
+    puzzle = SessionPuzzle.from_game(game)
+    SessionState.from_strings(puzzle.givens, {}, template.size**2).store(game)
+    game.save()
     # Analytics: game start
-    AnalyticsEvent.objects.create(
-        name=AnalyticsEvent.EVENT_GAME_START,
+    payload: dict[str, int] = {"template_id": template.id}
+    if transform_seed is not None:
+        payload["transform_seed"] = transform_seed
+    events.emit(
+        AnalyticsEvent.EVENT_GAME_START,
         user_id=user_id,
-        game=game,
-        payload={"template_id": template.id},
+        game_id=game.id,
+        payload=payload,
     )
     return game
 
 
+@dataclass(frozen=True)
+class Move:
+    cell_index: int
+    value: int
+    mode: str = "number"
+
+
+def _apply_to_state(state: SessionState, puzzle: SessionPuzzle, move: Move) -> None:
+    size = puzzle.spec.size
+    _index_bounds_check(move.cell_index, size)
+    if not (0 <= move.value <= size):
+        raise ValueError("value out of range")
+
+    # Disallow editing givens
+    if puzzle.givens[move.cell_index] != "0":
+        raise ValueError("Cannot change a given cell")
+
+    i = move.cell_index
+    if move.mode == "number":
+        kind, before, after = journal.KIND_NUMBER, state.get(i), move.value
+        state.set(i, after)
+        if after and after != before and str(after) != puzzle.solution[i]:
+            state.mistakes += 1
+    elif move.mode == "pencil":
+        # Toggle one candidate bit; 0 clears the cell's marks
+        before = state.get_marks(i)
+        after = 0 if move.value == 0 else before ^ (1 << (move.value - 1))
+        kind = journal.KIND_PENCIL
+        state.set_marks(i, after)
+    else:
+        raise ValueError("Unknown mode; expected 'number' or 'pencil'")
+    if before != after:
+        state.journal.append(state, i, kind, before, after)
+
+
+def _conflicts(
+    before: SessionState, after: SessionState, puzzle: SessionPuzzle, changed: set[int]
+) -> tuple[tuple[int, ...], tuple[int, ...]]:
+    """Conflicts after an edit and the ones it resolved, around the `changed` cells.
+
+    A conflict can only appear or disappear at a changed cell (placed,
+    overwritten or erased) or one of its peers, so both states are checked
+    over just that region, reading precomputed peers (20 on 9x9): the cost
+    per move does not depend on how full the board is. Returns the region's
+    cells that now share a value with a peer, and those that did before but
+    no longer do.
+    """
+    peers = geometry_for(puzzle.spec).peers
+    region = set(changed)
+    for i in changed:
+        region.update(peers[i])
+
+    def clashing(state: SessionState) -> set[int]:
+        found = set()
+        for i in region:
+            v = state.get(i)
+            if v and any(state.get(p) == v for p in peers[i]):
+                found.add(i)
+        return found
+
+    now = clashing(after)
+    return tuple(sorted(now)), tuple(sorted(clashing(before) - now))
+
+
+def _edit(
+    game_id: int,
+    edit: Callable[[SessionState, SessionPuzzle], T],
+    *,
+    changes: int,
+    time_seconds: int | None = None,
+    owner_check: OwnerCheck | None = None,
+) -> tuple[T, GameSession]:
+    """
+    Run `edit(state, puzzle)` against a session and persist the result.
+
+    Uses the write-behind buffer when enabled (the returned GameSession is then
+    an unsaved instance holding the buffered state); otherwise locks the row
+    and writes one UPDATE. `owner_check` is applied to the session's owner as
+    loaded for the edit, so it costs no extra read. Nothing is written if
+    `edit` raises or NotSessionOwnerError is raised.
+    """
+    if session_buffer.enabled():
+        with session_buffer.open_session(game_id) as buf:
+            if owner_check is not None and not owner_check(buf.user_id):
+                raise NotSessionOwnerError(game_id)
+            out = edit(buf.state, buf.puzzle)
+            buf.record(changes, time_seconds)
+        snapshot = GameSession(pk=game_id, time_seconds=time_seconds or 0)
+        buf.state.store(snapshot)
+        return out, snapshot
+
+    with transaction.atomic():
+        game = GameSession.objects.select_for_update().select_related("puzzle").get(pk=game_id)
+        if owner_check is not None and not owner_check(game.user_id):
+            raise NotSessionOwnerError(game_id)
+        state = SessionState.from_game(game, game.puzzle.size**2)
+        out = edit(state, SessionPuzzle.from_game(game))
+        update_fields = [*state.store(game), "updated_at"]
+        if time_seconds is not None:
+            game.time_seconds = time_seconds
+            update_fields.append("time_seconds")
+        game.save(update_fields=update_fields)
+        state.journal.save()
+    return out, game
+
+
+def apply_moves(
+    *,
+    game_id: int,
+    moves: Sequence[Move],
+    time_seconds: int | None = None,
+    owner_check: OwnerCheck | None = None,
+) -> MoveResult:
+    """
+    Apply a batch of moves in order with one row lock and one UPDATE.
+
+    All-or-nothing: if any move is invalid a ValueError is raised and nothing
+    is written. `time_seconds`, when given, is saved alongside the board.
+    Each move that changes the board is appended to the session journal, and
+    each placement that differs from the solution counts as a mistake.
+    """
+
+    def edit(state: SessionState, puzzle: SessionPuzzle) -> tuple[tuple[int, ...], tuple[int, ...]]:
+        before = state.copy()
+        for move in moves:
+            _apply_to_state(state, puzzle, move)
+        changed = {m.cell_index for m in moves if m.mode == "number"}
+        return _conflicts(before, state, puzzle, changed)
+
+    (conflicts, cleared), game = _edit(
+        game_id, edit, changes=len(moves), time_seconds=time_seconds, owner_check=owner_check
+    )
+    return MoveResult(game=game, conflicts=conflicts, cleared=cleared)
+
+
 def apply_move(
     *,
     game_id: int,
@@ -47,78 +209,63 @@ def apply_move(
     value: int,
     mode: str = "number",
 ) -> MoveResult:
-    game = GameSession.objects.select_related("puzzle").get(pk=game_id)
-    size = game.puzzle.size
-    _index_bounds_check(cell_index, size)
-    if not (0 <= value <= size):
-        raise ValueError("value out of range")
+    return apply_moves(game_id=game_id, moves=[Move(cell_index, value, mode)])
 
-    # Disallow editing givens
-    if game.puzzle.givens[cell_index] != "0":
-        raise ValueError("Cannot change a given cell")
 
-    # Ensure board_state is a string; if JSON structure, normalize by joining
-    if isinstance(game.board_state, str):
-        board = list(game.board_state)
-    elif isinstance(game.board_state, list):
-        board = [str(v) for v in game.board_state]
-    else:
-        # Attempt to coerce common JSON-like structures
-        if isinstance(game.board_state, dict) and "board" in game.board_state:
-            raw: Any = game.board_state["board"]
-            if isinstance(raw, str):
-                board = list(raw)
-            elif isinstance(raw, list):
-                board = [str(v) for v in raw]
-            else:
-                raise ValueError("Unsupported board_state format")
-        else:
-            raise ValueError("Unsupported board_state format")
-
-    if mode == "number":
-        board[cell_index] = "0" if value == 0 else str(value)
-    elif mode == "pencil":
-        marks: dict[str, list[int]] = game.pencil_marks or {}
-        key = str(cell_index)
-        current = set(marks.get(key, []))
-        if value == 0:
-            current.clear()
-        else:
-            if value in current:
-                current.remove(value)
-            else:
-                current.add(value)
-        if current:
-            marks[key] = sorted(current)
-        elif key in marks:
-            del marks[key]
-        game.pencil_marks = marks
-    else:
-        raise ValueError("Unknown mode; expected 'number' or 'pencil'")
+def undo_move(
+    *, game_id: int, owner_check: OwnerCheck | None = None
+) -> journal.JournalEntry | None:
+    """Revert the most recent applied move; returns it, or None if there is nothing to undo."""
+    entry, _ = _edit(
+        game_id, lambda state, puzzle: journal.undo(state), changes=1, owner_check=owner_check
+    )
+    return entry
 
-    # Persist board back as string
-    game.board_state = "".join(board)
-    game.save(update_fields=["board_state", "pencil_marks", "updated_at"])
-    return MoveResult(game=game)
+
+def redo_move(
+    *, game_id: int, owner_check: OwnerCheck | None = None
+) -> journal.JournalEntry | None:
+    """Re-apply the most recently undone move; returns it, or None if there is nothing to redo."""
+    entry, _ = _edit(
+        game_id, lambda state, puzzle: journal.redo(state), changes=1, owner_check=owner_check
+    )
+    return entry
+
+
+def replay_session(*, game_id: int, upto: int | None = None) -> SessionState:
+    """Rebuild a session's state from its journal base and the retained records."""
+    session_buffer.flush(game_id)
+    game = GameSession.objects.select_related("puzzle").get(pk=game_id)
+    cells = game.puzzle.size**2
+    current = SessionState.from_game(game, cells)
+    if current.journal.base is None:
+        start = SessionState.from_strings(SessionPuzzle.from_game(game).givens, {}, cells)
+    else:
+        start = SessionState.from_packed(current.journal.base, cells)
+    return journal.replay(start, current.journal, upto)
 
 
 def validate_board(*, game_id: int) -> bool:
+    session_buffer.flush(game_id)
     game = GameSession.objects.select_related("puzzle").get(pk=game_id)
-    if not isinstance(game.board_state, str):
+    try:
+        board = read_board(game)
+    except ValueError:
         return False
-    return game.board_state == game.puzzle.solution
+    return board == SessionPuzzle.from_game(game).solution
 
 
 def complete_game(*, game_id: int) -> GameSession:
+    session_buffer.flush(game_id)
     game = GameSession.objects.get(pk=game_id)
     game.status = GameSession.STATUS_COMPLETED
     game.completed_at = timezone.now()
     game.save(update_fields=["status", "completed_at", "updated_at"])
     # Analytics: game complete
-    AnalyticsEvent.objects.create(
-        name=AnalyticsEvent.EVENT_GAME_COMPLETE,
-        user=game.user,
-        game=game,
+    events.emit(
+        AnalyticsEvent.EVENT_GAME_COMPLETE,
+        user_id=game.user_id,
+        game_id=game.id,
         payload={"time_seconds": game.time_seconds, "mistakes": game.mistakes_count},
     )
     return game
@@ -1,30 +1,36 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
 from dataclasses import dataclass
 
 from django.db import transaction
 
 from puzzle.models import PuzzleTemplate
+from puzzle.services.bulk import DEFAULT_CHUNK_SIZE, bulk_create_templates
 from puzzle.services.engines import GridSpec
+from puzzle.services.engines.canonical import canonical_hash
+from puzzle.services.engines.rating import label_for_metric
 from puzzle.services.factory import get_engine_for
+from puzzle.services.parallel import generate_parallel
 
 
 @dataclass(frozen=True)
 class GenerationResult:
     template: PuzzleTemplate
+    # False when an equivalent puzzle was already stored and is returned instead.
+    created: bool = True
+
+
+@dataclass(frozen=True)
+class BatchGenerationResult:
+    created: int
 
 
 def map_metric_to_label(metric: float) -> str:
-    """Simple mapping; later make configurable.
+    """Bucket a rating metric into a difficulty label (see `rating.DIFFICULTY_BANDS`).
     0.0..0.25 -> easy, 0.25..0.5 -> medium, 0.5..0.75 -> hard, else expert
     """
-    if metric <= 0.25:
-        return PuzzleTemplate.DIFFICULTY_EASY
-    if metric <= 0.5:
-        return PuzzleTemplate.DIFFICULTY_MEDIUM
-    if metric <= 0.75:
-        return PuzzleTemplate.DIFFICULTY_HARD
-    return PuzzleTemplate.DIFFICULTY_EXPERT
+    return label_for_metric(metric)
 
 
 @transaction.atomic
@@ -39,12 +45,19 @@ def generate_template(
 ) -> GenerationResult:
     spec = GridSpec(size=size, box_h=box_h, box_w=box_w)
     engine = get_engine_for(spec, source=None)
-    givens, solution, metric = engine.generate(spec=spec, difficulty=difficulty, seed=seed)
+    givens, solution, metric, trace = next(
+        engine.generate_traced(spec=spec, difficulty=difficulty, count=1, seed=seed)
+    )
 
     # Validate uniqueness before saving
     if not engine.has_unique_solution(spec=spec, grid=givens):
         raise ValueError("Generated puzzle is not uniquely solvable")
 
+    digest = canonical_hash(spec, givens, solution)
+    existing = PuzzleTemplate.objects.filter(canonical_hash=digest).first()
+    if existing is not None:
+        return GenerationResult(template=existing, created=False)
+
     label = map_metric_to_label(metric)
     template = PuzzleTemplate.objects.create(
         size=size,
@@ -55,5 +68,62 @@ def generate_template(
         difficulty_metric=metric,
         difficulty_label=label,
         source=source or "engine",
+        solve_trace=trace,
+        canonical_hash=digest,
     )
     return GenerationResult(template=template)
+
+
+def store_generated(
+    rows: Iterable[tuple[str, str, float, bytes | None]],
+    *,
+    spec: GridSpec,
+    source: str | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Persist (givens, solution, metric, solve_trace) tuples with chunked `bulk_create`.
+
+    Labels are derived from the metric as in `generate_template`; puzzles
+    equivalent to stored ones are skipped. Returns the number of rows inserted.
+    """
+    templates = (
+        PuzzleTemplate(
+            size=spec.size,
+            box_h=spec.box_h,
+            box_w=spec.box_w,
+            givens=givens,
+            solution=solution,
+            difficulty_metric=metric,
+            difficulty_label=map_metric_to_label(metric),
+            source=source or "engine",
+            solve_trace=trace,
+        )
+        for givens, solution, metric, trace in rows
+    )
+    return bulk_create_templates(templates, chunk_size=chunk_size)
+
+
+def generate_templates(
+    *,
+    size: int,
+    box_h: int,
+    box_w: int,
+    difficulty: str,
+    count: int,
+    source: str | None = None,
+    seed: int | None = None,
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> BatchGenerationResult:
+    """Generate and store `count` templates via `Engine.generate_many`.
+
+    Template i uses seed `seed + i`, matching `count` calls to `generate_template`.
+    With `workers > 1` generation fans out over a process pool. Rows are
+    inserted in the parent with one `bulk_create` and transaction per chunk.
+    """
+    spec = GridSpec(size=size, box_h=box_h, box_w=box_w)
+    rows = generate_parallel(
+        spec=spec, difficulty=difficulty, count=count, seed=seed, workers=workers
+    )
+    created = store_generated(rows, spec=spec, source=source, chunk_size=chunk_size)
+    return BatchGenerationResult(created=created)
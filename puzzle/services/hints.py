@@ -2,47 +2,130 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
+from django.core.cache import cache
+
 from puzzle.models import AnalyticsEvent, GameSession
+from puzzle.services import events, session_buffer
+from puzzle.services.codec import SessionPuzzle, read_board
+from puzzle.services.engines.rating import GUESS, CandidateGrid, Step, next_step
+from puzzle.services.engines.solver import geometry_for
+from puzzle.services.engines.trace import iter_trace
+from puzzle.services.engines.transform import random_transform
+
+# Technique reported when a placed digit disagrees with the solution.
+MISTAKE = "mistake"
+
+_KEY_PREFIX = "puzzle:hint:v1"
+ELIMINATIONS_TTL = 24 * 60 * 60
 
 
 @dataclass(frozen=True)
 class Hint:
-    cell_index: int
-    value: int
+    """
+    The next step for a session.
+
+    Placements set `cell_index`/`value`; elimination steps leave them None and
+    list (cell, digit) pairs in `eliminations`. `support` holds the cells that
+    justify the step.
+    """
+
+    cell_index: int | None
+    value: int | None
     technique: str
+    eliminations: tuple[tuple[int, int], ...] = ()
+    support: tuple[int, ...] = ()
+
+
+def eliminations_key(game_id: int, template_id: int) -> str:
+    return f"{_KEY_PREFIX}:{game_id}:{template_id}:elims"
+
+
+def _from_step(step: Step) -> Hint:
+    return Hint(step.cell, step.value, step.technique, step.eliminations, step.support)
+
+
+def _from_trace(trace: bytes, board: str, solution: str) -> Hint | None:
+    """First placement of the template's solve trace still empty on `board`.
+
+    The board must hold only correct digits, so it agrees with the trace and
+    every earlier trace placement is already on it. Guess steps, and steps a
+    stale trace gets wrong, return None so the caller searches for a logical
+    step instead.
+    """
+    for p in iter_trace(trace):
+        if board[p.cell] == "0":
+            if p.technique == GUESS or str(p.value) != solution[p.cell]:
+                return None
+            return Hint(p.cell, p.value, p.technique, support=(p.cell,))
+    return None
 
 
 def get_next_hint(*, game_id: int) -> Hint | None:
     """
-    Very simple hint strategy for MVP:
-    - Find the first empty cell '0' in the current board_state
-    - Suggest the correct value from the template solution
-    - Report technique as 'single-candidate' (placeholder)
-    Returns None if no empty cells remain.
+    Return the easiest logical step from the player's current board.
+
+    - A placed digit that disagrees with the solution is reported first
+      (technique "mistake", value = the correct digit).
+    - Otherwise, if the template has a precomputed solve trace, the first
+      trace placement the player has not made yet is returned: a lookup,
+      no search.
+    - Otherwise candidates are rebuilt from the board with bitmasks and the
+      rater's techniques are tried cheapest first.
+    - Eliminations handed out by earlier hints are kept per session in the
+      cache and re-applied, so successive elimination hints make progress
+      instead of repeating. They stay valid as the board fills in because
+      they only ever remove digits that contradict the solution.
+    - If no technique applies, the most constrained cell's solution value is
+      returned as a "guess".
+    Returns None if the board is complete.
     """
+    session_buffer.flush(game_id)
     game = GameSession.objects.select_related("puzzle").get(pk=game_id)
-    if not isinstance(game.board_state, str):
-        # Only support string board_state in MVP hints
-        return None
-
-    board = game.board_state
     try:
-        idx = board.index("0")
+        board = read_board(game)
     except ValueError:
         return None
 
-    correct_char = game.puzzle.solution[idx]
-    try:
-        correct_value = int(correct_char)
-    except ValueError:
-        return None
+    puzzle = game.puzzle
+    played = SessionPuzzle.from_game(game)
+    solution = played.solution
+    hint: Hint | None = None
+    for i, ch in enumerate(board):
+        if ch != "0" and ch != solution[i]:
+            hint = Hint(i, int(solution[i]), MISTAKE, support=(i,))
+            break
 
-    hint = Hint(cell_index=idx, value=correct_value, technique="single-candidate")
+    if hint is None and "0" in board and puzzle.solve_trace is not None:
+        trace = bytes(puzzle.solve_trace)
+        if game.transform_seed is not None:
+            trace = random_transform(played.spec, game.transform_seed).apply_trace(trace)
+        hint = _from_trace(trace, board, solution)
+
+    if hint is None and "0" in board:
+        geo = geometry_for(played.spec)
+        grid = CandidateGrid.from_values(geo, [int(ch) for ch in board])
+        key = eliminations_key(game.id, puzzle.id)
+        eliminated: list[int] = cache.get(key) or [0] * geo.cells
+        for i, mask in enumerate(eliminated):
+            grid.cands[i] &= ~mask
+        step = next_step(grid)
+        if step is None:
+            open_cells = [i for i, v in enumerate(grid.values) if not v]
+            cell = min(open_cells, key=lambda i: grid.cands[i].bit_count())
+            step = Step(GUESS, cell=cell, value=int(solution[cell]), support=(cell,))
+        elif step.eliminations:
+            for cell, digit in step.eliminations:
+                eliminated[cell] |= 1 << (digit - 1)
+            cache.set(key, eliminated, timeout=ELIMINATIONS_TTL)
+        hint = _from_step(step)
+
+    if hint is None:
+        return None
     # Analytics: hint used
-    AnalyticsEvent.objects.create(
-        name=AnalyticsEvent.EVENT_HINT_USED,
-        user=game.user,
-        game=game,
-        payload={"cell_index": idx, "technique": hint.technique},
+    events.emit(
+        AnalyticsEvent.EVENT_HINT_USED,
+        user_id=game.user_id,
+        game_id=game.id,
+        payload={"cell_index": hint.cell_index, "technique": hint.technique},
     )
     return hint
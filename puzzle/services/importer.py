@@ -0,0 +1,142 @@
+"""
+Streaming import of third-party puzzle libraries.
+
+Input is an iterable of lines, each either an NDJSON object (`givens`, and
+optionally `solution`, `size`, `box_h`, `box_w`, `source`) or the common text
+format: a board of 16, 36 or 81 cells using `0` or `.` for empties, optionally
+followed by its solution and other fields separated by whitespace or commas.
+Blank lines and lines starting with `#` are skipped.
+
+Lines flow through parsing, `check_parallel` (uniqueness, rating and solve
+trace, optionally in a process pool) and chunked `bulk_create`, all lazily,
+so memory stays bounded however long the input is. Labels come from our own
+rating, not from the input. Puzzles equivalent under Sudoku symmetry to one
+already stored (or earlier in the input) are counted as duplicates.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+
+from puzzle.models import PuzzleTemplate
+from puzzle.services.bulk import DEFAULT_CHUNK_SIZE, bulk_create_templates
+from puzzle.services.engines import GridSpec
+from puzzle.services.generation import map_metric_to_label
+from puzzle.services.parallel import Candidate, check_parallel
+
+# Grid geometry inferred from the number of cells in text-format lines.
+SPECS_BY_CELLS = {
+    16: GridSpec(size=4, box_h=2, box_w=2),
+    36: GridSpec(size=6, box_h=2, box_w=3),
+    81: GridSpec(size=9, box_h=3, box_w=3),
+}
+
+_FIELD_SEP = re.compile(r"[\s,;|]+")
+
+OnReject = Callable[[int, str], None]
+
+
+@dataclass(frozen=True)
+class ImportResult:
+    created: int
+    rejected: int
+    # Valid puzzles skipped as equivalent to stored or earlier ones.
+    duplicates: int = 0
+
+
+def _board(text: str) -> str:
+    return text.replace(".", "0")
+
+
+def _is_digits(text: str) -> bool:
+    # Not str.isdigit(), which also accepts non-ASCII digits such as "²"
+    return all("0" <= ch <= "9" for ch in text)
+
+
+def parse_line(line_no: int, line: str) -> Candidate | str | None:
+    """Parse one input line into a `Candidate`, an error message, or None to skip."""
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    if line.startswith("{"):
+        try:
+            item = json.loads(line)
+            givens = _board(str(item["givens"]))
+            if "size" in item:
+                spec = GridSpec(int(item["size"]), int(item["box_h"]), int(item["box_w"]))
+            else:
+                spec = SPECS_BY_CELLS[len(givens)]
+            solution = _board(str(item.get("solution") or ""))
+            source = str(item.get("source") or "")
+        except (ValueError, KeyError, TypeError) as exc:
+            return f"bad record: {exc!r}"
+        return Candidate(line_no, spec, givens, solution, source)
+
+    fields = _FIELD_SEP.split(line)
+    givens = _board(fields[0])
+    found = SPECS_BY_CELLS.get(len(givens))
+    if found is None:
+        return f"unrecognised line ({len(givens)} cells)"
+    solution = ""
+    if len(fields) > 1 and len(fields[1]) == len(givens) and _is_digits(fields[1]):
+        solution = fields[1]
+    return Candidate(line_no, found, givens, solution)
+
+
+def iter_candidates(lines: Iterable[str], *, on_reject: OnReject) -> Iterator[Candidate]:
+    for line_no, line in enumerate(lines, start=1):
+        parsed = parse_line(line_no, line)
+        if isinstance(parsed, str):
+            on_reject(line_no, parsed)
+        elif parsed is not None:
+            yield parsed
+
+
+def import_puzzles(
+    lines: Iterable[str],
+    *,
+    source: str = "import",
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_reject: OnReject | None = None,
+) -> ImportResult:
+    """Validate, rate and store puzzles from `lines`; rejects are passed to `on_reject`.
+
+    A record's own `source` overrides the `source` argument. Accepted rows
+    are committed one chunk at a time, so an interrupted import keeps what it
+    has stored so far.
+    """
+    rejected = valid = 0
+
+    def reject(line_no: int, reason: str) -> None:
+        nonlocal rejected
+        rejected += 1
+        if on_reject is not None:
+            on_reject(line_no, reason)
+
+    def accepted() -> Iterator[PuzzleTemplate]:
+        nonlocal valid
+        for checked in check_parallel(iter_candidates(lines, on_reject=reject), workers=workers):
+            c = checked.candidate
+            if checked.error:
+                reject(c.line, checked.error)
+                continue
+            valid += 1
+            yield PuzzleTemplate(
+                size=c.spec.size,
+                box_h=c.spec.box_h,
+                box_w=c.spec.box_w,
+                givens=c.givens,
+                solution=checked.solution,
+                difficulty_metric=checked.metric,
+                difficulty_label=map_metric_to_label(checked.metric),
+                source=c.source or source,
+                solve_trace=checked.trace,
+                canonical_hash=checked.canonical,
+            )
+
+    created = bulk_create_templates(accepted(), chunk_size=chunk_size)
+    return ImportResult(created=created, rejected=rejected, duplicates=valid - created)
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+
+from puzzle.models import GameMove
+
+if TYPE_CHECKING:
+    from puzzle.services.codec import SessionState
+
+# A record is (cell, kind, value/mask before, value/mask after); one GameMove row each.
+Record = tuple[int, int, int, int]
+KIND_NUMBER = GameMove.KIND_NUMBER
+KIND_PENCIL = GameMove.KIND_PENCIL
+_MODES = {KIND_NUMBER: "number", KIND_PENCIL: "pencil"}
+# Applied records kept in memory after a save, so recent undos need no query.
+_KEEP = 16
+
+
+@dataclass(frozen=True)
+class JournalEntry:
+    cell_index: int
+    mode: str
+    before: int
+    after: int
+
+
+class Journal:
+    """
+    Bounded log of a session's moves, stored as one `GameMove` row per record.
+
+    Records are numbered by an ever-increasing `seq`. Those in [start, cursor)
+    have been applied; those in [cursor, end) were undone and can be redone
+    until the next new move truncates them. When more than
+    PUZZLE_JOURNAL_LIMIT records are applied the oldest are folded into
+    `base`, the packed board+marks state record `start` applies to (None means
+    the puzzle givens with no marks).
+
+    Only records touched since loading are held in memory; others are read on
+    demand. save() writes just the rows that changed: new moves are inserted,
+    and rows are deleted only when a new move discards the redo tail or old
+    records are folded. Undo and redo only move the cursor.
+    """
+
+    __slots__ = (
+        "game_id",
+        "start",
+        "cursor",
+        "end",
+        "base",
+        "_records",
+        "_saved_start",
+        "_saved_end",
+        "_delete_from",
+        "_base_changed",
+    )
+
+    def __init__(
+        self,
+        game_id: int | None = None,
+        start: int = 0,
+        cursor: int = 0,
+        end: int = 0,
+        base: bytes | None = None,
+    ) -> None:
+        self.game_id = game_id
+        self.start = start
+        self.cursor = cursor
+        self.end = end
+        self.base = base
+        self._records: dict[int, Record] = {}
+        # Stored rows in [_saved_start, _saved_end) match the log; rows from
+        # _delete_from on belong to a discarded redo tail.
+        self._saved_start = start
+        self._saved_end = end
+        self._delete_from: int | None = None
+        self._base_changed = False
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    @property
+    def base_changed(self) -> bool:
+        """True if `base` differs from the stored journal_base."""
+        return self._base_changed
+
+    def _load(self, lo: int, hi: int) -> None:
+        # Records from _saved_end on were appended in memory and are never read back.
+        hi = min(hi, self._saved_end)
+        if lo >= hi or all(seq in self._records for seq in range(lo, hi)):
+            return
+        rows = GameMove.objects.filter(game_id=self.game_id, seq__gte=lo, seq__lt=hi)
+        for seq, cell, kind, before, after in rows.values_list(
+            "seq", "cell_index", "kind", "before", "after"
+        ):
+            self._records.setdefault(seq, (cell, kind, before, after))
+
+    def entry(self, seq: int) -> JournalEntry:
+        if seq not in self._records:
+            self._load(seq, seq + 1)
+        cell, kind, before, after = self._records[seq]
+        return JournalEntry(cell, _MODES[kind], before, after)
+
+    def entries(self, lo: int, hi: int) -> Iterator[JournalEntry]:
+        """Records lo..hi-1 in order, read with at most one query."""
+        self._load(lo, hi)
+        return (self.entry(seq) for seq in range(lo, hi))
+
+    def append(self, state: SessionState, cell: int, kind: int, before: int, after: int) -> None:
+        if self.cursor < self.end:
+            # A new move discards the redo tail.
+            for seq in range(self.cursor, self.end):
+                self._records.pop(seq, None)
+            if self.cursor < self._saved_end:
+                self._saved_end = self.cursor
+                if self._delete_from is None or self.cursor < self._delete_from:
+                    self._delete_from = self.cursor
+            self.end = self.cursor
+        self._records[self.end] = (cell, kind, before, after)
+        self.end += 1
+        self.cursor = self.end
+        limit = settings.PUZZLE_JOURNAL_LIMIT
+        if self.cursor - self.start > limit:
+            # Trim a quarter extra so folding is amortized over many moves.
+            self._fold(state, self.cursor - limit + limit // 4)
+
+    def _fold(self, state: SessionState, new_start: int) -> None:
+        # Rewind a copy of the current state to just before record new_start,
+        # which becomes the new base.
+        snapshot = state.copy()
+        for entry in reversed(list(self.entries(new_start, self.cursor))):
+            _set(snapshot, entry, undo=True)
+        self.base = bytes(snapshot.board) + bytes(snapshot.marks)
+        self._base_changed = True
+        for seq in range(self.start, new_start):
+            self._records.pop(seq, None)
+        self.start = new_start
+
+    def reset(self, state: SessionState) -> None:
+        """Start a fresh log from `state` (used when the board is replaced wholesale)."""
+        self._records.clear()
+        self.start = self.cursor = self.end
+        self.base = bytes(state.board) + bytes(state.marks)
+        self._base_changed = True
+
+    def save(self) -> None:
+        """Write the rows changed since loading or the last save (call with the session row)."""
+        game_id = self.game_id
+        assert game_id is not None, "journal of an unsaved session"
+        moves = GameMove.objects.filter(game_id=game_id)
+        if self._delete_from is not None:
+            moves.filter(seq__gte=self._delete_from).delete()
+        if self.start > self._saved_start:
+            moves.filter(seq__lt=self.start).delete()
+        new = []
+        for seq in range(max(self._saved_end, self.start), self.end):
+            cell, kind, before, after = self._records[seq]
+            new.append(
+                GameMove(
+                    game_id=game_id,
+                    seq=seq,
+                    cell_index=cell,
+                    kind=kind,
+                    before=before,
+                    after=after,
+                )
+            )
+        if new:
+            GameMove.objects.bulk_create(new)
+        self._saved_start, self._saved_end = self.start, self.end
+        self._delete_from = None
+        self._base_changed = False
+        keep = self.cursor - _KEEP
+        for seq in [seq for seq in self._records if seq < keep]:
+            del self._records[seq]
+
+
+def _set(state: SessionState, entry: JournalEntry, *, undo: bool) -> None:
+    value = entry.before if undo else entry.after
+    if entry.mode == "number":
+        state.set(entry.cell_index, value)
+    else:
+        state.set_marks(entry.cell_index, value)
+
+
+def undo(state: SessionState) -> JournalEntry | None:
+    journal = state.journal
+    if journal.cursor <= journal.start:
+        return None
+    journal.cursor -= 1
+    entry = journal.entry(journal.cursor)
+    _set(state, entry, undo=True)
+    return entry
+
+
+def redo(state: SessionState) -> JournalEntry | None:
+    journal = state.journal
+    if journal.cursor >= journal.end:
+        return None
+    entry = journal.entry(journal.cursor)
+    journal.cursor += 1
+    _set(state, entry, undo=False)
+    return entry
+
+
+def replay(start: SessionState, journal: Journal, upto: int | None = None) -> SessionState:
+    """Apply the first `upto` retained records (default: up to the cursor) to a copy of `start`."""
+    state = start.copy()
+    hi = journal.cursor if upto is None else journal.start + upto
+    for entry in journal.entries(journal.start, hi):
+        _set(state, entry, undo=False)
+    return state
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import multiprocessing
+import random
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+
+from .engines import GridSpec
+from .engines.canonical import canonical_hash
+from .engines.rating import rate_grid
+from .engines.solver import count_solutions
+from .engines.trace import pack_trace
+from .factory import get_engine_for
+
+# Chunks per worker; more, smaller chunks keep workers busy when puzzle
+# generation times vary, while staying coarse enough to amortize IPC.
+CHUNKS_PER_WORKER = 4
+
+# Puzzles per validation job; at a few ms each this amortizes IPC well.
+CHECK_CHUNK_SIZE = 256
+
+# (givens, solution, metric, packed solve trace)
+Generated = tuple[str, str, float, bytes]
+
+
+@dataclass(frozen=True)
+class Candidate:
+    """A parsed puzzle awaiting validation; `solution` is "" when not supplied."""
+
+    line: int
+    spec: GridSpec
+    givens: str
+    solution: str = ""
+    source: str = ""
+
+
+@dataclass(frozen=True)
+class Checked:
+    """Outcome of `check_puzzle`; `error` is empty for an accepted puzzle."""
+
+    candidate: Candidate
+    solution: str = ""
+    metric: float = 0.0
+    trace: bytes = b""
+    canonical: str = ""
+    error: str = ""
+
+
+def split_seeds(*, count: int, chunks: int, seed: int) -> list[tuple[int, int]]:
+    """Split `count` items into up to `chunks` contiguous (start_seed, n) ranges.
+
+    Item i always gets seed `seed + i`, whichever chunk it lands in, so the
+    combined output does not depend on the number of workers.
+    """
+    chunks = max(1, min(chunks, count))
+    base, extra = divmod(count, chunks)
+    out: list[tuple[int, int]] = []
+    start = seed
+    for k in range(chunks):
+        n = base + (1 if k < extra else 0)
+        if n:
+            out.append((start, n))
+            start += n
+    return out
+
+
+def generate_verified(
+    *, spec: GridSpec, difficulty: str, count: int, seed: int | None = None
+) -> Iterator[Generated]:
+    """Stream `Engine.generate_traced` results, rejecting any that are not unique."""
+    engine = get_engine_for(spec)
+    for givens, solution, metric, trace in engine.generate_traced(
+        spec=spec, difficulty=difficulty, count=count, seed=seed
+    ):
+        if not engine.has_unique_solution(spec=spec, grid=givens):
+            raise ValueError("Generated puzzle is not uniquely solvable")
+        yield givens, solution, metric, trace
+
+
+def _generate_chunk(job: tuple[GridSpec, str, int, int]) -> list[Generated]:
+    spec, difficulty, start_seed, n = job
+    return list(generate_verified(spec=spec, difficulty=difficulty, count=n, seed=start_seed))
+
+
+def generate_parallel(
+    *, spec: GridSpec, difficulty: str, count: int, seed: int | None = None, workers: int = 1
+) -> Iterator[Generated]:
+    """Generate `count` puzzles across a process pool, yielding in seed order.
+
+    With `workers <= 1`, or inside a daemonic process (e.g. a prefork Celery
+    child, which may not spawn children), generation runs serially in-process.
+    When `seed` is None a random base seed is drawn once in the parent so
+    workers never repeat each other.
+    """
+    if workers <= 1 or count <= 1 or multiprocessing.current_process().daemon:
+        yield from generate_verified(spec=spec, difficulty=difficulty, count=count, seed=seed)
+        return
+
+    base = seed if seed is not None else random.SystemRandom().randrange(2**62)
+    jobs = [
+        (spec, difficulty, start, n)
+        for start, n in split_seeds(count=count, chunks=workers * CHUNKS_PER_WORKER, seed=base)
+    ]
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        for chunk in pool.map(_generate_chunk, jobs):
+            yield from chunk
+
+
+def check_puzzle(candidate: Candidate) -> Checked:
+    """Validate that `candidate` has exactly one solution, then rate, trace and hash it."""
+    spec, givens = candidate.spec, candidate.givens
+    try:
+        get_engine_for(spec)
+    except ValueError as exc:
+        return Checked(candidate, error=str(exc))
+    if len(givens) != spec.size * spec.size or any(
+        not "0" <= ch <= "9" or int(ch) > spec.size for ch in givens
+    ):
+        return Checked(candidate, error="malformed grid")
+    # One search finds the solution and stops at a second one, if any.
+    found = count_solutions(spec, givens, limit=2)
+    if found.solution is None:
+        return Checked(candidate, error="no solution")
+    if found.count > 1:
+        return Checked(candidate, error="multiple solutions")
+    solution = found.solution
+    if candidate.solution and candidate.solution != solution:
+        return Checked(candidate, error="solution does not match")
+    rating = rate_grid(spec, givens)
+    return Checked(
+        candidate,
+        solution=solution,
+        metric=rating.metric,
+        trace=pack_trace(rating.steps),
+        canonical=canonical_hash(spec, givens, solution),
+    )
+
+
+def _check_chunk(chunk: list[Candidate]) -> list[Checked]:
+    return [check_puzzle(c) for c in chunk]
+
+
+def check_parallel(
+    candidates: Iterable[Candidate], *, workers: int = 1, chunk_size: int = CHECK_CHUNK_SIZE
+) -> Iterator[Checked]:
+    """Validate `candidates` across a process pool, yielding results in input order.
+
+    Input is consumed lazily and at most two chunks per worker are in flight,
+    so memory stays bounded on arbitrarily long streams. Runs serially under
+    the same conditions as `generate_parallel`.
+    """
+    if workers <= 1 or multiprocessing.current_process().daemon:
+        for c in candidates:
+            yield check_puzzle(c)
+        return
+
+    it = iter(candidates)
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        pending: deque[Future[list[Checked]]] = deque()
+        while True:
+            while len(pending) < workers * 2:
+                chunk = list(islice(it, chunk_size))
+                if not chunk:
+                    break
+                pending.append(pool.submit(_check_chunk, chunk))
+            if not pending:
+                return
+            yield from pending.popleft().result()
@@ -0,0 +1,156 @@
+"""
+Monthly partitions and retention for `AnalyticsEvent`.
+
+On PostgreSQL, migration 0008 turns `puzzle_analyticsevent` into a table
+partitioned by RANGE (created_at) with one partition per UTC month, plus a
+DEFAULT partition that only catches rows outside every monthly range. The
+primary key becomes (id, created_at), as Postgres requires the partition key
+in unique constraints; ids still come from a single sequence and stay unique.
+
+`maintain_analytics_partitions` (daily) creates partitions ahead of time and
+drops whole months older than the retention window, which is a metadata
+operation: no DELETE, no vacuum debt, no index bloat. On other databases
+(SQLite in dev) the same task falls back to deleting expired rows in chunks.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import re
+from typing import Any
+
+from django.conf import settings
+from django.db import connection as default_connection
+
+from puzzle.models import AnalyticsEvent
+
+TABLE = AnalyticsEvent._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+_PARTITION_RE = re.compile(rf"^{TABLE}_p(\d{{4}})_(\d{{2}})$")
+
+
+def month_start(day: dt.date) -> dt.date:
+    return day.replace(day=1)
+
+
+def add_months(month: dt.date, n: int) -> dt.date:
+    index = month.year * 12 + month.month - 1 + n
+    return dt.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: dt.date) -> str:
+    return f"{TABLE}_p{month:%Y_%m}"
+
+
+def _bound(month: dt.date) -> str:
+    return f"{month:%Y-%m-%d} 00:00:00+00"
+
+
+def is_partitioned(connection: Any = None) -> bool:
+    conn = connection or default_connection
+    if conn.vendor != "postgresql":
+        return False
+    with conn.cursor() as cur:
+        cur.execute("SELECT relkind FROM pg_class WHERE relname = %s", [TABLE])
+        row = cur.fetchone()
+    return row is not None and row[0] == "p"
+
+
+def list_partitions(connection: Any = None) -> list[dt.date]:
+    """Months that currently have a partition, oldest first."""
+    conn = connection or default_connection
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s",
+            [TABLE],
+        )
+        names = [r[0] for r in cur.fetchall()]
+    months = []
+    for name in names:
+        m = _PARTITION_RE.match(name)
+        if m:
+            months.append(dt.date(int(m.group(1)), int(m.group(2)), 1))
+    return sorted(months)
+
+
+def create_partition(month: dt.date, connection: Any = None) -> None:
+    conn = connection or default_connection
+    with conn.cursor() as cur:
+        cur.execute(
+            f'CREATE TABLE IF NOT EXISTS "{partition_name(month)}" PARTITION OF "{TABLE}" '
+            f"FOR VALUES FROM ('{_bound(month)}') TO ('{_bound(add_months(month, 1))}')"
+        )
+
+
+def ensure_partitions(
+    *, months_ahead: int | None = None, today: dt.date | None = None, connection: Any = None
+) -> list[dt.date]:
+    """Create missing partitions from this month through `months_ahead`; returns those created.
+
+    Partitions must exist before rows for their month arrive: once the
+    DEFAULT partition holds rows in a range, that range cannot be attached.
+    """
+    ahead = settings.PUZZLE_ANALYTICS_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+    current = month_start(today or dt.datetime.now(dt.UTC).date())
+    existing = set(list_partitions(connection))
+    created = []
+    for n in range(ahead + 1):
+        month = add_months(current, n)
+        if month not in existing:
+            create_partition(month, connection)
+            created.append(month)
+    return created
+
+
+def retention_cutoff(
+    *, retention_months: int | None = None, today: dt.date | None = None
+) -> dt.datetime:
+    """Start of the oldest month kept; everything before it is expired."""
+    months = (
+        settings.PUZZLE_ANALYTICS_RETENTION_MONTHS if retention_months is None else retention_months
+    )
+    oldest = add_months(month_start(today or dt.datetime.now(dt.UTC).date()), -months)
+    return dt.datetime(oldest.year, oldest.month, 1, tzinfo=dt.UTC)
+
+
+def drop_expired_partitions(*, cutoff: dt.datetime, connection: Any = None) -> list[dt.date]:
+    """Drop monthly partitions entirely before `cutoff`; returns the months dropped."""
+    conn = connection or default_connection
+    dropped = []
+    for month in list_partitions(conn):
+        if add_months(month, 1) <= cutoff.date():
+            with conn.cursor() as cur:
+                cur.execute(f'DROP TABLE IF EXISTS "{partition_name(month)}"')
+            dropped.append(month)
+    with conn.cursor() as cur:
+        # Stray out-of-range rows only; the default partition should stay tiny.
+        cur.execute(f'DELETE FROM "{DEFAULT_PARTITION}" WHERE created_at < %s', [cutoff])
+    return dropped
+
+
+def purge_expired_rows(*, cutoff: dt.datetime, chunk_size: int = 10_000) -> int:
+    """Fallback for unpartitioned tables: delete expired rows in bounded chunks."""
+    deleted = 0
+    expired = AnalyticsEvent.objects.filter(created_at__lt=cutoff).order_by()
+    while True:
+        ids = list(expired.values_list("pk", flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        n, _ = AnalyticsEvent.objects.filter(pk__in=ids).delete()
+        deleted += n
+
+
+def apply_retention(*, today: dt.date | None = None) -> int:
+    """Run partition upkeep and retention.
+
+    Returns the number of partitions dropped on Postgres, or of rows deleted
+    by the fallback elsewhere.
+    """
+    cutoff = retention_cutoff(today=today)
+    if is_partitioned():
+        ensure_partitions(today=today)
+        return len(drop_expired_partitions(cutoff=cutoff))
+    return purge_expired_rows(cutoff=cutoff)
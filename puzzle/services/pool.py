@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+import random
+from functools import cache
+from typing import Any
+
+from django.conf import settings
+
+from puzzle.models import PuzzleTemplate
+from puzzle.services.cache import template_payload
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "puzzle:pool:v1"
+
+
+def pool_key(size: int, difficulty: str) -> str:
+    return f"{_KEY_PREFIX}:{size}:{difficulty}"
+
+
+@cache
+def get_pool_client() -> Any | None:
+    """Return a Redis client for the puzzle pool, or None when the pool is disabled.
+
+    The pool is enabled by setting PUZZLE_POOL_REDIS_URL; redis is imported only then.
+    """
+    url = settings.PUZZLE_POOL_REDIS_URL
+    if not url:
+        return None
+    import redis  # import only if needed to avoid optional dep issues
+
+    return redis.Redis.from_url(url)
+
+
+def _blob(template: PuzzleTemplate) -> str:
+    return json.dumps(template_payload(template), separators=(",", ":"))
+
+
+def fetch_pooled(*, size: int, difficulty: str) -> bytes | None:
+    """Return one random pre-serialized puzzle JSON blob, or None on an empty/disabled pool.
+
+    Each bucket is a Redis hash of template id -> JSON, so this is a single
+    HRANDFIELD round trip. Redis errors are logged and treated as a miss so
+    callers fall back to the database.
+    """
+    client = get_pool_client()
+    if client is None:
+        return None
+    try:
+        pair = client.hrandfield(pool_key(size, difficulty), 1, withvalues=True)
+    except Exception:  # pragma: no cover - network failure path
+        logger.warning("Puzzle pool fetch failed", exc_info=True)
+        return None
+    if not pair:
+        return None
+    value: bytes = pair[1]
+    return value
+
+
+def refill_pool(
+    *, size: int, difficulty: str, target: int | None = None, rotate: float | None = None
+) -> int:
+    """Top the bucket's pool up to `target` entries from the database.
+
+    Entries are never consumed, so on top of the shortfall a `rotate` share
+    of `target` (PUZZLE_POOL_ROTATE by default) is replaced by templates not
+    pooled yet; otherwise a full bucket would serve the same templates
+    forever. Picks them in random-key order from a random starting point and
+    drops as many random old entries as were brought in beyond the
+    shortfall, so the pool never shrinks. Returns the number of entries added
+    (0 if disabled).
+    """
+    client = get_pool_client()
+    if client is None:
+        return 0
+    want = settings.PUZZLE_POOL_TARGET if target is None else target
+    share = settings.PUZZLE_POOL_ROTATE if rotate is None else rotate
+    key = pool_key(size, difficulty)
+    pooled = [int(k) for k in client.hkeys(key)]
+    missing = max(0, want - len(pooled))
+    replace = min(math.ceil(want * share), len(pooled))
+    if not missing + replace:
+        return 0
+    bucket = (
+        PuzzleTemplate.objects.filter(size=size, difficulty_label=difficulty)
+        .exclude(pk__in=pooled)
+        .order_by("random_key")
+    )
+    r = random.random()
+    n = missing + replace
+    picked = list(bucket.filter(random_key__gte=r)[:n])
+    if len(picked) < n:
+        picked += list(bucket.filter(random_key__lt=r)[: n - len(picked)])
+    if picked:
+        client.hset(key, mapping={str(t.pk): _blob(t) for t in picked})
+    stale = random.sample(pooled, max(0, len(picked) - missing))
+    if stale:
+        client.hdel(key, *map(str, stale))
+    return len(picked)
+
+
+def evict_template(template_id: int, *, size: int) -> None:
+    """Remove a template from every difficulty bucket of its size (label may have changed)."""
+    client = get_pool_client()
+    if client is None:
+        return
+    for label, _ in PuzzleTemplate.DIFFICULTY_CHOICES:
+        client.hdel(pool_key(size, label), str(template_id))
+
+
+def pool_depths() -> dict[tuple[int, str], int]:
+    """Return {(size, difficulty): pooled count} for every non-empty bucket."""
+    client = get_pool_client()
+    if client is None:
+        return {}
+    depths: dict[tuple[int, str], int] = {}
+    for raw in client.scan_iter(match=f"{_KEY_PREFIX}:*"):
+        key = raw.decode() if isinstance(raw, bytes) else str(raw)
+        size, difficulty = key[len(_KEY_PREFIX) + 1 :].split(":", 1)
+        depths[(int(size), difficulty)] = int(client.hlen(key))
+    return depths
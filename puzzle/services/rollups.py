@@ -0,0 +1,117 @@
+"""
+Incremental completion-time rollups.
+
+`update_completion_rollups` reads only games completed after the stored
+watermark, folds them into `CompletionRollup` rows keyed by (UTC day, size,
+difficulty) and advances the watermark in the same transaction, so each game
+is counted exactly once and the work per run is proportional to the number of
+new completions, not to history.
+
+Completions younger than PUZZLE_ROLLUP_SETTLE_SECONDS are left for the next
+run: `completed_at` is stamped before the completing transaction commits, so
+a just-stamped row may not be visible yet and must not be skipped past.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from puzzle.models import CompletionRollup, GameSession, RollupWatermark
+
+WATERMARK = "completion_rollup"
+
+RollupKey = tuple[dt.date, int, str]
+
+
+@dataclass
+class _Acc:
+    count: int = 0
+    total: int = 0
+    total_sq: int = 0
+    low: int | None = None
+    high: int = 0
+
+    def add(self, seconds: int) -> None:
+        self.count += 1
+        self.total += seconds
+        self.total_sq += seconds * seconds
+        self.low = seconds if self.low is None else min(self.low, seconds)
+        self.high = max(self.high, seconds)
+
+
+def _merge(rollup: CompletionRollup, acc: _Acc) -> None:
+    low = acc.low or 0
+    rollup.min_seconds = low if rollup.count == 0 else min(rollup.min_seconds, low)
+    rollup.max_seconds = max(rollup.max_seconds, acc.high)
+    rollup.count += acc.count
+    rollup.total_seconds += acc.total
+    rollup.total_sq_seconds += acc.total_sq
+
+
+def _apply_batch(accs: dict[RollupKey, _Acc]) -> None:
+    days = {day for day, _, _ in accs}
+    existing = {
+        (r.day, r.size, r.difficulty_label): r
+        for r in CompletionRollup.objects.select_for_update().filter(day__in=days)
+    }
+    to_create: list[CompletionRollup] = []
+    to_update: list[CompletionRollup] = []
+    for (day, size, label), acc in accs.items():
+        rollup = existing.get((day, size, label))
+        if rollup is None:
+            rollup = CompletionRollup(day=day, size=size, difficulty_label=label)
+            to_create.append(rollup)
+        else:
+            to_update.append(rollup)
+        _merge(rollup, acc)
+    CompletionRollup.objects.bulk_create(to_create)
+    CompletionRollup.objects.bulk_update(
+        to_update,
+        ["count", "total_seconds", "total_sq_seconds", "min_seconds", "max_seconds"],
+    )
+
+
+def update_completion_rollups(*, batch_size: int = 5000, now: dt.datetime | None = None) -> int:
+    """Fold completions since the watermark into the rollups; returns games processed."""
+    settle = dt.timedelta(seconds=settings.PUZZLE_ROLLUP_SETTLE_SECONDS)
+    horizon = (now or timezone.now()) - settle
+    processed = 0
+    while True:
+        with transaction.atomic():
+            mark, _ = RollupWatermark.objects.select_for_update().get_or_create(name=WATERMARK)
+            qs = GameSession.objects.filter(
+                status=GameSession.STATUS_COMPLETED,
+                completed_at__isnull=False,
+                completed_at__lte=horizon,
+            )
+            if mark.completed_at is not None:
+                qs = qs.filter(
+                    Q(completed_at__gt=mark.completed_at)
+                    | Q(completed_at=mark.completed_at, id__gt=mark.game_id)
+                )
+            rows = list(
+                qs.order_by("completed_at", "id").values_list(
+                    "id", "completed_at", "time_seconds", "puzzle__size", "puzzle__difficulty_label"
+                )[:batch_size]
+            )
+            if not rows:
+                return processed
+
+            accs: dict[RollupKey, _Acc] = {}
+            for _, completed_at, seconds, size, label in rows:
+                assert completed_at is not None  # filtered above
+                key = (completed_at.astimezone(dt.UTC).date(), size, label)
+                accs.setdefault(key, _Acc()).add(seconds)
+            _apply_batch(accs)
+
+            mark.game_id, mark.completed_at = rows[-1][0], rows[-1][1]
+            mark.save(update_fields=["game_id", "completed_at", "updated_at"])
+        processed += len(rows)
+        if len(rows) < batch_size:
+            return processed
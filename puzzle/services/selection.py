@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import random
+from typing import Any, TypeVar
+
+from django.db.models import Q, QuerySet
+from django.db.models.functions import Random
+
+from puzzle.models import PuzzleTemplate
+
+T = TypeVar("T")
+
+
+def _bucket(size: int, difficulty: str) -> QuerySet[PuzzleTemplate]:
+    return PuzzleTemplate.objects.filter(size=size, difficulty_label=difficulty).order_by(
+        "random_key"
+    )
+
+
+def _first_from(qs: QuerySet[Any, T], rng: random.Random | None) -> T | None:
+    r = (rng or random).random()
+    found = qs.filter(random_key__gte=r).first()
+    if found is None:
+        found = qs.first()
+    return found
+
+
+def pick_random_template(
+    *, size: int, difficulty: str, rng: random.Random | None = None
+) -> PuzzleTemplate | None:
+    """Pick a random template from a (size, difficulty) bucket without a table scan.
+
+    Draws r in [0, 1) and takes the first template with `random_key >= r`,
+    wrapping to the smallest key. Both lookups are range scans on the
+    (size, difficulty_label, random_key) index, so cost is O(log n) and keys
+    stay valid as rows are added or deleted.
+
+    A template is picked with probability equal to the gap below its key, so
+    selection is not uniform, and does not become so as the bucket grows: the
+    widest gap is about ln(n) times the average. `reshuffle_random_keys`
+    re-draws keys over time so the favoured templates change and long-run
+    selection evens out.
+    """
+    return _first_from(_bucket(size, difficulty), rng)
+
+
+def pick_random_template_id(
+    *, size: int, difficulty: str, rng: random.Random | None = None
+) -> int | None:
+    """Like `pick_random_template` but fetches only the id (index-only lookup),
+    for callers that serve the payload from cache."""
+    return _first_from(_bucket(size, difficulty).values_list("id", flat=True), rng)
+
+
+def reshuffle_random_keys(
+    *, size: int, difficulty: str, share: float, rng: random.Random | None = None
+) -> int:
+    """Re-draw `random_key` for about `share` of a bucket; returns the rows updated.
+
+    Takes the rows with keys in a random window of width `share` (wrapping
+    past 1), a range scan on the bucket index. Run regularly (the refill task
+    does), every key is re-drawn about every 1/share runs.
+    """
+    r = (rng or random).random()
+    window = Q(random_key__gte=r, random_key__lt=r + share)
+    if r + share > 1:
+        window |= Q(random_key__lt=r + share - 1)
+    return (
+        PuzzleTemplate.objects.filter(size=size, difficulty_label=difficulty)
+        .filter(window)
+        .update(random_key=Random())
+    )
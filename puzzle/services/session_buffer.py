@@ -0,0 +1,253 @@
+"""
+Write-behind buffer for in-progress session state (PUZZLE_SESSION_WRITE_BEHIND).
+
+While enabled, moves are applied to a copy of the session's board/marks held
+in the Django cache (Redis when REDIS_CACHE_URL is set) instead of the
+`GameSession` row. The row is brought up to date by a single UPDATE when:
+
+- PUZZLE_SESSION_FLUSH_MOVES moves have accumulated, or the oldest unflushed
+  move is PUZZLE_SESSION_FLUSH_SECONDS old (checked on the next move);
+- the session is read or finished: retrieve, check, hint, complete and full
+  PUT saves flush first, so they always see every acknowledged move;
+- the periodic `flush_session_buffers` task runs (catches idle sessions).
+
+Durability:
+
+- Every flush writes the board state in one UPDATE, together with the new
+  journal rows in the same transaction, so the row always holds some complete
+  earlier state, never a partial one.
+- Acknowledged but unflushed moves exist only in the cache. Losing the cache
+  (Redis restart without persistence, eviction under memory pressure, or a
+  process restart with the local-memory backend) loses at most the moves since
+  the last flush: fewer than PUZZLE_SESSION_FLUSH_MOVES, or roughly
+  PUZZLE_SESSION_FLUSH_SECONDS plus the task interval of play.
+- A per-session cache lock serializes writers, so concurrent requests for one
+  session do not drop each other's moves. Nothing is locked across sessions:
+  the index of sessions with unflushed moves is a Redis set (SADD/SREM) when
+  the cache is Redis, and a per-process set otherwise.
+- The cache entry is stored before that index is touched, and dropped if it
+  cannot be stored after a flush, so a failure never leaves an entry older
+  than the row behind to be flushed over it later.
+- The local-memory cache is per process; with several web processes a shared
+  cache is required or sessions will diverge.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from puzzle.models import GameSession
+from puzzle.services.codec import SessionPuzzle, SessionState
+
+_KEY_PREFIX = "puzzle:session:v2"
+_DIRTY_KEY = f"{_KEY_PREFIX}:dirty"
+
+# Clean entries linger this long so the next move skips the SELECT.
+ENTRY_TTL = 24 * 60 * 60
+LOCK_TTL = 5
+LOCK_WAIT = 2.0
+
+
+class SessionBusyError(Exception):
+    """Another request held the session lock for longer than LOCK_WAIT."""
+
+
+@dataclass
+class BufferedSession:
+    game_id: int
+    puzzle: SessionPuzzle
+    state: SessionState
+    # Owner of the session, so writes can be authorized without reading the row.
+    user_id: int | None = None
+    time_seconds: int | None = None
+    pending: int = 0
+    dirty_since: float | None = None
+
+    def record(self, moves: int, time_seconds: int | None) -> None:
+        if time_seconds is not None:
+            self.time_seconds = time_seconds
+        if moves and self.dirty_since is None:
+            self.dirty_since = time.time()
+        self.pending += moves
+
+    def due(self) -> bool:
+        if not self.pending or self.dirty_since is None:
+            return False
+        return (
+            self.pending >= settings.PUZZLE_SESSION_FLUSH_MOVES
+            or time.time() - self.dirty_since >= settings.PUZZLE_SESSION_FLUSH_SECONDS
+        )
+
+
+def enabled() -> bool:
+    return bool(settings.PUZZLE_SESSION_WRITE_BEHIND)
+
+
+def buffer_key(game_id: int) -> str:
+    return f"{_KEY_PREFIX}:{game_id}"
+
+
+@contextmanager
+def _locked(key: str) -> Iterator[None]:
+    lock = f"{key}:lock"
+    deadline = time.monotonic() + LOCK_WAIT
+    while not cache.add(lock, 1, timeout=LOCK_TTL):
+        if time.monotonic() > deadline:
+            raise SessionBusyError(key)
+        time.sleep(0.005)
+    try:
+        yield
+    finally:
+        cache.delete(lock)
+
+
+def _load(game_id: int) -> BufferedSession:
+    buf: BufferedSession | None = cache.get(buffer_key(game_id))
+    if buf is None:
+        game = GameSession.objects.select_related("puzzle").get(pk=game_id)
+        buf = BufferedSession(
+            game_id=game_id,
+            puzzle=SessionPuzzle.from_game(game),
+            state=SessionState.from_game(game, game.puzzle.size**2),
+            user_id=game.user_id,
+        )
+    elif "user_id" not in vars(buf):
+        # Cached before the owner was kept in the entry
+        buf.user_id = GameSession.objects.values_list("user_id", flat=True).get(pk=game_id)
+    return buf
+
+
+@lru_cache(maxsize=1)
+def _redis_client() -> Any | None:
+    """Client for the dirty-session index when the default cache is Redis, else None."""
+    conf = settings.CACHES["default"]
+    if not str(conf["BACKEND"]).endswith("RedisCache"):
+        return None
+    import redis  # import only if needed to avoid optional dep issues
+
+    return redis.Redis.from_url(str(conf["LOCATION"]))
+
+
+_local_dirty: set[int] = set()
+_local_dirty_lock = threading.Lock()
+
+
+def _mark_dirty(game_id: int) -> None:
+    client = _redis_client()
+    if client is not None:
+        client.sadd(_DIRTY_KEY, game_id)
+        return
+    with _local_dirty_lock:
+        _local_dirty.add(game_id)
+
+
+def _mark_clean(game_id: int) -> None:
+    client = _redis_client()
+    if client is not None:
+        client.srem(_DIRTY_KEY, game_id)
+        return
+    with _local_dirty_lock:
+        _local_dirty.discard(game_id)
+
+
+def _dirty_ids() -> list[int]:
+    client = _redis_client()
+    if client is not None:
+        return [int(m) for m in client.smembers(_DIRTY_KEY)]
+    with _local_dirty_lock:
+        return list(_local_dirty)
+
+
+def _write(buf: BufferedSession) -> None:
+    values = buf.state.fields()
+    if buf.time_seconds is not None:
+        values["time_seconds"] = buf.time_seconds
+    with transaction.atomic():
+        GameSession.objects.filter(pk=buf.game_id).update(**values, updated_at=timezone.now())
+        buf.state.journal.save()
+    buf.pending = 0
+    buf.dirty_since = None
+    buf.time_seconds = None
+
+
+def _store(key: str, buf: BufferedSession, *, wrote: bool) -> None:
+    try:
+        cache.set(key, buf, timeout=ENTRY_TTL)
+    except Exception:
+        if wrote:
+            # The old entry lags behind the row just written; never keep it.
+            cache.delete(key)
+        raise
+
+
+@contextmanager
+def open_session(game_id: int) -> Iterator[BufferedSession]:
+    """
+    Lock and load a session's buffered state for modification.
+
+    The caller mutates `state` and calls `record()`; on exit the entry is
+    written back to the cache and flushed to the row if it is due. If the body
+    raises, nothing is stored.
+    """
+    key = buffer_key(game_id)
+    with _locked(key):
+        buf = _load(game_id)
+        yield buf
+        wrote = buf.due()
+        if wrote:
+            _write(buf)
+        _store(key, buf, wrote=wrote)
+        if wrote:
+            _mark_clean(game_id)
+        elif buf.pending:
+            _mark_dirty(game_id)
+
+
+def flush(game_id: int, *, drop: bool = False) -> None:
+    """Write any buffered moves for a session to its row.
+
+    `drop` also discards the cache entry; use it before writing the row by
+    other means so the buffer does not hold a stale copy. No-op when disabled.
+    """
+    if enabled():
+        _flush(game_id, drop=drop)
+
+
+def _flush(game_id: int, *, drop: bool) -> None:
+    key = buffer_key(game_id)
+    with _locked(key):
+        buf: BufferedSession | None = cache.get(key)
+        if buf is None:
+            # Evicted (its unflushed moves are gone) or never buffered.
+            _mark_clean(game_id)
+            return
+        wrote = buf.pending > 0
+        if wrote:
+            _write(buf)
+        if drop:
+            cache.delete(key)
+        else:
+            _store(key, buf, wrote=wrote)
+        _mark_clean(game_id)
+
+
+def flush_dirty() -> int:
+    """Flush every session with buffered moves; returns how many were flushed.
+
+    Runs even if write-behind has since been disabled, so nothing is stranded.
+    """
+    ids = _dirty_ids()
+    for game_id in ids:
+        _flush(game_id, drop=False)
+    return len(ids)
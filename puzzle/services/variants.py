@@ -0,0 +1,89 @@
+"""
+Symmetry variants: new templates derived from stored ones without generating.
+
+Rating a hard puzzle costs far more than transforming one, and the rater
+gives every transform of a puzzle the same rating (see engines/transform.py),
+so a variant copies its parent's metric and label and remaps its trace. A 9×9
+template has about 1.2 billion variants; players cannot tell them apart from
+fresh puzzles, though they are the same puzzle in disguise: a variant
+carries its parent's canonical_hash, and de-duplication only ever inserts
+originals.
+"""
+
+from __future__ import annotations
+
+import random
+
+from django.db import transaction
+
+from puzzle.models import PuzzleTemplate
+from puzzle.services.bulk import DEFAULT_CHUNK_SIZE, LOOKUP_BATCH
+from puzzle.services.engines import GridSpec
+from puzzle.services.engines.transform import random_transform
+
+
+def make_variant(parent: PuzzleTemplate, *, transform_seed: int) -> PuzzleTemplate:
+    """Build (unsaved) the variant of `parent` for `transform_seed`."""
+    spec = GridSpec(parent.size, parent.box_h, parent.box_w)
+    t = random_transform(spec, transform_seed)
+    trace = parent.solve_trace
+    return PuzzleTemplate(
+        size=parent.size,
+        box_h=parent.box_h,
+        box_w=parent.box_w,
+        givens=t.apply(parent.givens),
+        solution=t.apply(parent.solution),
+        difficulty_metric=parent.difficulty_metric,
+        difficulty_label=parent.difficulty_label,
+        source=parent.source,
+        solve_trace=None if trace is None else t.apply_trace(bytes(trace)),
+        canonical_hash=parent.canonical_hash,
+        parent=parent,
+        transform_seed=transform_seed,
+    )
+
+
+def derive_variants(
+    *,
+    size: int,
+    difficulty: str,
+    count: int,
+    seed: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Store `count` variants of original templates in a (size, difficulty) bucket.
+
+    Parents are taken in `random_key` order from a random starting point,
+    cycling over them when the bucket has fewer than `count` originals.
+    Returns the number of rows inserted; 0 when the bucket has no originals.
+    """
+    rng = random.Random(seed)
+    originals = PuzzleTemplate.objects.filter(
+        size=size, difficulty_label=difficulty, parent__isnull=True
+    ).order_by("random_key")
+    r = rng.random()
+    parents = list(originals.filter(random_key__gte=r)[:count])
+    if len(parents) < count:
+        parents += list(originals.filter(random_key__lt=r)[: count - len(parents)])
+    if not parents:
+        return 0
+    variants = [
+        make_variant(parents[i % len(parents)], transform_seed=rng.getrandbits(63))
+        for i in range(count)
+    ]
+    created = 0
+    # Parent ids and seeds of a chunk are both looked up, hence half a batch.
+    step = max(1, min(chunk_size, LOOKUP_BATCH // 2))
+    for start in range(0, len(variants), step):
+        chunk = variants[start : start + step]
+        rows = PuzzleTemplate.objects.filter(
+            parent__in={v.parent_id for v in chunk},
+            transform_seed__in=[v.transform_seed for v in chunk],
+        )
+        with transaction.atomic():
+            # A repeated (parent, seed) pair is vanishingly rare and simply
+            # skipped, so count what the insert actually added.
+            before = rows.count()
+            PuzzleTemplate.objects.bulk_create(chunk, ignore_conflicts=True)
+            created += rows.count() - before
+    return created
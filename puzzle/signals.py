@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from puzzle.models import DailyChallenge, PuzzleTemplate
+from puzzle.services.cache import invalidate_daily, invalidate_template
+from puzzle.services.pool import evict_template
+
+
+@receiver(post_save, sender=PuzzleTemplate)
+@receiver(post_delete, sender=PuzzleTemplate)
+def _template_changed(
+    sender: type[PuzzleTemplate], instance: PuzzleTemplate, **kwargs: Any
+) -> None:
+    if kwargs.get("created"):
+        # Nothing can be cached for a row that did not exist yet.
+        return
+    invalidate_template(instance.pk)
+    evict_template(instance.pk, size=instance.size)
+
+
+@receiver(post_save, sender=DailyChallenge)
+@receiver(post_delete, sender=DailyChallenge)
+def _daily_changed(sender: type[DailyChallenge], instance: DailyChallenge, **kwargs: Any) -> None:
+    invalidate_daily(instance.date)
@@ -1,30 +1,59 @@
 from __future__ import annotations
 
 import datetime as dt
+from typing import Any
 
 from celery import shared_task
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.db.models import Count
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
-from puzzle.models import PuzzleTemplate
+from puzzle.models import AnalyticsEvent, GameSession, PuzzleTemplate
 from puzzle.services.daily import create_daily_challenge
-from puzzle.services.generation import generate_template
+from puzzle.services.generation import generate_templates
+from puzzle.services.partitions import apply_retention
+from puzzle.services.pool import refill_pool
+from puzzle.services.rollups import update_completion_rollups as _update_rollups
+from puzzle.services.selection import reshuffle_random_keys
+from puzzle.services.session_buffer import flush_dirty
+from puzzle.services.variants import derive_variants
 
 
 @shared_task
-def refill_puzzle_queue(*, size: int = 9, difficulty: str = "medium", min_count: int = 20) -> int:
+def refill_puzzle_queue(
+    *, size: int = 9, difficulty: str = "medium", min_count: int = 20, workers: int = 1
+) -> int:
     """Ensure there are at least `min_count` templates for size/difficulty.
 
-    Returns the number of templates created.
+    `workers > 1` generates across a process pool; this needs a worker that may
+    fork children (e.g. `--pool=solo` or threads), otherwise it runs serially.
+    Buckets in PUZZLE_VARIANT_DIFFICULTIES are filled with symmetry variants
+    of their stored templates, falling back to generation only when there is
+    nothing to derive from. Also re-draws PUZZLE_RANDOM_KEY_RESHUFFLE of the
+    bucket's random keys and tops up its pre-serialized Redis pool when it is
+    enabled. Returns the number of templates created.
     """
     existing = (
         PuzzleTemplate.objects.filter(size=size, difficulty_label=difficulty)
         .aggregate(c=Count("id"))
         .get("c", 0)
     )
+    missing = max(0, min_count - existing)
     created = 0
-    while existing + created < min_count:
-        generate_template(size=size, box_h=3, box_w=3, difficulty=difficulty)
-        created += 1
+    if missing and difficulty in settings.PUZZLE_VARIANT_DIFFICULTIES:
+        created = derive_variants(size=size, difficulty=difficulty, count=missing)
+        missing -= created
+    if missing:
+        res = generate_templates(
+            size=size, box_h=3, box_w=3, difficulty=difficulty, count=missing, workers=workers
+        )
+        created += res.created
+    reshuffle_random_keys(
+        size=size, difficulty=difficulty, share=settings.PUZZLE_RANDOM_KEY_RESHUFFLE
+    )
+    refill_pool(size=size, difficulty=difficulty)
     return created
 
 
@@ -44,3 +73,55 @@ def precreate_daily_challenges(
         if res.created:
             created += 1
     return created
+
+
+@shared_task
+def flush_session_buffers() -> int:
+    """Write buffered (write-behind) session moves to their rows.
+
+    Returns the number of sessions flushed.
+    """
+    return flush_dirty()
+
+
+@shared_task
+def ingest_analytics_events(events: list[dict[str, Any]]) -> int:
+    """Insert a batch of buffered analytics events with one `bulk_create`.
+
+    References to games or users deleted since the event was emitted are
+    nulled, matching the SET_NULL foreign keys. Returns the number inserted.
+    """
+    game_ids = {e["game_id"] for e in events if e.get("game_id") is not None}
+    user_ids = {e["user_id"] for e in events if e.get("user_id") is not None}
+    games = set(GameSession.objects.filter(pk__in=game_ids).values_list("pk", flat=True))
+    users = set(get_user_model().objects.filter(pk__in=user_ids).values_list("pk", flat=True))
+    rows = [
+        AnalyticsEvent(
+            name=e["name"],
+            user_id=e.get("user_id") if e.get("user_id") in users else None,
+            game_id=e.get("game_id") if e.get("game_id") in games else None,
+            payload=e.get("payload") or {},
+            created_at=parse_datetime(e["created_at"]) or timezone.now(),
+        )
+        for e in events
+    ]
+    AnalyticsEvent.objects.bulk_create(rows)
+    return len(rows)
+
+
+@shared_task
+def maintain_analytics_partitions() -> int:
+    """Create upcoming AnalyticsEvent partitions and expire old data.
+
+    Returns partitions dropped (Postgres) or rows deleted (other databases).
+    """
+    return apply_retention()
+
+
+@shared_task
+def update_completion_rollups() -> int:
+    """Fold games completed since the last run into `CompletionRollup`.
+
+    Returns the number of games processed.
+    """
+    return _update_rollups()
@@ -1,55 +1,100 @@
 from __future__ import annotations
 
+import json
+from collections.abc import Callable
 from typing import Any
 
-from django.utils.dateparse import parse_date
 from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.dateparse import parse_date
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action, api_view
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from puzzle.models import DailyChallenge, GameSession, PuzzleTemplate
-from puzzle.services.gameplay import start_game, validate_board
+from puzzle.models import GameSession, PuzzleTemplate
+from puzzle.services import session_buffer
+from puzzle.services.cache import get_daily_payload, get_template_payload, transformed_payload
+from puzzle.services.codec import SessionState, read_board
+from puzzle.services.engines.transform import new_transform_seed
+from puzzle.services.gameplay import (
+    Move,
+    NotSessionOwnerError,
+    OwnerCheck,
+    apply_moves,
+    redo_move,
+    start_game,
+    undo_move,
+    validate_board,
+)
 from puzzle.services.hints import get_next_hint
-from .serializers import GameCreateSerializer, GameUpdateSerializer, PuzzleListQuerySerializer
+from puzzle.services.journal import JournalEntry
+from puzzle.services.pool import fetch_pooled
+from puzzle.services.selection import pick_random_template_id
+
+from .serializers import (
+    GameCreateSerializer,
+    GameStateSerializer,
+    GameUpdateSerializer,
+    MoveBatchSerializer,
+    PuzzleListQuerySerializer,
+    PuzzleRetrieveQuerySerializer,
+)
 
 
 class PuzzleTemplateViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = PuzzleTemplate.objects.all()
     http_method_names = ["get"]
 
-    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response | HttpResponse:
         q = PuzzleListQuerySerializer(data=request.query_params)
         q.is_valid(raise_exception=True)
         size = int(q.validated_data["size"])
         difficulty = str(q.validated_data["difficulty"])
-        obj = (
-            PuzzleTemplate.objects.filter(size=size, difficulty_label=difficulty)
-            .order_by("?")
-            .first()
-        )
-        if obj is None:
+        seed = q.validated_data.get("transform_seed")
+        if seed is None and q.validated_data["transform"]:
+            seed = new_transform_seed()
+        blob = fetch_pooled(size=size, difficulty=difficulty)
+        if blob is not None:
+            if seed is None:
+                return HttpResponse(blob, content_type="application/json")
+            return Response(transformed_payload(json.loads(blob), seed))
+        template_id = pick_random_template_id(size=size, difficulty=difficulty)
+        payload = None if template_id is None else get_template_payload(template_id)
+        if payload is None:
             return Response({"detail": "No puzzle available"}, status=status.HTTP_404_NOT_FOUND)
-        return Response(
-            {
-                "id": obj.id,
-                "size": obj.size,
-                "box_h": obj.box_h,
-                "box_w": obj.box_w,
-                "givens": obj.givens,
-                "difficulty": obj.difficulty_label,
-            }
-        )
+        return Response(payload if seed is None else transformed_payload(payload, seed))
+
+    def retrieve(self, request: Request, pk: str | None = None) -> Response:
+        """One puzzle by id; `?transform_seed=N` serves its virtual variant for that seed."""
+        assert pk is not None
+        q = PuzzleRetrieveQuerySerializer(data=request.query_params)
+        q.is_valid(raise_exception=True)
+        payload = get_template_payload(int(pk)) if pk.isdigit() else None
+        if payload is None:
+            return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+        seed = q.validated_data.get("transform_seed")
+        return Response(payload if seed is None else transformed_payload(payload, seed))
 
 
 class GameSessionViewSet(viewsets.ViewSet):
     http_method_names = ["get", "post", "put"]
+
     # In strict mode, only authenticated users can create/update/fetch games.
     # Otherwise AllowAny for MVP convenience.
     def get_permissions(self) -> list[permissions.BasePermission]:  # type: ignore[override]
         if settings.SECURITY_STRICT_API:
-            if self.action in {"create", "update", "check", "hint", "retrieve"}:
+            if self.action in {
+                "create",
+                "update",
+                "moves",
+                "undo",
+                "redo",
+                "check",
+                "hint",
+                "retrieve",
+            }:
                 return [permissions.IsAuthenticated()]  # type: ignore[list-item]
         return [permissions.AllowAny()]  # type: ignore[list-item]
 
@@ -57,55 +102,140 @@ class GameSessionViewSet(viewsets.ViewSet):
         ser = GameCreateSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
         template_id = int(ser.validated_data["template_id"])  # raises KeyError if missing
+        transform_seed = ser.validated_data.get("transform_seed")
         user_id = request.user.id if request.user.is_authenticated else None
-        game = start_game(user_id=user_id, template_id=template_id)
-        return Response({"id": game.id, "status": game.status, "board_state": game.board_state})
+        game = start_game(user_id=user_id, template_id=template_id, transform_seed=transform_seed)
+        return Response(
+            {
+                "id": game.id,
+                "status": game.status,
+                "board_state": read_board(game),
+                "transform_seed": game.transform_seed,
+            }
+        )
 
     def retrieve(self, request: Request, pk: str | None = None) -> Response:
         assert pk is not None
-        game = GameSession.objects.get(pk=int(pk))
+        session_buffer.flush(int(pk))
+        game = GameSession.objects.select_related("puzzle").get(pk=int(pk))
         if settings.SECURITY_STRICT_API:
             # Enforce ownership when strict
             if game.user_id is not None:
                 if not request.user.is_authenticated or request.user.id != game.user_id:
                     return Response({"detail": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
-        return Response(
-            {
-                "id": game.id,
-                "status": game.status,
-                "board_state": game.board_state,
-                "pencil_marks": game.pencil_marks,
-                "puzzle_id": game.puzzle_id,
-            }
-        )
+        return Response(GameStateSerializer(game).data)
 
     def update(self, request: Request, pk: str | None = None) -> Response:
         assert pk is not None
+        # The row is written directly below; fold in and drop any buffered moves
+        session_buffer.flush(int(pk), drop=True)
         game = GameSession.objects.select_related("puzzle").get(pk=int(pk))
         if settings.SECURITY_STRICT_API:
             if game.user_id is not None:
                 if not request.user.is_authenticated or request.user.id != game.user_id:
                     return Response({"detail": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
 
-        ser = GameUpdateSerializer(data=request.data, partial=True, context={"size": game.puzzle.size})
+        ser = GameUpdateSerializer(
+            data=request.data, partial=True, context={"size": game.puzzle.size}
+        )
         ser.is_valid(raise_exception=True)
 
         data = ser.validated_data
         update_fields: list[str] = []
-        if "board_state" in data:
-            game.board_state = data["board_state"]
-            update_fields.append("board_state")
-        if "pencil_marks" in data:
-            game.pencil_marks = data["pencil_marks"]
-            update_fields.append("pencil_marks")
+        state: SessionState | None = None
+        if "board_state" in data or "pencil_marks" in data:
+            cells = game.puzzle.size**2
+            state = SessionState.from_game(game, cells)
+            fresh = SessionState.from_strings(
+                data.get("board_state", "0" * cells), data.get("pencil_marks"), cells
+            )
+            if "board_state" in data:
+                state.board = fresh.board
+            if "pencil_marks" in data:
+                state.marks = fresh.marks
+            # Undo history does not span a wholesale replacement
+            state.journal.reset(state)
+            update_fields += state.store(game)
         if "time_seconds" in data:
             game.time_seconds = int(data["time_seconds"])  # still trusting client time
             update_fields.append("time_seconds")
         if update_fields:
             update_fields.append("updated_at")
-            game.save(update_fields=update_fields)
+            with transaction.atomic():
+                game.save(update_fields=update_fields)
+                if state is not None:
+                    state.journal.save()
         return Response({"ok": True})
 
+    def _owner_check(self, request: Request) -> OwnerCheck | None:
+        # Checked by the edit itself against the owner it loads (from the
+        # write-behind buffer when enabled), so moves need no extra read.
+        if not settings.SECURITY_STRICT_API:
+            return None
+        user_id = request.user.id if request.user.is_authenticated else None
+        return lambda owner: owner is None or owner == user_id
+
+    @action(detail=True, methods=["post"], url_path="moves")
+    def moves(self, request: Request, pk: str | None = None) -> Response:
+        """Apply a batch of cell deltas; cheaper than PUTting the whole board."""
+        assert pk is not None
+        ser = MoveBatchSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        data = ser.validated_data
+        moves = [Move(m["cell_index"], m["value"], m["mode"]) for m in data["moves"]]
+        try:
+            res = apply_moves(
+                game_id=int(pk),
+                moves=moves,
+                time_seconds=data.get("time_seconds"),
+                owner_check=self._owner_check(request),
+            )
+        except NotSessionOwnerError:
+            return Response({"detail": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except session_buffer.SessionBusyError:
+            return Response({"detail": "Session busy"}, status=status.HTTP_409_CONFLICT)
+        return Response(
+            {
+                "ok": True,
+                "applied": len(moves),
+                "conflicts": list(res.conflicts),
+                "cleared": list(res.cleared),
+                "mistakes": res.game.mistakes_count,
+            }
+        )
+
+    def _journal_step(
+        self, request: Request, pk: str | None, step: Callable[..., JournalEntry | None]
+    ) -> Response:
+        assert pk is not None
+        try:
+            entry = step(game_id=int(pk), owner_check=self._owner_check(request))
+        except NotSessionOwnerError:
+            return Response({"detail": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
+        except session_buffer.SessionBusyError:
+            return Response({"detail": "Session busy"}, status=status.HTTP_409_CONFLICT)
+        if entry is None:
+            return Response({}, status=status.HTTP_204_NO_CONTENT)
+        value = entry.before if step is undo_move else entry.after
+        body: dict[str, Any] = {"cell_index": entry.cell_index, "mode": entry.mode}
+        if entry.mode == "number":
+            body["value"] = value
+        else:
+            body["pencil_marks"] = [d + 1 for d in range(16) if value >> d & 1]
+        return Response(body)
+
+    @action(detail=True, methods=["post"], url_path="undo")
+    def undo(self, request: Request, pk: str | None = None) -> Response:
+        """Revert the last move; responds with the cell's restored contents."""
+        return self._journal_step(request, pk, undo_move)
+
+    @action(detail=True, methods=["post"], url_path="redo")
+    def redo(self, request: Request, pk: str | None = None) -> Response:
+        """Re-apply the last undone move; responds with the cell's new contents."""
+        return self._journal_step(request, pk, redo_move)
+
     @action(detail=True, methods=["post"], url_path="check")
     def check(self, request: Request, pk: str | None = None) -> Response:
         assert pk is not None
@@ -123,6 +253,8 @@ class GameSessionViewSet(viewsets.ViewSet):
                 "cell_index": hint.cell_index,
                 "value": hint.value,
                 "technique": hint.technique,
+                "eliminations": [list(e) for e in hint.eliminations],
+                "support": list(hint.support),
             }
         )
 
@@ -132,20 +264,7 @@ def daily_challenge_view(request: Request, date: str) -> Response:
     dt = parse_date(date)
     if dt is None:
         return Response({"detail": "Invalid date"}, status=status.HTTP_400_BAD_REQUEST)
-    dc = DailyChallenge.objects.filter(date=dt).select_related("puzzle").first()
-    if dc is None:
+    payload = get_daily_payload(dt)
+    if payload is None:
         return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
-    p = dc.puzzle
-    return Response(
-        {
-            "date": str(dc.date),
-            "puzzle": {
-                "id": p.id,
-                "size": p.size,
-                "box_h": p.box_h,
-                "box_w": p.box_w,
-                "givens": p.givens,
-                "difficulty": p.difficulty_label,
-            },
-        }
-    )
+    return Response(payload)
@@ -125,6 +125,18 @@ try:
             "schedule": crontab(minute=0, hour=1),
             "kwargs": {"days_ahead": 7, "size": 9, "difficulty": "medium"},
         },
+        "maintain-analytics-partitions": {
+            "task": "puzzle.tasks.maintain_analytics_partitions",
+            "schedule": crontab(minute=30, hour=2),
+        },
+        "update-completion-rollups": {
+            "task": "puzzle.tasks.update_completion_rollups",
+            "schedule": crontab(minute="*/5"),
+        },
+        "flush-session-buffers": {
+            "task": "puzzle.tasks.flush_session_buffers",
+            "schedule": crontab(),  # every minute
+        },
     }
 except Exception:  # pragma: no cover - if celery not importable in some contexts
     CELERY_BEAT_SCHEDULE = {}
@@ -133,3 +145,79 @@ except Exception:  # pragma: no cover - if celery not importable in some context
 # - In dev/tests, default False to avoid breaking existing flows
 # - In prod (see prod.py), this should be enabled
 SECURITY_STRICT_API = os.getenv("SECURITY_STRICT_API", "0") == "1"
+
+# Caching: Redis when REDIS_CACHE_URL is set (shared across processes),
+# otherwise a per-process in-memory cache suitable for dev/tests.
+if os.getenv("REDIS_CACHE_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_CACHE_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Puzzle payload cache (see puzzle/services/cache.py)
+# - PUZZLE_CACHE_TTL: seconds payloads live in the shared cache
+# - PUZZLE_LOCAL_CACHE_SIZE: entries in the per-process LRU (0 disables it)
+# - PUZZLE_LOCAL_CACHE_TTL: seconds a local entry may serve before re-checking
+#   the shared cache; bounds staleness in other processes after an admin edit
+PUZZLE_CACHE_TTL = int(os.getenv("PUZZLE_CACHE_TTL", str(24 * 60 * 60)))
+PUZZLE_LOCAL_CACHE_SIZE = int(os.getenv("PUZZLE_LOCAL_CACHE_SIZE", "1024"))
+PUZZLE_LOCAL_CACHE_TTL = int(os.getenv("PUZZLE_LOCAL_CACHE_TTL", "60"))
+
+# Pre-serialized puzzle pool (see puzzle/services/pool.py); disabled unless a
+# Redis URL is provided. PUZZLE_POOL_TARGET is the per-bucket fill level;
+# each refill also swaps PUZZLE_POOL_ROTATE of it for templates not yet pooled.
+PUZZLE_POOL_REDIS_URL = os.getenv("PUZZLE_POOL_REDIS_URL", "")
+PUZZLE_POOL_TARGET = int(os.getenv("PUZZLE_POOL_TARGET", "200"))
+PUZZLE_POOL_ROTATE = float(os.getenv("PUZZLE_POOL_ROTATE", "0.25"))
+
+# Share of a bucket's random_key values refill_puzzle_queue re-draws per run,
+# so random selection evens out over time (see puzzle/services/selection.py).
+PUZZLE_RANDOM_KEY_RESHUFFLE = float(os.getenv("PUZZLE_RANDOM_KEY_RESHUFFLE", "0.1"))
+
+# Store GameSession board/pencil marks in the compact binary encoding
+# (see puzzle/services/codec.py). Rows in either format stay readable; they
+# are rewritten in the configured format on their next save.
+PUZZLE_COMPACT_SESSIONS = os.getenv("PUZZLE_COMPACT_SESSIONS", "0") == "1"
+
+# Write-behind session state (see puzzle/services/session_buffer.py for the
+# durability trade-off). Needs a shared cache (REDIS_CACHE_URL) when more than
+# one web process serves games. Buffered moves reach the row after
+# PUZZLE_SESSION_FLUSH_MOVES moves or PUZZLE_SESSION_FLUSH_SECONDS of play.
+PUZZLE_SESSION_WRITE_BEHIND = os.getenv("PUZZLE_SESSION_WRITE_BEHIND", "0") == "1"
+PUZZLE_SESSION_FLUSH_MOVES = int(os.getenv("PUZZLE_SESSION_FLUSH_MOVES", "50"))
+PUZZLE_SESSION_FLUSH_SECONDS = int(os.getenv("PUZZLE_SESSION_FLUSH_SECONDS", "30"))
+
+# Moves kept per session for undo/redo (one GameMove row each); older moves are
+# folded into the journal's base snapshot (see puzzle/services/journal.py).
+PUZZLE_JOURNAL_LIMIT = int(os.getenv("PUZZLE_JOURNAL_LIMIT", "500"))
+
+# Analytics events are buffered per process; a background thread hands them in
+# batches to a Celery task that inserts them (see puzzle/services/events.py),
+# when a batch is full or every FLUSH_SECONDS. When the buffer is full the
+# oldest events are dropped.
+PUZZLE_ANALYTICS_BUFFER_SIZE = int(os.getenv("PUZZLE_ANALYTICS_BUFFER_SIZE", "10000"))
+PUZZLE_ANALYTICS_BATCH_SIZE = int(os.getenv("PUZZLE_ANALYTICS_BATCH_SIZE", "200"))
+PUZZLE_ANALYTICS_FLUSH_SECONDS = float(os.getenv("PUZZLE_ANALYTICS_FLUSH_SECONDS", "5"))
+
+# Analytics retention (see puzzle/services/partitions.py): whole months older
+# than the window are dropped; partitions are created this many months ahead.
+PUZZLE_ANALYTICS_RETENTION_MONTHS = int(os.getenv("PUZZLE_ANALYTICS_RETENTION_MONTHS", "13"))
+PUZZLE_ANALYTICS_PARTITIONS_AHEAD = int(os.getenv("PUZZLE_ANALYTICS_PARTITIONS_AHEAD", "2"))
+
+# Completion-time rollups (see puzzle/services/rollups.py) skip completions
+# younger than this, so rows whose transaction has not committed are not missed.
+PUZZLE_ROLLUP_SETTLE_SECONDS = int(os.getenv("PUZZLE_ROLLUP_SETTLE_SECONDS", "60"))
+
+# Buckets that refill_puzzle_queue tops up with symmetry variants of stored
+# templates instead of generating (see puzzle/services/variants.py).
+PUZZLE_VARIANT_DIFFICULTIES = [
+    d for d in os.getenv("PUZZLE_VARIANT_DIFFICULTIES", "expert").split(",") if d
+]
@@ -0,0 +1,44 @@
+from collections.abc import Callable, Iterator
+from typing import Any
+
+import pytest
+
+from puzzle.models import PuzzleTemplate
+from puzzle.services import events
+
+# (box_h, box_w) per supported size
+BOXES = {4: (2, 2), 6: (2, 3), 9: (3, 3)}
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _no_analytics_shipper() -> Iterator[None]:
+    # A shipper thread would ingest on its own connection mid-test; tests flush explicitly.
+    events.emitter.background = False
+    yield
+    events.emitter.background = True
+
+
+@pytest.fixture
+def make_template(db: Any) -> Callable[..., PuzzleTemplate]:
+    """Create templates; unspecified fields default to an empty 9x9 medium board of 1s.
+
+    The defaults are not a valid puzzle, which is enough for tests that only
+    store, select or serve templates.
+    """
+
+    def make(**fields: Any) -> PuzzleTemplate:
+        size = fields.get("size", 9)
+        box_h, box_w = BOXES[size]
+        defaults: dict[str, Any] = {
+            "size": size,
+            "box_h": box_h,
+            "box_w": box_w,
+            "givens": "0" * size * size,
+            "solution": "1" * size * size,
+            "difficulty_metric": 0.5,
+            "difficulty_label": "medium",
+            "source": "test",
+        }
+        return PuzzleTemplate.objects.create(**(defaults | fields))
+
+    return make
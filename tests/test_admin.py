@@ -1,9 +1,17 @@
+import json
 from typing import Any
 
 from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import StreamingHttpResponse
 from django.test import Client
 
 from puzzle.models import PuzzleTemplate
+from puzzle.services.engines import DokusanEngine, GridSpec
+from puzzle.services.engines.canonical import canonical_hash
+from puzzle.services.engines.trace import trace_grid
+from puzzle.services.generation import generate_template
 
 
 def login_staff(client: Client) -> None:
@@ -11,6 +19,10 @@ def login_staff(client: Client) -> None:
     client.login(username="admin", password="pass")
 
 
+def _messages(resp: Any) -> list[str]:
+    return [str(m) for m in get_messages(resp.wsgi_request)]
+
+
 def test_admin_validate_and_export(db: Any) -> None:
     client = Client()
     login_staff(client)
@@ -37,6 +49,19 @@ def test_admin_validate_and_export(db: Any) -> None:
     )
     assert resp.status_code == 200
     assert resp["Content-Type"] == "application/json"
+    assert isinstance(resp, StreamingHttpResponse)
+    exported = json.loads(b"".join(resp.streaming_content))
+    assert [item["id"] for item in exported] == [t.id]
+    assert exported[0]["givens"] == t.givens
+
+    resp = client.post(
+        "/admin/puzzle/puzzletemplate/",
+        {"action": "export_selected_ndjson", "_selected_action": [str(t.id)]},
+    )
+    assert resp["Content-Type"] == "application/x-ndjson"
+    assert isinstance(resp, StreamingHttpResponse)
+    lines = b"".join(resp.streaming_content).decode().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [t.id]
 
 
 def test_admin_queue_import_and_summary(db: Any) -> None:
@@ -47,23 +72,64 @@ def test_admin_queue_import_and_summary(db: Any) -> None:
     resp = client.get("/admin/puzzle/puzzletemplate/queue/")
     assert resp.status_code == 200
 
-    # POST import JSON
+    # POST import JSON; puzzles are validated, so the empty grid is rejected
     payload = [
         {
             "size": 4,
             "box_h": 2,
             "box_w": 2,
-            "givens": "0" * 16,
-            "solution": "1" * 16,
+            "givens": "4300003401033001",
+            "solution": "4312123421433421",
             "difficulty_metric": 0.2,
             "difficulty_label": "easy",
             "source": "import-test",
-        }
+        },
+        {"size": 4, "box_h": 2, "box_w": 2, "givens": "0" * 16, "solution": "1" * 16},
     ]
     resp = client.post(
         "/admin/puzzle/puzzletemplate/queue/",
-        {"json": __import__("json").dumps(payload)},
+        {"json": json.dumps(payload)},
         follow=True,
     )
     assert resp.status_code == 200
-    assert PuzzleTemplate.objects.filter(size=4, difficulty_label="easy").exists()
+    assert PuzzleTemplate.objects.filter(size=4, difficulty_label="easy").count() == 1
+    assert "Imported 1 puzzle(s), rejected 1, duplicates 0" in _messages(resp)
+
+    # Upload a text-format file; the last board relabels the imported puzzle
+    upload = SimpleUploadedFile(
+        "dump.txt", b"43..\n....\n" + b"4300003401033001\n".translate(bytes.maketrans(b"12", b"21"))
+    )
+    resp = client.post("/admin/puzzle/puzzletemplate/queue/", {"file": upload}, follow=True)
+    assert "Imported 0 puzzle(s), rejected 2, duplicates 1" in _messages(resp)
+    assert not PuzzleTemplate.objects.filter(source="import").exists()
+
+
+def test_admin_edit_refreshes_trace_and_hash(db: Any) -> None:
+    client = Client()
+    login_staff(client)
+    t = generate_template(size=9, box_h=3, box_w=3, difficulty="easy", seed=1).template
+    other = DokusanEngine().generate(spec=GridSpec(9, 3, 3), difficulty="easy", seed=2)
+    form = {
+        "size": 9,
+        "box_h": 3,
+        "box_w": 3,
+        "givens": other[0],
+        "solution": other[1],
+        "difficulty_metric": t.difficulty_metric,
+        "difficulty_label": t.difficulty_label,
+        "source": t.source,
+        "random_key": t.random_key,
+    }
+    resp = client.post(f"/admin/puzzle/puzzletemplate/{t.id}/change/", form)
+    assert resp.status_code == 302
+    t.refresh_from_db()
+    assert t.solve_trace is not None
+    assert bytes(t.solve_trace) == trace_grid(GridSpec(9, 3, 3), other[0])
+    assert t.canonical_hash == canonical_hash(GridSpec(9, 3, 3), other[0], other[1])
+
+    # A solution that does not match the givens is refused
+    resp = client.post(
+        f"/admin/puzzle/puzzletemplate/{t.id}/change/", {**form, "solution": other[1][::-1]}
+    )
+    assert resp.status_code == 200
+    assert "solution does not match" in resp.content.decode()
@@ -1,3 +1,4 @@
+from collections.abc import Callable
 from typing import Any
 
 from django.test import Client
@@ -74,3 +75,56 @@ def test_api_daily_endpoint(db: Any) -> None:
     data = resp.json()
     assert data["date"] == "2025-09-17"
     assert data["puzzle"]["id"] == t.id
+
+
+def test_api_move_batch(make_template: Callable[..., PuzzleTemplate]) -> None:
+    client = Client()
+    t = make_template(givens="1" + "0" * 80)
+    game_id = client.post("/api/games/", {"template_id": t.id}).json()["id"]
+    url = f"/api/games/{game_id}/moves/"
+
+    resp = client.post(
+        url,
+        data={
+            "moves": [
+                {"cell_index": 1, "value": 1},
+                {"cell_index": 2, "value": 4, "mode": "pencil"},
+                {"cell_index": 3, "value": 7},
+                {"cell_index": 3, "value": 0},
+            ],
+            "time_seconds": 9,
+        },
+        content_type="application/json",
+    )
+    assert resp.status_code == 200
+    assert resp.json()["applied"] == 4
+    assert (resp.json()["conflicts"], resp.json()["cleared"]) == ([0, 1], [])
+    state = client.get(f"/api/games/{game_id}/").json()
+    assert state["board_state"][:4] == "1100"
+    assert state["pencil_marks"] == {"2": [4]}
+
+    # A bad move rejects the whole batch
+    resp = client.post(
+        url,
+        data={"moves": [{"cell_index": 5, "value": 2}, {"cell_index": 0, "value": 2}]},
+        content_type="application/json",
+    )
+    assert resp.status_code == 400
+    assert client.get(f"/api/games/{game_id}/").json()["board_state"][5] == "0"
+
+
+def test_api_update_rejects_out_of_range_cells(
+    make_template: Callable[..., PuzzleTemplate],
+) -> None:
+    client = Client()
+    t = make_template()
+    game_id = client.post("/api/games/", {"template_id": t.id}).json()["id"]
+    for board in ("x" * 81, "a" * 81):  # not a digit; a hex digit but above 9
+        resp = client.put(
+            f"/api/games/{game_id}/",
+            data={"board_state": board},
+            content_type="application/json",
+        )
+        assert resp.status_code == 400
+        assert "board_state" in resp.json()
+    assert client.get(f"/api/games/{game_id}/").json()["board_state"] == "0" * 81
@@ -0,0 +1,66 @@
+import datetime as dt
+from collections.abc import Callable
+from typing import Any
+
+from django.test import Client
+
+from puzzle.models import DailyChallenge, PuzzleTemplate
+from puzzle.services.cache import (
+    LocalLRU,
+    get_daily_payload,
+    get_template_payload,
+    local_cache,
+)
+
+
+def test_local_lru_evicts_oldest_and_expires() -> None:
+    lru = LocalLRU(maxsize=2, ttl=60)
+    lru.set("a", {"v": 1})
+    lru.set("b", {"v": 2})
+    assert lru.get("a") == {"v": 1}
+    lru.set("c", {"v": 3})
+    assert lru.get("b") is None
+    assert lru.get("a") == {"v": 1}
+
+    expired = LocalLRU(maxsize=2, ttl=-1)
+    expired.set("a", {"v": 1})
+    assert expired.get("a") is None
+
+
+def test_template_payload_is_cached_and_invalidated_on_edit(
+    django_assert_num_queries: Any, make_template: Callable[..., PuzzleTemplate]
+) -> None:
+    t = make_template()
+    assert get_template_payload(t.id)["givens"] == "0" * 81  # type: ignore[index]
+    with django_assert_num_queries(0):
+        assert get_template_payload(t.id)["id"] == t.id  # type: ignore[index]
+
+    # Shared tier still serves after the local LRU is dropped.
+    local_cache.clear()
+    with django_assert_num_queries(0):
+        get_template_payload(t.id)
+
+    t.givens = "1" + "0" * 80
+    t.save()
+    assert get_template_payload(t.id)["givens"] == "1" + "0" * 80  # type: ignore[index]
+
+    t.delete()
+    assert get_template_payload(t.id) is None
+
+
+def test_daily_payload_cached_and_follows_template_edits(
+    django_assert_num_queries: Any, make_template: Callable[..., PuzzleTemplate]
+) -> None:
+    day = dt.date(2025, 9, 20)
+    assert get_daily_payload(day) is None
+    t = make_template()
+    DailyChallenge.objects.create(date=day, puzzle=t)
+
+    client = Client()
+    assert client.get("/api/daily/2025-09-20").json()["puzzle"]["id"] == t.id
+    with django_assert_num_queries(0):
+        assert client.get("/api/daily/2025-09-20").status_code == 200
+
+    t.difficulty_label = "hard"
+    t.save()
+    assert get_daily_payload(day)["puzzle"]["difficulty"] == "hard"  # type: ignore[index]
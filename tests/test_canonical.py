@@ -0,0 +1,111 @@
+import io
+import random
+import time
+from collections.abc import Callable
+from typing import Any
+
+import pytest
+from django.core.management import call_command
+
+from puzzle.models import PuzzleTemplate
+from puzzle.services.engines import DokusanEngine, GridSpec
+from puzzle.services.engines.canonical import canonical_form, canonical_hash
+from puzzle.services.generation import generate_template, generate_templates
+
+SPECS = [GridSpec(4, 2, 2), GridSpec(6, 2, 3), GridSpec(9, 3, 3)]
+
+
+def _random_transform(spec: GridSpec, rng: random.Random) -> Any:
+    n, bh, bw = spec.size, spec.box_h, spec.box_w
+    transpose = bh == bw and rng.random() < 0.5
+    bands, stacks = list(range(n // bh)), list(range(n // bw))
+    rng.shuffle(bands)
+    rng.shuffle(stacks)
+    rows = [b * bh + i for b in bands for i in rng.sample(range(bh), bh)]
+    cols = [s * bw + i for s in stacks for i in rng.sample(range(bw), bw)]
+    digits = rng.sample(range(1, n + 1), n)
+
+    def apply(grid: str) -> str:
+        g = [grid[r * n : r * n + n] for r in range(n)]
+        if transpose:
+            g = ["".join(g[c][r] for c in range(n)) for r in range(n)]
+        return "".join(
+            str(digits[int(g[r][c]) - 1]) if g[r][c] != "0" else "0" for r in rows for c in cols
+        )
+
+    return apply
+
+
+@pytest.mark.parametrize("spec", SPECS, ids=lambda s: f"{s.size}x{s.size}")
+def test_canonical_form_is_invariant_and_separating(spec: GridSpec) -> None:
+    engine, rng = DokusanEngine(), random.Random(0)
+    forms = set()
+    for seed in range(12):
+        givens, solution, _ = engine.generate(spec=spec, difficulty="medium", seed=seed)
+        form = canonical_form(spec, givens, solution)
+        for _ in range(4):
+            apply = _random_transform(spec, rng)
+            assert canonical_form(spec, apply(givens), apply(solution)) == form
+        forms.add(form)
+    # Generated 6x6/9x9 puzzles are practically never equivalent.
+    assert len(forms) == 12 or spec.size == 4
+
+
+@pytest.mark.parametrize("spec", SPECS, ids=lambda s: f"{s.size}x{s.size}")
+def test_canonical_form_on_highly_symmetric_grid(spec: GridSpec) -> None:
+    # The pattern grid has the most automorphisms; the givens pick between them.
+    n, bh, bw = spec.size, spec.box_h, spec.box_w
+    solution = "".join(
+        str((bw * (r % bh) + r // bh + c) % n + 1) for r in range(n) for c in range(n)
+    )
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for _ in range(5):
+        givens = "".join(v if rng.random() < 0.4 else "0" for v in solution)
+        form = canonical_form(spec, givens, solution)
+        apply = _random_transform(spec, rng)
+        assert canonical_form(spec, apply(givens), apply(solution)) == form
+    # Generous bound for slow CI; about 3 ms each on 9x9.
+    assert (time.perf_counter() - start) / 10 < 0.02
+
+
+def test_canonical_form_rejects_invalid_solution() -> None:
+    spec = GridSpec(4, 2, 2)
+    with pytest.raises(ValueError):
+        canonical_form(spec, "0" * 16, "1" * 16)
+    with pytest.raises(ValueError):
+        canonical_form(spec, "0" * 16, "1234" * 4)  # rows valid, columns not
+
+
+def test_canonical_hash_speed_9x9() -> None:
+    spec, engine = GridSpec(9, 3, 3), DokusanEngine()
+    puzzles = [engine.generate(spec=spec, difficulty="hard", seed=s)[:2] for s in range(20)]
+    start = time.perf_counter()
+    for givens, solution in puzzles:
+        canonical_hash(spec, givens, solution)
+    # Generous bound for slow CI; typically under 1 ms each.
+    assert (time.perf_counter() - start) / len(puzzles) < 0.02
+
+
+def test_generation_skips_equivalent_puzzles(db: Any) -> None:
+    first = generate_template(size=9, box_h=3, box_w=3, difficulty="easy", seed=42)
+    again = generate_template(size=9, box_h=3, box_w=3, difficulty="easy", seed=42)
+    assert first.created and not again.created
+    assert again.template.pk == first.template.pk
+    assert first.template.canonical_hash
+
+    res = generate_templates(size=9, box_h=3, box_w=3, difficulty="easy", count=3, seed=41)
+    assert res.created == 2  # seed 42 is already stored
+    assert PuzzleTemplate.objects.count() == 3
+
+
+def test_backfill_canonical_command(make_template: Callable[..., PuzzleTemplate]) -> None:
+    givens, solution, _ = DokusanEngine().generate(
+        spec=GridSpec(4, 2, 2), difficulty="easy", seed=1
+    )
+    apply = _random_transform(GridSpec(4, 2, 2), random.Random(3))
+    for g, s in ((givens, solution), (apply(givens), apply(solution)), ("0" * 16, "1" * 16)):
+        make_template(size=4, givens=g, solution=s, difficulty_metric=0.1, difficulty_label="easy")
+    out = io.StringIO()
+    call_command("backfill_canonical", "--chunk-size", "2", stdout=out, stderr=io.StringIO())
+    assert "Hashed: 1, duplicates: 1, failed: 1" in out.getvalue()
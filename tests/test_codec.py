@@ -0,0 +1,79 @@
+from collections.abc import Callable
+
+import pytest
+from django.test import override_settings
+
+from puzzle.models import GameSession, PuzzleTemplate
+from puzzle.services.codec import (
+    SessionState,
+    pack_board,
+    pack_marks,
+    read_board,
+    read_marks,
+    unpack_board,
+    unpack_marks,
+)
+from puzzle.services.gameplay import apply_move, start_game, validate_board
+
+GIVENS = "100" + "0" * 78
+
+
+@pytest.fixture
+def template(make_template: Callable[..., PuzzleTemplate]) -> PuzzleTemplate:
+    return make_template(givens=GIVENS)
+
+
+def test_board_and_marks_round_trip() -> None:
+    board = "123456789" * 9
+    packed = pack_board(board)
+    assert len(packed) == 41
+    assert unpack_board(packed, 81) == board
+
+    marks = {"0": [1, 9], "80": [2, 3, 4]}
+    packed = pack_marks(marks, 81)
+    assert len(packed) == 162
+    assert unpack_marks(packed, 81) == marks
+
+
+def test_session_state_cell_access() -> None:
+    state = SessionState.from_strings("0" * 81, {"5": [4]}, 81)
+    state.set(0, 9)
+    state.set(1, 3)
+    state.set(0, 0)
+    assert state.get(0) == 0 and state.get(1) == 3
+    assert state.get_marks(5) == 1 << 3
+    state.set_marks(5, 0)
+    assert state.marks_dict() == {}
+
+
+@override_settings(PUZZLE_COMPACT_SESSIONS=True)
+def test_compact_sessions_store_bytes(template: PuzzleTemplate) -> None:
+    game = start_game(user_id=None, template_id=template.id)
+    apply_move(game_id=game.id, cell_index=1, value=1, mode="number")
+    apply_move(game_id=game.id, cell_index=2, value=3, mode="pencil")
+
+    game = GameSession.objects.select_related("puzzle").get(pk=game.id)
+    assert game.board_state == "" and game.pencil_marks == {}
+    assert game.board_packed is not None
+    assert len(bytes(game.board_packed)) == 41
+    assert read_board(game) == "110" + "0" * 78
+    assert read_marks(game) == {"2": [3]}
+    assert validate_board(game_id=game.id) is False
+
+
+def test_legacy_rows_convert_on_save(template: PuzzleTemplate) -> None:
+    game = GameSession.objects.create(
+        puzzle=template, board_state={"board": list(GIVENS)}, pencil_marks={"4": [2]}
+    )
+    with override_settings(PUZZLE_COMPACT_SESSIONS=True):
+        apply_move(game_id=game.id, cell_index=4, value=5, mode="pencil")
+    game = GameSession.objects.select_related("puzzle").get(pk=game.id)
+    assert game.board_packed is not None
+    assert read_board(game) == GIVENS
+    assert read_marks(game) == {"4": [2, 5]}
+
+    # Switching the flag off writes JSON again on the next move
+    apply_move(game_id=game.id, cell_index=4, value=0, mode="pencil")
+    game.refresh_from_db()
+    assert game.board_packed is None
+    assert game.board_state == GIVENS and game.pencil_marks == {}
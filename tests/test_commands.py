@@ -1,9 +1,12 @@
 import io
+import json
+from collections.abc import Callable
 from typing import Any
 
 from django.core.management import call_command
 
 from puzzle.models import PuzzleTemplate
+from puzzle.services.importer import import_puzzles
 
 
 def test_seed_and_clear_commands(db: Any) -> None:
@@ -27,3 +30,78 @@ def test_seed_and_clear_commands(db: Any) -> None:
     out = io.StringIO()
     call_command("clear_puzzles", stdout=out)
     assert PuzzleTemplate.objects.count() == 0
+
+
+def test_backfill_traces_command(make_template: Callable[..., PuzzleTemplate]) -> None:
+    call_command("seed_puzzles", "--count", "2", "--seed", "1", stdout=io.StringIO())
+    PuzzleTemplate.objects.update(solve_trace=None)
+    make_template(givens="11" + "0" * 79)  # contradictory: cannot be traced
+
+    out = io.StringIO()
+    call_command("backfill_traces", "--chunk-size", "1", stdout=out)
+    assert "Traced: 2, failed: 1" in out.getvalue()
+    assert PuzzleTemplate.objects.filter(solve_trace__isnull=True).count() == 1
+
+
+def test_export_puzzles_command(db: Any, tmp_path: Any) -> None:
+    call_command("seed_puzzles", "--count", "3", "--seed", "1", stdout=io.StringIO())
+    ids = sorted(PuzzleTemplate.objects.values_list("id", flat=True))
+
+    out, err = io.StringIO(), io.StringIO()
+    call_command("export_puzzles", "--chunk-size", "2", stdout=out, stderr=err)
+    assert [json.loads(line)["id"] for line in out.getvalue().splitlines()] == ids
+    assert "Exported 3 template(s)" in err.getvalue()
+
+    path = tmp_path / "puzzles.json"
+    out = io.StringIO()
+    call_command(
+        "export_puzzles", "--format", "json", "--chunk-size", "2", "-o", str(path), stdout=out
+    )
+    assert [item["id"] for item in json.loads(path.read_text())] == ids
+    assert "Exported 3 template(s)" in out.getvalue()
+
+    call_command("export_puzzles", "--format", "json", "--size", "4", "-o", str(path))
+    assert json.loads(path.read_text()) == []
+
+
+def test_import_puzzles_command(db: Any, tmp_path: Any) -> None:
+    givens = "609250040458000219102048030013004600000600104804100307000025800040806971006709400"
+    solution = "639251748458367219172948536913574682527683194864192357791425863245836971386719425"
+    dump = tmp_path / "dump.txt"
+    dump.write_text(
+        "# header\n"
+        f"{givens.replace('0', '.')}\n"
+        f"{givens},{solution}\n"
+        f"{givens},{solution[::-1]}\n"  # wrong solution
+        + "0" * 81
+        + "\n"  # many solutions
+        + "12345\n"
+        + json.dumps({"givens": "4300003401033001", "source": "dump"})
+        + "\n"
+    )
+    out, rejects = io.StringIO(), tmp_path / "rejects.tsv"
+    call_command(
+        "import_puzzles", str(dump), "--workers", "2", "--rejects", str(rejects), stdout=out
+    )
+    # The first two boards are the same puzzle, so the second is a duplicate.
+    assert "Imported: 2, rejected: 3, duplicates: 1" in out.getvalue()
+    assert sorted(rejects.read_text().splitlines()) == [
+        "4\tsolution does not match",
+        "5\tmultiple solutions",
+        "6\tunrecognised line (5 cells)",
+    ]
+    imported = PuzzleTemplate.objects.order_by("id")
+    assert [t.source for t in imported] == ["import", "dump"]
+    assert all(t.solve_trace for t in imported)
+    assert imported[0].solution == solution
+
+
+def test_import_rejects_non_ascii_digits(db: Any) -> None:
+    givens = "609250040458000219102048030013004600000600104804100307000025800040806971006709400"
+    rejects: list[tuple[int, str]] = []
+    res = import_puzzles(
+        [givens, "²" + givens[1:], f"{givens},{'²' * 81}"],
+        on_reject=lambda line, reason: rejects.append((line, reason)),
+    )
+    assert (res.created, res.rejected, res.duplicates) == (1, 1, 1)
+    assert rejects == [(2, "malformed grid")]
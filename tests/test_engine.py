@@ -1,4 +1,4 @@
-from puzzle.services.engines import GridSpec
+from puzzle.services.engines import DokusanEngine, GridSpec
 from puzzle.services.factory import get_engine_for
 
 
@@ -20,3 +20,66 @@ def test_engine_generate_and_solve_deterministic() -> None:
     assert solved is not None and len(solved) == 81
 
     assert engine.has_unique_solution(spec=spec, grid=givens1) is True
+
+
+def test_engine_solves_known_puzzle() -> None:
+    spec = GridSpec(size=9, box_h=3, box_w=3)
+    engine = get_engine_for(spec)
+    puzzle = "003020600900305001001806400008102900700000008006708200002609500800203009005010300"
+    solution = "483921657967345821251876493548132976729564138136798245372689514814253769695417382"
+    assert engine.solve(spec=spec, grid=puzzle) == solution
+
+
+def test_engine_solve_rejects_malformed_and_contradictory_grids() -> None:
+    spec = GridSpec(size=9, box_h=3, box_w=3)
+    engine = get_engine_for(spec)
+    assert engine.solve(spec=spec, grid="0" * 80) is None
+    assert engine.solve(spec=spec, grid="x" + "0" * 80) is None
+    assert engine.solve(spec=spec, grid="11" + "0" * 79) is None
+
+
+def test_count_solutions_stops_at_two() -> None:
+    spec = GridSpec(size=9, box_h=3, box_w=3)
+    engine = DokusanEngine()
+    unique = "003020600900305001001806400008102900700000008006708200002609500800203009005010300"
+    res = engine.count_solutions(spec=spec, grid=unique)
+    assert res.count == 1
+    assert res.solution is not None and "0" not in res.solution
+    assert res.stats.nodes >= 1
+
+    # Blanking most of the grid leaves many solutions; the count saturates at 2.
+    res = engine.count_solutions(spec=spec, grid=unique[:9] + "0" * 72)
+    assert res.count == 2
+    assert engine.has_unique_solution(spec=spec, grid=unique[:9] + "0" * 72) is False
+    assert engine.has_unique_solution(spec=spec, grid="11" + "0" * 79) is False
+
+
+def test_generated_puzzles_are_valid_and_seeded() -> None:
+    spec = GridSpec(size=9, box_h=3, box_w=3)
+    engine = DokusanEngine()
+    givens, solution, _ = engine.generate(spec=spec, difficulty="hard", seed=5)
+
+    rows = [solution[r * 9 : r * 9 + 9] for r in range(9)]
+    cols = ["".join(row[c] for row in rows) for c in range(9)]
+    boxes = [
+        "".join(rows[br + r][bc + c] for r in range(3) for c in range(3))
+        for br in (0, 3, 6)
+        for bc in (0, 3, 6)
+    ]
+    for unit in rows + cols + boxes:
+        assert sorted(unit) == list("123456789")
+    assert all(g in ("0", s) for g, s in zip(givens, solution, strict=True))
+    assert engine.solve(spec=spec, grid=givens) == solution
+
+    other, _, _ = engine.generate(spec=spec, difficulty="hard", seed=6)
+    assert other != givens
+
+
+def test_generate_many_streams_same_results_as_single_calls() -> None:
+    spec = GridSpec(size=6, box_h=2, box_w=3)
+    engine = DokusanEngine()
+    batch = engine.generate_many(spec=spec, difficulty="medium", count=3, seed=10)
+    assert not isinstance(batch, list)
+    assert list(batch) == [
+        engine.generate(spec=spec, difficulty="medium", seed=10 + i) for i in range(3)
+    ]
@@ -0,0 +1,138 @@
+import threading
+from collections.abc import Callable
+from typing import Any
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from puzzle.models import AnalyticsEvent, PuzzleTemplate
+from puzzle.services.events import Event, EventEmitter, emitter
+from puzzle.services.gameplay import start_game
+from puzzle.tasks import ingest_analytics_events
+
+
+def test_flush_ships_in_batches() -> None:
+    shipped: list[list[Event]] = []
+    em = EventEmitter(
+        ship=shipped.append, maxsize=100, batch_size=3, flush_seconds=60.0, background=False
+    )
+    for i in range(7):
+        em.emit("e", payload={"i": i})
+    assert shipped == [] and len(em) == 7
+    em.flush()
+    assert [len(b) for b in shipped] == [3, 3, 1]
+    assert [e["payload"]["i"] for b in shipped for e in b] == list(range(7))
+
+
+def _shipper_emitter(flush_seconds: float) -> tuple[EventEmitter, list[str], threading.Event]:
+    threads: list[str] = []
+    shipped = threading.Event()
+
+    def ship(batch: list[Event]) -> None:
+        threads.append(threading.current_thread().name)
+        shipped.set()
+
+    em = EventEmitter(ship=ship, maxsize=100, batch_size=3, flush_seconds=flush_seconds)
+    return em, threads, shipped
+
+
+def test_full_batch_is_shipped_off_the_calling_thread() -> None:
+    em, threads, shipped = _shipper_emitter(flush_seconds=60.0)
+    em.emit("e")
+    em.emit("e")
+    assert not shipped.wait(0.05)
+    em.emit("e")
+    assert shipped.wait(5)
+    assert threads == ["analytics-shipper"]
+
+
+def test_partial_batch_is_shipped_by_the_timer() -> None:
+    em, threads, shipped = _shipper_emitter(flush_seconds=0.05)
+    em.emit("e")
+    assert shipped.wait(5)
+    assert threads == ["analytics-shipper"] and len(em) == 0
+
+
+def test_emitter_drops_oldest_when_full_and_requeues_failures() -> None:
+    calls: list[list[Event]] = []
+
+    def failing(batch: list[Event]) -> None:
+        calls.append(batch)
+        raise RuntimeError("broker down")
+
+    em = EventEmitter(ship=failing, maxsize=4, batch_size=10, flush_seconds=60.0)
+    for i in range(6):
+        em.emit("e", payload={"i": i})
+    assert em.dropped == 2
+
+    em.flush()
+    assert len(calls) == 1
+    em.emit("e", payload={"i": 6})
+    em.ship = lambda batch: calls.append(batch)
+    em.flush()
+    assert [e["payload"]["i"] for e in calls[-1]] == [3, 4, 5, 6]
+    assert em.dropped == 3
+
+
+def test_gameplay_emits_without_db_writes(make_template: Callable[..., PuzzleTemplate]) -> None:
+    t = make_template(
+        size=4, solution="1234341221434321", difficulty_metric=0.1, difficulty_label="easy"
+    )
+    emitter.flush()
+    with CaptureQueriesContext(connection) as ctx:
+        game = start_game(user_id=None, template_id=t.id)
+    assert not any("puzzle_analyticsevent" in q["sql"] for q in ctx.captured_queries)
+
+    emitter.flush()  # eager Celery in tests: ingests immediately
+    event = AnalyticsEvent.objects.get(game=game)
+    assert event.name == AnalyticsEvent.EVENT_GAME_START
+    assert event.payload == {"template_id": t.id}
+
+
+def test_ingest_nulls_missing_references(db: Any) -> None:
+    created = ingest_analytics_events(
+        [
+            {
+                "name": "hint_used",
+                "user_id": 9999,
+                "game_id": 9999,
+                "payload": {"cell_index": 3},
+                "created_at": "2026-01-02T03:04:05+00:00",
+            }
+        ]
+    )
+    assert created == 1
+    event = AnalyticsEvent.objects.get()
+    assert event.game_id is None and event.user_id is None
+    assert event.created_at.isoformat() == "2026-01-02T03:04:05+00:00"
+
+
+def test_retention_purges_whole_expired_months(db: Any) -> None:
+    import datetime as dt
+
+    from puzzle.services.partitions import (
+        add_months,
+        apply_retention,
+        partition_name,
+        retention_cutoff,
+    )
+
+    assert add_months(dt.date(2026, 11, 1), 3) == dt.date(2027, 2, 1)
+    assert add_months(dt.date(2026, 1, 1), -1) == dt.date(2025, 12, 1)
+    assert partition_name(dt.date(2026, 3, 1)) == "puzzle_analyticsevent_p2026_03"
+
+    today = dt.date(2026, 10, 18)
+    cutoff = retention_cutoff(retention_months=2, today=today)
+    assert cutoff == dt.datetime(2026, 8, 1, tzinfo=dt.UTC)
+
+    utc = dt.UTC
+    for when in (
+        dt.datetime(2026, 7, 31, 23, 59, tzinfo=utc),
+        dt.datetime(2026, 8, 1, tzinfo=utc),
+        dt.datetime(2026, 10, 1, tzinfo=utc),
+    ):
+        AnalyticsEvent.objects.create(name="e", created_at=when)
+    with override_settings(PUZZLE_ANALYTICS_RETENTION_MONTHS=2):
+        assert apply_retention(today=today) == 1
+    assert AnalyticsEvent.objects.count() == 2
@@ -1,10 +1,15 @@
+from collections.abc import Callable
 from typing import Any
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from puzzle.models import GameSession, PuzzleTemplate
 from puzzle.services.gameplay import (
+    Move,
     apply_move,
+    apply_moves,
     complete_game,
     start_game,
     validate_board,
@@ -56,3 +61,47 @@ def test_start_apply_validate_complete(db: Any, template: PuzzleTemplate) -> Non
     game = complete_game(game_id=game.id)
     assert game.status == GameSession.STATUS_COMPLETED
     assert game.completed_at is not None
+
+
+def test_apply_moves_single_update(db: Any, template: PuzzleTemplate) -> None:
+    game = start_game(user_id=None, template_id=template.id)
+    moves = [Move(i, 1) for i in range(1, 40)] + [Move(40, 2, "pencil")]
+    with CaptureQueriesContext(connection) as ctx:
+        res = apply_moves(game_id=game.id, moves=moves, time_seconds=30)
+    sql = [q["sql"] for q in ctx.captured_queries if "SAVEPOINT" not in q["sql"]]
+    # One UPDATE of the row plus one INSERT of the new journal records
+    assert len(sql) == 3 and sql[1].startswith("UPDATE")
+    assert '"journal_base"' not in sql[1]
+    assert sql[2].startswith('INSERT INTO "puzzle_gamemove"')
+    assert res.game.board_state[:40] == "1" * 40
+    assert res.game.pencil_marks == {"40": [2]}
+    assert res.game.time_seconds == 30
+
+
+def test_conflicts_and_mistakes(make_template: Callable[..., PuzzleTemplate]) -> None:
+    solution = "".join(str((r * 3 + r // 3 + c) % 9 + 1) for r in range(9) for c in range(9))
+    givens = solution[:9] + "0" * 72  # first row given
+    t = make_template(givens=givens, solution=solution)
+    game = start_game(user_id=None, template_id=t.id)
+
+    # Correct placement: no conflict, no mistake
+    res = apply_move(game_id=game.id, cell_index=9, value=int(solution[9]))
+    assert res.conflicts == () and res.game.mistakes_count == 0
+
+    # Cell 18 repeats the given at cell 0 (same column and box) and is wrong
+    res = apply_move(game_id=game.id, cell_index=18, value=int(solution[0]))
+    assert res.conflicts == (0, 18)
+    assert res.game.mistakes_count == 1
+
+    # Clearing is not a mistake; pencil marks are never checked
+    res = apply_moves(game_id=game.id, moves=[Move(18, 0), Move(19, 1, "pencil")])
+    assert res.conflicts == () and res.game.mistakes_count == 1
+    # Erasing one end of a clash resolves both
+    assert res.cleared == (0, 18)
+
+    # Overwriting a clashing cell clears it and the unchanged peer it clashed with
+    apply_move(game_id=game.id, cell_index=37, value=int(solution[10]))  # column of 10
+    res = apply_move(game_id=game.id, cell_index=10, value=int(solution[10]))
+    assert res.conflicts == (10, 37) and res.cleared == ()
+    res = apply_move(game_id=game.id, cell_index=37, value=int(solution[37]))
+    assert res.conflicts == () and res.cleared == (10, 37)
@@ -1,7 +1,17 @@
 from typing import Any
 
+import pytest
+
 from puzzle.models import PuzzleTemplate
-from puzzle.services.generation import generate_template, map_metric_to_label
+from puzzle.services.bulk import bulk_create_templates
+from puzzle.services.engines import GridSpec
+from puzzle.services.generation import (
+    generate_template,
+    generate_templates,
+    map_metric_to_label,
+    store_generated,
+)
+from puzzle.services.parallel import generate_parallel, split_seeds
 
 
 def test_map_metric_to_label_ranges() -> None:
@@ -23,3 +33,41 @@ def test_generate_template_creates_row(db: Any) -> None:
     assert len(t.givens) == 81 and len(t.solution) == 81
     assert t.size == 9 and t.box_h == 3 and t.box_w == 3
     assert t.difficulty_label in {"easy", "medium", "hard", "expert"}
+
+
+@pytest.mark.parametrize("difficulty", ["easy", "medium", "hard", "expert"])
+def test_generated_puzzles_get_the_requested_label(db: Any, difficulty: str) -> None:
+    generate_templates(size=9, box_h=3, box_w=3, difficulty=difficulty, count=3, seed=1000)
+    labels = PuzzleTemplate.objects.values_list("difficulty_label", flat=True)
+    assert list(labels) == [difficulty] * 3
+
+
+def test_generate_templates_creates_batch(db: Any) -> None:
+    res = generate_templates(size=4, box_h=2, box_w=2, difficulty="easy", count=3, seed=1)
+    assert res.created == 3
+    rows = PuzzleTemplate.objects.filter(size=4)
+    assert rows.count() == 3
+    assert len({t.givens for t in rows}) == 3
+
+
+def test_split_seeds_covers_range_contiguously() -> None:
+    chunks = split_seeds(count=10, chunks=4, seed=100)
+    assert chunks == [(100, 3), (103, 3), (106, 2), (108, 2)]
+    assert split_seeds(count=2, chunks=8, seed=0) == [(0, 1), (1, 1)]
+
+
+def test_parallel_generation_matches_serial() -> None:
+    spec = GridSpec(size=4, box_h=2, box_w=2)
+    serial = list(generate_parallel(spec=spec, difficulty="easy", count=6, seed=3))
+    parallel = list(generate_parallel(spec=spec, difficulty="easy", count=6, seed=3, workers=2))
+    assert parallel == serial
+
+
+def test_bulk_create_templates_chunks_inserts(db: Any) -> None:
+    rows = [(f"{i:016d}", "1" * 16, 0.1 * i, None) for i in range(10)]
+    spec = GridSpec(size=4, box_h=2, box_w=2)
+    assert store_generated(iter(rows), spec=spec, source="bulk", chunk_size=3) == 10
+    stored = PuzzleTemplate.objects.filter(source="bulk")
+    assert stored.count() == 10
+    assert {t.difficulty_label for t in stored} == {"easy", "medium", "hard", "expert"}
+    assert bulk_create_templates(iter([]), chunk_size=3) == 0
@@ -1,26 +1,86 @@
+from collections.abc import Callable
 from typing import Any
 
+import pytest
+
 from puzzle.models import PuzzleTemplate
-from puzzle.services.gameplay import start_game
-from puzzle.services.hints import get_next_hint
-
-
-def test_hint_returns_first_empty_and_correct_value(db: Any) -> None:
-    # Create a trivial template where solution is all 1s and first cell is given '1'
-    t = PuzzleTemplate.objects.create(
-        size=9,
-        box_h=3,
-        box_w=3,
-        givens=("100" + "0" * 78),
-        solution=("1" * 81),
-        difficulty_metric=0.2,
-        difficulty_label="easy",
-        source="test",
-    )
+from puzzle.services.engines.rating import HIDDEN_SINGLE, NAKED_SINGLE
+from puzzle.services.engines.trace import iter_trace
+from puzzle.services.gameplay import apply_move, start_game
+from puzzle.services.generation import generate_template
+from puzzle.services.hints import MISTAKE, get_next_hint
+
+SOLUTION = "".join(str((r * 3 + r // 3 + c) % 9 + 1) for r in range(9) for c in range(9))
+
+
+def test_hint_is_a_logical_step(make_template: Callable[..., PuzzleTemplate]) -> None:
+    # Everything but the first row's last cell is given: a naked single
+    t = make_template(givens=SOLUTION[:8] + "0" + SOLUTION[9:], solution=SOLUTION)
+    game = start_game(user_id=None, template_id=t.id)
+
+    hint = get_next_hint(game_id=game.id)
+    assert hint is not None
+    assert (hint.cell_index, hint.value) == (8, int(SOLUTION[8]))
+    assert hint.technique in {NAKED_SINGLE, HIDDEN_SINGLE}
+
+    apply_move(game_id=game.id, cell_index=8, value=int(SOLUTION[8]))
+    assert get_next_hint(game_id=game.id) is None
+
+
+def test_hint_points_out_mistakes_first(make_template: Callable[..., PuzzleTemplate]) -> None:
+    t = make_template(givens="0" * 9 + SOLUTION[9:], solution=SOLUTION)
     game = start_game(user_id=None, template_id=t.id)
+    wrong = int(SOLUTION[4]) % 9 + 1
+    apply_move(game_id=game.id, cell_index=4, value=wrong)
 
     hint = get_next_hint(game_id=game.id)
     assert hint is not None
-    assert hint.cell_index == 1
-    assert hint.value == 1
-    assert hint.technique == "single-candidate"
+    assert (hint.cell_index, hint.value, hint.technique) == (4, int(SOLUTION[4]), MISTAKE)
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_hints_solve_a_generated_puzzle(db: Any, seed: int) -> None:
+    res = generate_template(size=9, box_h=3, box_w=3, difficulty="medium", seed=seed)
+    t = res.template
+    game = start_game(user_id=None, template_id=t.id)
+    for _ in range(400):
+        hint = get_next_hint(game_id=game.id)
+        if hint is None:
+            break
+        assert hint.technique != MISTAKE
+        if hint.cell_index is not None and hint.value is not None:
+            assert str(hint.value) == t.solution[hint.cell_index]
+            apply_move(game_id=game.id, cell_index=hint.cell_index, value=hint.value)
+    assert hint is None
+
+
+def test_hint_reads_the_solve_trace(db: Any) -> None:
+    res = generate_template(size=9, box_h=3, box_w=3, difficulty="easy", seed=5)
+    t = res.template
+    assert t.solve_trace is not None
+    first, second = list(iter_trace(bytes(t.solve_trace)))[:2]
+    game = start_game(user_id=None, template_id=t.id)
+
+    # Playing the second trace step first still leaves the first one as the hint
+    apply_move(game_id=game.id, cell_index=second.cell, value=second.value)
+    hint = get_next_hint(game_id=game.id)
+    assert hint is not None
+    assert (hint.cell_index, hint.value, hint.technique) == (
+        first.cell,
+        first.value,
+        first.technique,
+    )
+
+
+def test_stale_trace_step_falls_back_to_search(db: Any) -> None:
+    t = generate_template(size=9, box_h=3, box_w=3, difficulty="easy", seed=5).template
+    # Relabel every digit, as an edit that left the trace behind would
+    relabel = str.maketrans("123456789", "234567891")
+    solution = t.solution.translate(relabel)
+    PuzzleTemplate.objects.filter(pk=t.pk).update(
+        givens=t.givens.translate(relabel), solution=solution
+    )
+    game = start_game(user_id=None, template_id=t.id)
+    hint = get_next_hint(game_id=game.id)
+    assert hint is not None and hint.cell_index is not None
+    assert str(hint.value) == solution[hint.cell_index]
@@ -0,0 +1,115 @@
+import json
+import random
+from collections.abc import Callable, Iterator
+from typing import Any
+
+import pytest
+from django.test import Client
+
+from puzzle.models import PuzzleTemplate
+from puzzle.services import pool
+
+
+class FakeRedis:
+    """Just enough of the redis-py hash API for the pool service."""
+
+    def __init__(self) -> None:
+        self.hashes: dict[str, dict[str, bytes]] = {}
+
+    def hlen(self, key: str) -> int:
+        return len(self.hashes.get(key, {}))
+
+    def hkeys(self, key: str) -> list[bytes]:
+        return [k.encode() for k in self.hashes.get(key, {})]
+
+    def hset(self, key: str, mapping: dict[str, str]) -> int:
+        h = self.hashes.setdefault(key, {})
+        h.update({k: v.encode() for k, v in mapping.items()})
+        return len(mapping)
+
+    def hdel(self, key: str, *fields: str) -> int:
+        h = self.hashes.get(key, {})
+        return sum(h.pop(field, None) is not None for field in fields)
+
+    def hrandfield(self, key: str, count: int, withvalues: bool = False) -> list[bytes]:
+        h = self.hashes.get(key)
+        if not h:
+            return []
+        field = random.choice(list(h))
+        return [field.encode(), h[field]]
+
+    def scan_iter(self, match: str) -> Iterator[bytes]:
+        prefix = match.rstrip("*")
+        return (k.encode() for k, v in self.hashes.items() if k.startswith(prefix) and v)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch: pytest.MonkeyPatch) -> FakeRedis:
+    client = FakeRedis()
+    monkeypatch.setattr(pool, "get_pool_client", lambda: client)
+    return client
+
+
+def test_refill_fetch_and_evict(
+    fake_redis: FakeRedis, make_template: Callable[..., PuzzleTemplate]
+) -> None:
+    templates = [make_template() for _ in range(3)]
+    assert pool.refill_pool(size=9, difficulty="medium", target=2, rotate=0) == 2
+    assert pool.refill_pool(size=9, difficulty="medium", target=2, rotate=0) == 0
+    assert pool.refill_pool(size=9, difficulty="medium", target=5, rotate=0) == 1
+    assert pool.pool_depths() == {(9, "medium"): 3}
+
+    blob = pool.fetch_pooled(size=9, difficulty="medium")
+    assert blob is not None
+    assert json.loads(blob)["id"] in {t.id for t in templates}
+
+    templates[0].difficulty_label = "hard"
+    templates[0].save()
+    assert pool.pool_depths() == {(9, "medium"): 2}
+
+
+def test_refill_rotates_a_full_pool(
+    fake_redis: FakeRedis, make_template: Callable[..., PuzzleTemplate]
+) -> None:
+    templates = {make_template().id for _ in range(6)}
+    for i, pk in enumerate(sorted(templates)):
+        PuzzleTemplate.objects.filter(pk=pk).update(random_key=i / 6)
+    random.seed(0)
+    key = pool.pool_key(9, "medium")
+    seen: set[int] = set()
+    for _ in range(60):
+        added = pool.refill_pool(size=9, difficulty="medium", target=2, rotate=0.5)
+        assert fake_redis.hlen(key) == 2
+        seen.update(int(k) for k in fake_redis.hkeys(key))
+    # Once full, each run swaps one entry for a template not pooled yet
+    assert added == 1
+    assert seen == templates
+
+    # Nothing left to bring in: the pool keeps what it has
+    pool.refill_pool(size=9, difficulty="medium", target=6, rotate=0)
+    assert pool.refill_pool(size=9, difficulty="medium", target=6, rotate=0.5) == 0
+    assert fake_redis.hlen(key) == 6
+
+
+def test_list_endpoint_serves_from_pool_without_orm(
+    fake_redis: FakeRedis,
+    django_assert_num_queries: Any,
+    make_template: Callable[..., PuzzleTemplate],
+) -> None:
+    t = make_template()
+    pool.refill_pool(size=9, difficulty="medium", target=10)
+    with django_assert_num_queries(0):
+        resp = Client().get("/api/puzzles/?size=9&difficulty=medium")
+    assert resp.status_code == 200
+    assert resp.json()["id"] == t.id
+
+
+def test_empty_or_disabled_pool_falls_back_to_db(
+    make_template: Callable[..., PuzzleTemplate],
+) -> None:
+    assert pool.fetch_pooled(size=9, difficulty="medium") is None
+    assert pool.pool_depths() == {}
+    t = make_template()
+    resp = Client().get("/api/puzzles/?size=9&difficulty=medium")
+    assert resp.status_code == 200
+    assert resp.json()["id"] == t.id
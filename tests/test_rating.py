@@ -0,0 +1,113 @@
+import pytest
+
+from puzzle.services.engines import DokusanEngine, GridSpec
+from puzzle.services.engines.rating import (
+    GUESS,
+    HIDDEN_SINGLE,
+    LOCKED_CANDIDATES,
+    NAKED_SINGLE,
+    CandidateGrid,
+    Step,
+    next_step,
+    rate_grid,
+)
+from puzzle.services.engines.solver import geometry_for, parse_grid
+from puzzle.services.engines.trace import iter_trace, trace_grid
+from puzzle.services.engines.transform import random_transform
+from puzzle.services.generation import map_metric_to_label
+
+SPEC = GridSpec(size=9, box_h=3, box_w=3)
+EASY = "003020600900305001001806400008102900700000008006708200002609500800203009005010300"
+HARDEST = "800000000003600000070090200050007000000045700000100030001000068008500010090000400"
+# Reference puzzles for the label bands (generated with full dig-out).
+CALIBRATION = [
+    ("004000001730200900008000300000300789500004100000019000295000000000000062003080000", "medium"),
+    ("000000067009004000000170200900040000020000390304008600060000750003080001002003000", "hard"),
+    ("000005689090280000000070300060000020901000000200900040180700004000008060700000001", "hard"),
+    ("003800000720400069600007000090004100000070004068200000000160200000008590000900070", "expert"),
+    (HARDEST, "expert"),
+]
+
+
+def test_singles_only_puzzle_rates_easy() -> None:
+    rating = DokusanEngine().rate(spec=SPEC, grid=EASY)
+    assert set(rating.histogram) <= {NAKED_SINGLE, HIDDEN_SINGLE}
+    assert map_metric_to_label(rating.metric) == "easy"
+    assert sum(rating.histogram.values()) == len(rating.steps)
+    assert DokusanEngine().rate_difficulty(spec=SPEC, grid=EASY) == rating.metric
+
+
+def test_trial_and_error_puzzle_rates_expert() -> None:
+    rating = rate_grid(SPEC, HARDEST)
+    assert GUESS in rating.histogram
+    assert LOCKED_CANDIDATES in rating.histogram
+    assert map_metric_to_label(rating.metric) == "expert"
+
+    solution = DokusanEngine().solve(spec=SPEC, grid=HARDEST)
+    assert solution is not None
+    for step in rating.steps:
+        if step.cell is not None:
+            assert solution[step.cell] == str(step.value)
+        for cell, digit in step.eliminations:
+            assert solution[cell] != str(digit)
+
+
+@pytest.mark.parametrize("grid,label", CALIBRATION)
+def test_known_puzzles_land_in_their_band(grid: str, label: str) -> None:
+    # Triples/X-wing or a single guess are hard; two or more guesses are expert.
+    rating = rate_grid(SPEC, grid)
+    assert map_metric_to_label(rating.metric) == label
+
+
+@pytest.mark.parametrize("grid", [EASY] + [grid for grid, _ in CALIBRATION])
+def test_rating_is_invariant_under_transforms(grid: str) -> None:
+    rating = rate_grid(SPEC, grid)
+    for seed in range(8):
+        transform = random_transform(SPEC, seed)
+        moved = rate_grid(SPEC, transform.apply(grid))
+        assert map_metric_to_label(moved.metric) == map_metric_to_label(rating.metric)
+        assert (moved.metric, moved.histogram) == (rating.metric, rating.histogram)
+
+
+def test_candidate_grid_updates_peers_incrementally() -> None:
+    geo = geometry_for(SPEC)
+    values = parse_grid(geo, EASY)
+    assert values is not None
+    grid = CandidateGrid.from_values(geo, values)
+    remaining = grid.remaining
+
+    step = next_step(grid)
+    assert isinstance(step, Step) and step.cell is not None and step.value is not None
+    grid.apply(step)
+    assert grid.remaining == remaining - 1
+    assert grid.cands[step.cell] == 0
+    assert all(not grid.cands[p] & (1 << (step.value - 1)) for p in geo.peers[step.cell])
+
+
+def test_rate_rejects_unsolvable_boards() -> None:
+    with pytest.raises(ValueError):
+        rate_grid(SPEC, "11" + "0" * 79)
+    with pytest.raises(ValueError):
+        rate_grid(SPEC, "0" * 80)
+
+
+def test_solve_trace_replays_to_solution() -> None:
+    solution = DokusanEngine().solve(spec=SPEC, grid=HARDEST)
+    assert solution is not None
+    data = trace_grid(SPEC, HARDEST)
+    placements = list(iter_trace(data))
+    assert len(data) == 3 * len(placements) == 3 * HARDEST.count("0")
+
+    board = list(HARDEST)
+    for p in placements:
+        assert board[p.cell] == "0"
+        board[p.cell] = str(p.value)
+    assert "".join(board) == solution
+    assert GUESS in {p.technique for p in placements}
+
+    engine = DokusanEngine()
+    traced = list(engine.generate_traced(spec=SPEC, difficulty="medium", count=2, seed=4))
+    assert [t[:3] for t in traced] == list(
+        engine.generate_many(spec=SPEC, difficulty="medium", count=2, seed=4)
+    )
+    assert traced[0][3] == trace_grid(SPEC, traced[0][0])
@@ -0,0 +1,76 @@
+import datetime as dt
+from collections.abc import Callable
+
+import pytest
+from django.test import override_settings
+from django.utils import timezone
+
+from puzzle.models import CompletionRollup, GameSession, PuzzleTemplate
+from puzzle.services.analytics import average_time_seconds_by_difficulty
+from puzzle.services.rollups import update_completion_rollups
+from puzzle.tasks import update_completion_rollups as rollup_task
+
+
+def _completed(puzzle: PuzzleTemplate, seconds: int, at: dt.datetime) -> GameSession:
+    return GameSession.objects.create(
+        puzzle=puzzle,
+        board_state=puzzle.givens,
+        time_seconds=seconds,
+        status=GameSession.STATUS_COMPLETED,
+        completed_at=at,
+    )
+
+
+@pytest.fixture
+def now() -> dt.datetime:
+    return timezone.now()
+
+
+def test_rollups_aggregate_and_only_process_new_completions(
+    now: dt.datetime, make_template: Callable[..., PuzzleTemplate]
+) -> None:
+    easy, hard, small = (
+        make_template(difficulty_label="easy"),
+        make_template(difficulty_label="hard"),
+        make_template(difficulty_label="easy", size=4),
+    )
+    earlier = now - dt.timedelta(hours=1)
+    _completed(easy, 100, earlier)
+    _completed(easy, 300, earlier)
+    _completed(hard, 600, earlier)
+    _completed(small, 40, earlier)
+    GameSession.objects.create(puzzle=easy, board_state=easy.givens, time_seconds=5)
+
+    assert update_completion_rollups(now=now) == 4
+    assert update_completion_rollups(now=now) == 0
+
+    rollup = CompletionRollup.objects.get(size=9, difficulty_label="easy")
+    assert (rollup.count, rollup.total_seconds, rollup.total_sq_seconds) == (2, 400, 100_000)
+    assert (rollup.min_seconds, rollup.max_seconds) == (100, 300)
+
+    _completed(easy, 200, earlier + dt.timedelta(minutes=1))
+    assert update_completion_rollups(now=now) == 1
+
+    stats = {r.difficulty_label: r for r in average_time_seconds_by_difficulty(size=9)}
+    assert stats["easy"].games == 3
+    assert stats["easy"].average_time_seconds == pytest.approx(200.0)
+    assert stats["easy"].stddev_seconds == pytest.approx((20000 / 3) ** 0.5)
+    assert stats["hard"].average_time_seconds == pytest.approx(600.0)
+    assert [r.games for r in average_time_seconds_by_difficulty()] == [4, 1]
+
+
+def test_rollups_wait_for_recent_completions_and_batch(
+    now: dt.datetime, make_template: Callable[..., PuzzleTemplate]
+) -> None:
+    easy = make_template(difficulty_label="easy")
+    same_moment = now - dt.timedelta(hours=2)
+    for seconds in (10, 20, 30):
+        _completed(easy, seconds, same_moment)
+    _completed(easy, 40, now)  # inside the settle window
+
+    assert update_completion_rollups(batch_size=2, now=now) == 3
+    assert CompletionRollup.objects.get().count == 3
+
+    with override_settings(PUZZLE_ROLLUP_SETTLE_SECONDS=0):
+        assert rollup_task() == 1
+    assert CompletionRollup.objects.get().count == 4
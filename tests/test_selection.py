@@ -0,0 +1,47 @@
+import random
+from collections.abc import Callable
+
+from puzzle.models import PuzzleTemplate
+from puzzle.services.selection import pick_random_template, reshuffle_random_keys
+
+
+def test_pick_random_template_uses_key_and_wraps(
+    make_template: Callable[..., PuzzleTemplate],
+) -> None:
+    low, high = make_template(random_key=0.2), make_template(random_key=0.7)
+    make_template(random_key=0.5, difficulty_label="hard")
+
+    class Fixed(random.Random):
+        def __init__(self, value: float) -> None:
+            super().__init__()
+            self.value = value
+
+        def random(self) -> float:
+            return self.value
+
+    assert pick_random_template(size=9, difficulty="medium", rng=Fixed(0.1)) == low
+    assert pick_random_template(size=9, difficulty="medium", rng=Fixed(0.3)) == high
+    assert pick_random_template(size=9, difficulty="medium", rng=Fixed(0.9)) == low
+    assert pick_random_template(size=9, difficulty="expert") is None
+
+
+def test_new_templates_get_random_keys(make_template: Callable[..., PuzzleTemplate]) -> None:
+    keys = {make_template(size=4, difficulty_label="easy").random_key for _ in range(5)}
+    assert len(keys) == 5 and all(0 <= k < 1 for k in keys)
+
+
+def test_reshuffle_redraws_keys_in_a_window(make_template: Callable[..., PuzzleTemplate]) -> None:
+    keys = [0.3, 0.5, 0.02, 0.9, 0.95]
+    templates = [make_template(random_key=k) for k in keys]
+    other = make_template(random_key=0.92, difficulty_label="hard")
+
+    class Fixed(random.Random):
+        def random(self) -> float:
+            return 0.85
+
+    # Window [0.85, 1.05) wraps to the keys below 0.05 as well
+    assert reshuffle_random_keys(size=9, difficulty="medium", share=0.2, rng=Fixed()) == 3
+    new = [PuzzleTemplate.objects.get(pk=t.pk).random_key for t in templates]
+    assert new[:2] == keys[:2]
+    assert all(0 <= k < 1 for k in new)
+    assert PuzzleTemplate.objects.get(pk=other.pk).random_key == 0.92
@@ -0,0 +1,208 @@
+from collections.abc import Callable, Iterator
+from typing import Any
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from puzzle.models import GameMove, GameSession, PuzzleTemplate
+from puzzle.services import session_buffer
+from puzzle.services.codec import read_board
+from puzzle.services.gameplay import (
+    Move,
+    apply_move,
+    apply_moves,
+    replay_session,
+    start_game,
+    undo_move,
+    validate_board,
+)
+from puzzle.tasks import flush_session_buffers
+
+
+@pytest.fixture(autouse=True)
+def write_behind() -> Iterator[None]:
+    cache.clear()
+    session_buffer._local_dirty.clear()
+    with override_settings(
+        PUZZLE_SESSION_WRITE_BEHIND=True,
+        PUZZLE_SESSION_FLUSH_MOVES=5,
+        PUZZLE_SESSION_FLUSH_SECONDS=3600,
+    ):
+        yield
+    cache.clear()
+
+
+@pytest.fixture
+def game(make_template: Callable[..., PuzzleTemplate]) -> GameSession:
+    t = make_template(givens="1" + "0" * 80)
+    return start_game(user_id=None, template_id=t.id)
+
+
+def _row_board(game_id: int) -> str:
+    return read_board(GameSession.objects.select_related("puzzle").get(pk=game_id))
+
+
+def test_moves_stay_in_buffer_until_threshold(game: GameSession) -> None:
+    apply_move(game_id=game.id, cell_index=1, value=1)  # loads the row once
+    with CaptureQueriesContext(connection) as ctx:
+        for i in range(2, 5):
+            res = apply_move(game_id=game.id, cell_index=i, value=1)
+    assert len(ctx.captured_queries) == 0
+    assert res.game.board_state[:5] == "11111"
+    assert _row_board(game.id)[:5] == "10000"
+
+    # Fifth move reaches PUZZLE_SESSION_FLUSH_MOVES
+    apply_move(game_id=game.id, cell_index=5, value=1)
+    assert _row_board(game.id)[:6] == "111111"
+
+
+def test_reads_and_task_flush(game: GameSession) -> None:
+    apply_moves(game_id=game.id, moves=[Move(1, 1), Move(2, 1)])
+    assert validate_board(game_id=game.id) is False
+    assert _row_board(game.id)[:3] == "111"
+
+    apply_move(game_id=game.id, cell_index=3, value=1)
+    resp = Client().get(f"/api/games/{game.id}/")
+    assert resp.json()["board_state"][:4] == "1111"
+
+    apply_move(game_id=game.id, cell_index=4, value=1)
+    assert flush_session_buffers() == 1
+    assert _row_board(game.id)[:5] == "11111"
+    assert flush_session_buffers() == 0
+
+
+def test_put_discards_buffer(game: GameSession) -> None:
+    apply_move(game_id=game.id, cell_index=1, value=2)
+    resp = Client().put(
+        f"/api/games/{game.id}/",
+        data={"board_state": "1" + "3" + "0" * 79},
+        content_type="application/json",
+    )
+    assert resp.status_code == 200
+    apply_move(game_id=game.id, cell_index=2, value=4)
+    session_buffer.flush(game.id)
+    assert _row_board(game.id)[:3] == "134"
+
+
+def test_invalid_batch_leaves_buffer_untouched(game: GameSession) -> None:
+    apply_move(game_id=game.id, cell_index=1, value=2)
+    with pytest.raises(ValueError):
+        apply_moves(game_id=game.id, moves=[Move(2, 3), Move(0, 3)])
+    session_buffer.flush(game.id)
+    assert _row_board(game.id)[:3] == "120"
+
+
+def test_buffered_journal_rows_are_written_on_flush(game: GameSession) -> None:
+    apply_moves(game_id=game.id, moves=[Move(1, 1), Move(2, 1), Move(3, 1)])
+    undo_move(game_id=game.id)
+    assert not GameMove.objects.filter(game=game).exists()
+
+    apply_move(game_id=game.id, cell_index=4, value=1)  # fifth change: flushed
+    rows = GameMove.objects.filter(game=game).values_list("seq", "cell_index")
+    assert list(rows) == [(0, 1), (1, 2), (2, 4)]
+    assert replay_session(game_id=game.id).board_str() == _row_board(game.id)
+
+
+class FakeRedisSet:
+    """Just enough of the redis-py set API for the dirty-session index."""
+
+    def __init__(self) -> None:
+        self.members: set[bytes] = set()
+
+    def sadd(self, key: str, member: int) -> int:
+        self.members.add(str(member).encode())
+        return 1
+
+    def srem(self, key: str, member: int) -> int:
+        self.members.discard(str(member).encode())
+        return 1
+
+    def smembers(self, key: str) -> set[bytes]:
+        return set(self.members)
+
+
+def test_dirty_index_uses_redis_set(game: GameSession, monkeypatch: pytest.MonkeyPatch) -> None:
+    client = FakeRedisSet()
+    monkeypatch.setattr(session_buffer, "_redis_client", lambda: client)
+    apply_move(game_id=game.id, cell_index=1, value=1)
+    assert client.members == {str(game.id).encode()}
+    assert flush_session_buffers() == 1
+    assert client.members == set()
+    assert _row_board(game.id)[:2] == "11"
+
+
+def test_failed_bookkeeping_after_write_keeps_entry_current(
+    game: GameSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    apply_moves(game_id=game.id, moves=[Move(i, 1) for i in range(1, 5)])
+
+    def fail(game_id: int) -> None:
+        raise RuntimeError("index unavailable")
+
+    monkeypatch.setattr(session_buffer, "_mark_clean", fail)
+    with pytest.raises(RuntimeError):
+        apply_move(game_id=game.id, cell_index=5, value=1)  # due: row is written
+    monkeypatch.undo()
+    assert _row_board(game.id)[:6] == "111111"
+
+    # The stored entry already holds the written state, so it cannot roll the row back.
+    apply_move(game_id=game.id, cell_index=6, value=1)
+    session_buffer.flush(game.id)
+    assert _row_board(game.id)[:7] == "1111111"
+
+
+def test_entry_is_dropped_if_it_cannot_be_stored_after_a_write(
+    game: GameSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    apply_moves(game_id=game.id, moves=[Move(i, 1) for i in range(1, 5)])
+
+    class FailingSet:
+        def __getattr__(self, name: str) -> Any:
+            return getattr(cache, name)
+
+        def set(self, *args: Any, **kwargs: Any) -> None:
+            raise ConnectionError("cache down")
+
+    monkeypatch.setattr(session_buffer, "cache", FailingSet())
+    with pytest.raises(ConnectionError):
+        apply_move(game_id=game.id, cell_index=5, value=1)
+    monkeypatch.undo()
+    assert cache.get(session_buffer.buffer_key(game.id)) is None
+    session_buffer.flush(game.id)
+    assert _row_board(game.id)[:6] == "111111"
+
+
+@override_settings(SECURITY_STRICT_API=True)
+def test_strict_moves_check_the_owner_from_the_buffer(
+    make_template: Callable[..., PuzzleTemplate],
+) -> None:
+    owner = User.objects.create_user(username="owner", password="pw")
+    other = User.objects.create_user(username="other", password="pw")
+    t = make_template(givens="1" + "0" * 80)
+    game = start_game(user_id=owner.id, template_id=t.id)
+    url = f"/api/games/{game.id}/moves/"
+    body = {"moves": [{"cell_index": 1, "value": 1, "mode": "number"}]}
+    client = Client()
+    client.force_login(owner)
+    assert client.post(url, body, content_type="application/json").status_code == 200
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.post(url, {"moves": [{"cell_index": 2, "value": 1}]}, "application/json")
+    assert resp.status_code == 200
+    assert not [q for q in ctx.captured_queries if "puzzle_gamesession" in q["sql"]]
+
+    client.force_login(other)
+    resp = client.post(url, {"moves": [{"cell_index": 3, "value": 1}]}, "application/json")
+    assert resp.status_code == 403
+    assert client.post(f"/api/games/{game.id}/undo/").status_code == 403
+    session_buffer.flush(game.id)
+    assert _row_board(game.id)[:4] == "1110"
+
+    # Entries cached before the owner was kept look it up once
+    buf = cache.get(session_buffer.buffer_key(game.id))
+    del buf.__dict__["user_id"]
+    cache.set(session_buffer.buffer_key(game.id), buf)
+    assert client.post(f"/api/games/{game.id}/undo/").status_code == 403
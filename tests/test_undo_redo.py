@@ -1,9 +1,22 @@
+from collections.abc import Callable
 from typing import Any
 
 import pytest
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
 
-from puzzle.models import GameSession, PuzzleTemplate
-from puzzle.services.gameplay import apply_move, start_game
+from puzzle.models import GameMove, GameSession, PuzzleTemplate
+from puzzle.services.codec import read_board, read_marks
+from puzzle.services.gameplay import (
+    Move,
+    apply_move,
+    apply_moves,
+    redo_move,
+    replay_session,
+    start_game,
+    undo_move,
+)
 
 
 def test_illegal_edit_given_raises_error(db: Any) -> None:
@@ -41,3 +54,78 @@ def test_legality_and_mistake_tracking_mvp(db: Any) -> None:
     apply_move(game_id=game.id, cell_index=5, value=0, mode="number")
     g = GameSession.objects.get(pk=game.id)
     assert g.board_state[5] == "0"
+
+
+@pytest.fixture
+def game(make_template: Callable[..., PuzzleTemplate]) -> GameSession:
+    t = make_template(givens="1" + "0" * 80, difficulty_metric=0.2, difficulty_label="easy")
+    return start_game(user_id=None, template_id=t.id)
+
+
+def _state(game_id: int) -> tuple[str, dict[str, list[int]]]:
+    g = GameSession.objects.select_related("puzzle").get(pk=game_id)
+    return read_board(g), read_marks(g)
+
+
+def test_server_undo_redo(game: GameSession) -> None:
+    apply_moves(game_id=game.id, moves=[Move(1, 5), Move(1, 6), Move(2, 3, "pencil")])
+
+    entry = undo_move(game_id=game.id)
+    assert entry is not None and entry.mode == "pencil"
+    assert _state(game.id)[1] == {}
+    undo_move(game_id=game.id)
+    assert _state(game.id)[0][1] == "5"
+
+    redo_move(game_id=game.id)
+    assert _state(game.id)[0][1] == "6"
+
+    # A new move discards the redo tail
+    apply_move(game_id=game.id, cell_index=4, value=2)
+    assert redo_move(game_id=game.id) is None
+    for _ in range(3):
+        assert undo_move(game_id=game.id) is not None
+    assert undo_move(game_id=game.id) is None
+    assert _state(game.id) == (game.puzzle.givens, {})
+
+
+@override_settings(PUZZLE_JOURNAL_LIMIT=8)
+def test_journal_is_bounded_and_replays(game: GameSession) -> None:
+    moves = [Move(1 + i % 20, 1 + i % 9) for i in range(50)]
+    moves += [Move(30, 4, "pencil"), Move(30, 7, "pencil")]
+    apply_moves(game_id=game.id, moves=moves)
+    undo_move(game_id=game.id)
+
+    g = GameSession.objects.get(pk=game.id)
+    assert g.journal_end - g.journal_start <= 8
+    seqs = list(GameMove.objects.filter(game=g).values_list("seq", flat=True))
+    assert seqs == list(range(g.journal_start, g.journal_end))
+    assert g.journal_base is not None
+
+    replayed = replay_session(game_id=game.id)
+    assert (replayed.board_str(), replayed.marks_dict()) == _state(game.id)
+
+
+def test_journal_rows_change_only_for_new_moves(game: GameSession) -> None:
+    apply_moves(game_id=game.id, moves=[Move(1, 5), Move(2, 6), Move(3, 7)])
+    with CaptureQueriesContext(connection) as ctx:
+        undo_move(game_id=game.id)
+        undo_move(game_id=game.id)
+        redo_move(game_id=game.id)
+    writes = [q["sql"] for q in ctx.captured_queries if "puzzle_gamemove" in q["sql"]]
+    assert all(sql.startswith("SELECT") for sql in writes)
+
+    # A new move drops the undone record and inserts its own
+    apply_move(game_id=game.id, cell_index=4, value=8)
+    rows = GameMove.objects.filter(game=game).values_list("seq", "cell_index", "after")
+    assert list(rows) == [(0, 1, 5), (1, 2, 6), (2, 4, 8)]
+    assert replay_session(game_id=game.id).board_str() == _state(game.id)[0]
+
+
+def test_undo_endpoint(game: GameSession) -> None:
+    client = Client()
+    assert client.post(f"/api/games/{game.id}/undo/").status_code == 204
+    apply_move(game_id=game.id, cell_index=2, value=7)
+    resp = client.post(f"/api/games/{game.id}/undo/")
+    assert resp.json() == {"cell_index": 2, "mode": "number", "value": 0}
+    resp = client.post(f"/api/games/{game.id}/redo/")
+    assert resp.json() == {"cell_index": 2, "mode": "number", "value": 7}
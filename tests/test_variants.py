@@ -0,0 +1,161 @@
+import io
+from collections.abc import Callable
+from typing import Any
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client
+
+from puzzle import tasks
+from puzzle.models import PuzzleTemplate
+from puzzle.services.bulk import template_hash
+from puzzle.services.cache import local_cache
+from puzzle.services.codec import SessionPuzzle, read_board
+from puzzle.services.engines import DokusanEngine, GridSpec
+from puzzle.services.engines.canonical import canonical_hash
+from puzzle.services.engines.rating import rate_grid
+from puzzle.services.engines.trace import iter_trace, pack_trace, trace_grid
+from puzzle.services.engines.transform import random_transform
+from puzzle.services.gameplay import apply_move, start_game, validate_board
+from puzzle.services.generation import BatchGenerationResult
+from puzzle.services.hints import MISTAKE, get_next_hint
+from puzzle.services.variants import derive_variants
+
+SPEC = GridSpec(9, 3, 3)
+GIVENS = "609250040458000219102048030013004600000600104804100307000025800040806971006709400"
+SOLUTION = "639251748458367219172948536913574682527683194864192357791425863245836971386719425"
+
+
+@pytest.fixture
+def template(make_template: Callable[..., PuzzleTemplate]) -> PuzzleTemplate:
+    return make_template(
+        givens=GIVENS,
+        solution=SOLUTION,
+        difficulty_metric=0.9,
+        difficulty_label="expert",
+        solve_trace=trace_grid(SPEC, GIVENS),
+        canonical_hash=canonical_hash(SPEC, GIVENS, SOLUTION),
+    )
+
+
+@pytest.mark.parametrize(
+    "spec", [GridSpec(4, 2, 2), GridSpec(6, 2, 3), SPEC], ids=lambda s: f"{s.size}x{s.size}"
+)
+def test_transform_preserves_puzzle_and_trace(spec: GridSpec) -> None:
+    engine = DokusanEngine()
+    givens, solution, _ = engine.generate(spec=spec, difficulty="medium", seed=3)
+    rating = rate_grid(spec, givens)
+    trace = pack_trace(rating.steps)
+    for seed in range(5):
+        t = random_transform(spec, seed)
+        assert random_transform(spec, seed) == t
+        g, s = t.apply(givens), t.apply(solution)
+        assert engine.has_unique_solution(spec=spec, grid=g)
+        assert all(s[i] == v for i, v in enumerate(g) if v != "0")
+        moved = rate_grid(spec, g)
+        assert (moved.metric, moved.histogram) == (rating.metric, rating.histogram)
+        placements = list(iter_trace(t.apply_trace(trace)))
+        assert [p.technique for p in placements] == [p.technique for p in iter_trace(trace)]
+        assert sorted(p.cell for p in placements) == [i for i, v in enumerate(g) if v == "0"]
+        assert all(s[p.cell] == str(p.value) for p in placements)
+
+
+def test_derive_variants_reuses_rating(template: PuzzleTemplate) -> None:
+    parent = template
+    assert derive_variants(size=9, difficulty="expert", count=3, seed=1) == 3
+    variants = list(PuzzleTemplate.objects.filter(parent=parent))
+    assert len(variants) == 3
+    assert len({v.givens for v in variants} | {GIVENS}) == 4
+    for v in variants:
+        assert (v.difficulty_metric, v.difficulty_label) == (0.9, "expert")
+        assert v.canonical_hash == template_hash(v) == parent.canonical_hash
+        assert v.solve_trace is not None
+        for p in iter_trace(bytes(v.solve_trace)):
+            assert v.givens[p.cell] == "0" and v.solution[p.cell] == str(p.value)
+    assert derive_variants(size=9, difficulty="hard", count=3) == 0
+    # The same seed draws the same (parent, seed) pairs: nothing new is inserted.
+    assert derive_variants(size=9, difficulty="expert", count=3, seed=1) == 0
+
+    # Variants are not reported as duplicates by the canonical backfill, and
+    # take the hash their parent is given.
+    PuzzleTemplate.objects.update(canonical_hash=None)
+    out = io.StringIO()
+    call_command("backfill_canonical", stdout=out, stderr=io.StringIO())
+    assert "Hashed: 1, duplicates: 0" in out.getvalue()
+    hashes = set(PuzzleTemplate.objects.values_list("canonical_hash", flat=True))
+    assert hashes == {parent.canonical_hash}
+
+
+def test_refill_uses_variants_before_generating(template: PuzzleTemplate, monkeypatch: Any) -> None:
+    calls: list[int] = []
+
+    def fake_generate(**kwargs: Any) -> BatchGenerationResult:
+        calls.append(kwargs["count"])
+        return BatchGenerationResult(created=0)
+
+    monkeypatch.setattr(tasks, "generate_templates", fake_generate)
+    assert tasks.refill_puzzle_queue(size=9, difficulty="expert", min_count=4) == 3
+    assert PuzzleTemplate.objects.filter(difficulty_label="expert").count() == 4
+    assert calls == []
+
+    # Nothing to derive from: falls back to the generator.
+    tasks.refill_puzzle_queue(size=9, difficulty="hard", min_count=2)
+    assert calls == [2]
+
+
+def test_virtual_session_is_played_against_the_transform(template: PuzzleTemplate) -> None:
+    t = template
+    game = start_game(user_id=None, template_id=t.id, transform_seed=7)
+    played = SessionPuzzle.from_game(game)
+    transform = random_transform(SPEC, 7)
+    assert (played.givens, played.solution) == (
+        transform.apply(GIVENS),
+        transform.apply(SOLUTION),
+    )
+    assert read_board(game) == played.givens != GIVENS
+    assert PuzzleTemplate.objects.count() == 1
+
+    # Hints come from the remapped trace and lead to the transformed solution.
+    for _ in range(100):
+        hint = get_next_hint(game_id=game.id)
+        if hint is None:
+            break
+        assert hint.technique != MISTAKE
+        if hint.cell_index is not None and hint.value is not None:
+            assert str(hint.value) == played.solution[hint.cell_index]
+            res = apply_move(game_id=game.id, cell_index=hint.cell_index, value=hint.value)
+    assert hint is None
+    assert res.game.mistakes_count == 0
+    assert validate_board(game_id=game.id)
+
+
+def test_virtual_puzzle_api(template: PuzzleTemplate) -> None:
+    # Payloads cached by earlier tests may be keyed by a reused template id.
+    cache.clear()
+    local_cache.clear()
+    client = Client()
+    t = template
+    transform = random_transform(SPEC, 11)
+
+    plain = client.get(f"/api/puzzles/{t.id}/").json()
+    assert plain["givens"] == GIVENS and "transform_seed" not in plain
+    data = client.get(f"/api/puzzles/{t.id}/?transform_seed=11").json()
+    assert (data["givens"], data["transform_seed"]) == (transform.apply(GIVENS), 11)
+    assert (
+        client.get("/api/puzzles/?size=9&difficulty=expert&transform=true").json()["transform_seed"]
+        >= 0
+    )
+    assert client.get(f"/api/puzzles/{t.id}/?transform_seed=-1").status_code == 400
+
+    resp = client.post("/api/games/", {"template_id": t.id, "transform_seed": 11})
+    assert resp.json()["transform_seed"] == 11
+    assert resp.json()["board_state"] == transform.apply(GIVENS)
+    game_id = resp.json()["id"]
+    assert client.get(f"/api/games/{game_id}/").json()["transform_seed"] == 11
+
+    for board, solved in ((SOLUTION, False), (transform.apply(SOLUTION), True)):
+        client.put(
+            f"/api/games/{game_id}/", data={"board_state": board}, content_type="application/json"
+        )
+        assert client.post(f"/api/games/{game_id}/check/").json()["solved"] is solved